@@ -0,0 +1,156 @@
+"""
+Benchmarks exports of documents as assembled by `generate_output`: HTML rendered
+in-process versus with a pandoc subprocess, and PDF per available engine.
+
+Usage:
+    make benchmark_export
+    SYS_ROOT_PATH=$PWD PYTHONPATH=$PWD python scripts/benchmark_export.py --pdf
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from shutil import which
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from src.config import GUI_EXPORT_PDF_ENGINES
+from src.gui.gui_builder.gui_actions import generate_output
+from src.gui.gui_builder.gui_export_chunks import (
+    is_chunked_export,
+    write_html_chunked,
+)
+from src.gui.gui_builder.gui_export_template import (
+    HtmlExportTemplate,
+    get_html_export_template,
+)
+from src.gui.gui_builder.gui_file_utils import _save_html_from_md_pandoc
+from src.gui.gui_builder.gui_md_render import render_html_document
+from src.gui.gui_builder.gui_pdf_engines import (
+    _has_mylatexformat,
+    _is_engine_available,
+    _render_pandoc_engine,
+    render_pdf,
+)
+
+TITLE = "chat_upload_sample.csv"
+
+
+def _time_ms(fn, runs: int) -> float:
+    """Returns the median wall time of `fn` over `runs` calls in milliseconds."""
+
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        fn()
+        timings.append((perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def _build_document(groups: int) -> str:
+    """Returns a document with `groups` text groups, as shown in the editor."""
+
+    return generate_output(
+        [f"Use Case #{i}" for i in range(groups)],
+        [f"Query #{i}" for i in range(groups)],
+        [f"Response #{i} with *emphasis* and **bold** text." for i in range(groups)],
+        TITLE,
+    )
+
+
+def benchmark_html(
+    md_str: str, template: HtmlExportTemplate, runs: int, tmp_dir: str
+) -> dict:
+    """Times HTML export in-process and, if installed, with pandoc."""
+
+    output_path = Path(tmp_dir, "out.html")
+    results = {
+        "in-process": _time_ms(
+            lambda: output_path.write_text(
+                render_html_document(template, TITLE, md_str),
+                encoding="utf-8",
+            ),
+            runs,
+        )
+    }
+    if is_chunked_export(md_str):
+        results["in-process chunked"] = _time_ms(
+            lambda: write_html_chunked(output_path, template, TITLE, md_str), runs
+        )
+    if which("pandoc"):
+        results["pandoc"] = _time_ms(
+            lambda: _save_html_from_md_pandoc(output_path, template, TITLE, md_str),
+            runs,
+        )
+    return results
+
+
+def benchmark_pdf(
+    md_str: str, template: HtmlExportTemplate, runs: int, tmp_dir: str
+) -> dict:
+    """Times PDF export of the HTML per available engine."""
+
+    html_path = Path(tmp_dir, "in.html")
+    html_path.write_text(
+        render_html_document(template, TITLE, md_str), encoding="utf-8"
+    )
+    pdf_path = Path(tmp_dir, "out.pdf")
+    results = {}
+    for engine in GUI_EXPORT_PDF_ENGINES:
+        if not _is_engine_available(engine):
+            continue
+        if engine == "pdflatex" and _has_mylatexformat():
+            render_pdf(html_path, pdf_path, engine)  # dumps the format once
+            results["pdflatex (format)"] = _time_ms(
+                lambda: render_pdf(html_path, pdf_path, "pdflatex"), runs
+            )
+        results[engine] = _time_ms(
+            lambda engine=engine: (
+                _render_pandoc_engine(html_path, pdf_path, engine)
+                if engine in ("pdflatex", "tectonic")
+                else render_pdf(html_path, pdf_path, engine)
+            ),
+            runs,
+        )
+    return results
+
+
+def _print_results(heading: str, results: dict, missing: str):
+    print(heading)
+    for name, ms in results.items():
+        print(f"  {name:<18} {ms:9.2f} ms")
+    if not results or missing:
+        print(f"  {missing or 'no engine installed, skipped'}")
+
+
+def main():
+    """Prints median export times for documents of the requested sizes."""
+
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--groups", type=int, nargs="+", default=[10, 50], help="text groups"
+    )
+    parser.add_argument("--runs", type=int, default=10, help="runs per path")
+    parser.add_argument("--pdf", action="store_true", help="also benchmark PDF")
+    args = parser.parse_args()
+
+    template = get_html_export_template()
+    for groups in args.groups:
+        md_str = _build_document(groups)
+        with TemporaryDirectory() as tmp_dir:
+            results = benchmark_html(md_str, template, args.runs, tmp_dir)
+            _print_results(
+                f"HTML export, {groups} groups, median of {args.runs} runs",
+                results,
+                "" if "pandoc" in results else "pandoc not installed, skipped",
+            )
+            if args.pdf:
+                _print_results(
+                    f"PDF export, {groups} groups, median of {args.runs} runs",
+                    benchmark_pdf(md_str, template, args.runs, tmp_dir),
+                    "",
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load-tests a running app, single process or workers behind the router: many
+clients, each with its own cookies like a browser, load the page and then poll
+an endpoint. Reports throughput, latency percentiles and clients per worker.
+
+Usage:
+    make run_cluster workers=4
+    make load_test_cluster
+    PYTHONPATH=$PWD python scripts/load_test_cluster.py --clients 50 --requests 20
+"""
+
+from argparse import ArgumentParser
+from asyncio import gather, run
+from collections import Counter
+from statistics import quantiles
+from time import perf_counter
+
+import httpx
+
+from src.config import SERVER_CLUSTER_COOKIE
+
+
+async def _run_client(
+    base_url: str, path: str, n_requests: int
+) -> tuple[list[float], str, int]:
+    """Loads the page, then requests `path`. Returns latencies, worker and errors."""
+
+    latencies, errors = [], 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for request_path in ["/"] + [path] * n_requests:
+            start = perf_counter()
+            try:
+                response = await client.get(request_path)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((perf_counter() - start) * 1000)
+        worker = client.cookies.get(SERVER_CLUSTER_COOKIE, "-")
+    return latencies, worker, errors
+
+
+async def _load_test(base_url: str, path: str, n_clients: int, n_requests: int):
+    """Runs all clients concurrently and prints the results."""
+
+    start = perf_counter()
+    results = await gather(
+        *(_run_client(base_url, path, n_requests) for _ in range(n_clients))
+    )
+    elapsed = perf_counter() - start
+
+    latencies = [
+        latency for client_latencies, _, _ in results for latency in client_latencies
+    ]
+    errors = sum(client_errors for _, _, client_errors in results)
+    workers = Counter(worker for _, worker, _ in results)
+    print(
+        f"{len(latencies)} requests in {elapsed:.1f}s, {len(latencies) / elapsed:.1f}/s"
+    )
+    if len(latencies) > 1:
+        percentiles = quantiles(latencies, n=100)
+        print(f"latency p50 {percentiles[49]:.1f}ms, p95 {percentiles[94]:.1f}ms")
+    print(f"errors {errors}")
+    print(f"clients per worker {dict(sorted(workers.items()))}")
+
+
+def main():
+    """Prints throughput and latency of many concurrent clients."""
+
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/gradio_api/info")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=10, help="per client")
+    args = parser.parse_args()
+    run(_load_test(args.url, args.path, args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
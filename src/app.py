@@ -2,11 +2,17 @@
 Entry point for the Gradio demo app, initializing and launching
 the UI on Azure Web App. Imports UI components from gradio.py,
 logging from log.py, and configuration from config.py.
+`--profile-startup` prints where the time to the first response goes instead.
 """
 
+from argparse import ArgumentParser, Namespace
+
+from fastapi import FastAPI
 from gradio import Info
+import uvicorn
 
 from src.__init__ import __version__
+from src.batch.engine import resume_unfinished_jobs, start_job_sweeper
 from src.chat.azure_config import load_chat_config_to_env
 from src.config import (
     CHAT_DRY_RUN_NO_LOAD_ENV,
@@ -15,19 +21,27 @@ from src.config import (
     PROJECT_SHORT_DESCRIPTION,
     SERVER_PORT,
     SERVER_NAME,
+    SERVER_WARMUP_TIMEOUT,
+    SERVER_WORKER_INDEX,
+    SERVER_WORKERS,
 )
 from src.gui.gui import build_ui
+from src.server.server_app import create_server_app
+from src.server.session_lifecycle import start_session_sweeper
+from src.server.startup_profile import (
+    format_startup_profile,
+    get_startup_phases,
+    profile_imports,
+    startup_phase,
+)
+from src.server.warmup import get_readiness, start_warmup, wait_for_warmup
 from src.utils.log import logger
 
 
-def main():
-    """Main function to initialize and launch the Gradio app."""
+def create_app() -> FastAPI:
+    """Load the chat config, build the UI and return it mounted on the server app."""
 
-    try:
-        logger.opt(raw=True).info("\n# ▶️  ─────────────────────────────  \n")
-        logger.info(
-            f"Starting App [{PROJECT_NAME}] {PROJECT_SHORT_DESCRIPTION} [v{__version__}] ... "
-        )
+    with startup_phase("chat config"):
         if not CHAT_DRY_RUN_NO_LOAD_ENV:
             try:
                 load_chat_config_to_env()
@@ -38,15 +52,76 @@ def main():
                     duration=GUI_INFO_DURATION,
                 )
                 logger.exception(msg)
-        app = build_ui()
-        logger.info(f"Launching Gradio on {SERVER_NAME}:{SERVER_PORT} ... ")
-        app.launch(
-            server_name=SERVER_NAME,
-            server_port=SERVER_PORT,
-            share=False,
-            debug=False,
-            pwa=True,
+    # batch jobs are leased, so every worker resumes those of dead workers
+    with startup_phase("resume batch jobs"):
+        resume_unfinished_jobs()
+    start_job_sweeper()
+    # session folders are shared, so only the first worker sweeps sessions while
+    # all keep the activity of their connected sessions fresh
+    start_session_sweeper(sweep=SERVER_WORKER_INDEX == 0)
+    with startup_phase("build ui"):
+        blocks = build_ui()
+    with startup_phase("mount app"):
+        app = create_server_app(blocks)
+    # export tools, templates and the chat connection warm up while serving,
+    # SERVER_READY_ROUTE reports ready once they are
+    start_warmup()
+    return app
+
+
+def profile_startup() -> str:
+    """
+    Builds the app and sends it a first request, returns the startup profile with
+    the import times of a fresh interpreter and the background warm-up.
+    """
+
+    from fastapi.testclient import TestClient
+
+    app = create_app()
+    with startup_phase("first response"), TestClient(app) as client:
+        client.get("/")
+    wait_for_warmup(timeout=SERVER_WARMUP_TIMEOUT * 10)
+    warmup = {
+        name: check["seconds"] for name, check in get_readiness()[1]["checks"].items()
+    }
+    return format_startup_profile(
+        profile_imports("src.app"), get_startup_phases(), warmup
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    """Parses the command-line arguments of the app."""
+
+    parser = ArgumentParser(prog="python -m src.app", description=PROJECT_NAME)
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print import and build times up to the first response, then exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    """Main function to initialize and launch the Gradio app."""
+
+    args = parse_args(argv)
+    if args.profile_startup:
+        print(profile_startup())
+        return
+
+    try:
+        logger.opt(raw=True).info("\n# ▶️  ─────────────────────────────  \n")
+        logger.info(
+            f"Starting App [{PROJECT_NAME}] {PROJECT_SHORT_DESCRIPTION} [v{__version__}] ... "
         )
+        if SERVER_WORKERS > 1:
+            from src.server.cluster import run_cluster
+
+            run_cluster(SERVER_WORKERS)
+            return
+        app = create_app()
+        logger.info(f"Launching Gradio on {SERVER_NAME}:{SERVER_PORT} ... ")
+        uvicorn.run(app, host=SERVER_NAME, port=SERVER_PORT)
     except KeyboardInterrupt:
         logger.warning("KeyboardInterrupt caught. Shutting down...")
     except Exception as e:
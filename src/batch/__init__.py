@@ -0,0 +1,4 @@
+"""
+Headless batch processing of uploaded CSV rows through the chat model, with
+progress checkpointed to a local SQLite job store.
+"""
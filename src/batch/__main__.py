@@ -0,0 +1,117 @@
+"""
+Command-line batch runner, streaming prompts from a CSV or JSONL file or stdin
+through the chat model and writing validated results as JSONL to stdout.
+
+Usage:
+    python -m src.batch prompts.jsonl > results.jsonl
+    cat prompts.csv | python -m src.batch --format csv --workers 8 --order completed
+"""
+
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from sys import stdin, stdout
+
+from src.batch.stream_runner import (
+    INPUT_FORMAT_CSV,
+    INPUT_FORMAT_JSONL,
+    ORDER_COMPLETED,
+    ORDER_INPUT,
+    iter_csv_prompts,
+    iter_jsonl_prompts,
+    run_stream,
+)
+from src.chat.azure_client import create_azure_client
+from src.chat.azure_config import AzureConfig, load_chat_config_to_env
+from src.config import BATCH_MAX_WORKERS, CHAT_DRY_RUN_NO_LOAD_ENV
+from src.utils.log import logger
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    """Parses the command-line arguments of the batch runner."""
+
+    parser = ArgumentParser(
+        prog="python -m src.batch",
+        description="Run prompts through the chat model and write JSONL results.",
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="CSV or JSONL file with prompts, '-' for stdin (default)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=[INPUT_FORMAT_CSV, INPUT_FORMAT_JSONL],
+        help="input format, derived from the file extension if omitted, "
+        "JSONL for stdin",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BATCH_MAX_WORKERS,
+        help=f"prompts queried concurrently (default {BATCH_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--order",
+        choices=[ORDER_INPUT, ORDER_COMPLETED],
+        default=ORDER_INPUT,
+        help="write results in input order (default) or as they complete",
+    )
+    parser.add_argument(
+        "--column",
+        type=int,
+        default=1,
+        help="CSV column holding the prompt (default 1, the second column)",
+    )
+    parser.add_argument(
+        "--no-headers",
+        action="store_true",
+        help="CSV input has no header row",
+    )
+    parser.add_argument(
+        "--key",
+        default="prompt",
+        help="JSONL key holding the prompt (default 'prompt')",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the batch runner and returns the process exit code."""
+
+    args = parse_args(argv)
+    input_format = args.format
+    if input_format is None:
+        is_csv = args.input != "-" and Path(args.input).suffix.lower() == ".csv"
+        input_format = INPUT_FORMAT_CSV if is_csv else INPUT_FORMAT_JSONL
+
+    chat_config = None
+    if not CHAT_DRY_RUN_NO_LOAD_ENV:
+        try:
+            chat_config = AzureConfig()  # type: ignore[reportCallIssue]
+            load_chat_config_to_env(chat_config)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Cannot run batch without a valid AzureConfig: {e}")
+            return 2
+    client = create_azure_client(chat_config) if chat_config is not None else None
+
+    stream = (
+        stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")  # noqa: SIM115
+    )
+    try:
+        if input_format == INPUT_FORMAT_CSV:
+            prompts = iter_csv_prompts(stream, args.column, not args.no_headers)
+        else:
+            prompts = iter_jsonl_prompts(stream, args.key)
+        written = run_stream(
+            prompts, stdout, args.workers, args.order, chat_config, client
+        )
+    finally:
+        if stream is not stdin:
+            stream.close()
+    logger.info(f"Wrote {written} results")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,380 @@
+"""
+Background batch engine running every row of an uploaded CSV through the chat
+model with bounded concurrency. Answered rows are checkpointed to the job store
+and appended to a JSONL output file as they complete, so a restarted job only
+queries the rows that are still missing. Rows whose query failed are written with
+their error but not checkpointed, so resuming the job retries them. Every app
+worker periodically resumes running jobs whose lease expired because the worker
+running them died. Jobs stopped on request are only resumed explicitly.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from json import dumps
+from os import getpid
+from pathlib import Path
+from socket import gethostname
+from threading import Event, Lock, Thread
+from time import monotonic
+from uuid import uuid4
+
+from src.batch.job_store import (
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_STOPPED,
+    claim_job,
+    create_job,
+    get_finished_rows,
+    get_job,
+    iter_row_results,
+    list_unleased_jobs,
+    record_row_result,
+    release_job,
+    renew_job_lease,
+    set_job_status,
+)
+from src.chat.job_broker import query_chat_checked
+from src.config import (
+    BATCH_JOB_HEARTBEAT_INTERVAL,
+    BATCH_JOB_LEASE,
+    BATCH_JOB_SWEEP_INTERVAL,
+    BATCH_MAX_WORKERS,
+    SYS_DOWNLOAD_PATH,
+    SYS_DOWNLOAD_PREFIX,
+)
+from src.gui.gui_builder.gui_csv_index import CsvRowIndex
+from src.gui.gui_builder.gui_file_utils import (
+    create_path,
+    get_path_session_id,
+    sanitize_csv_data,
+)
+from src.utils.log import logger
+
+
+def _get_owner() -> str:
+    """Returns the lease owner name of this process."""
+
+    return f"{gethostname()}:{getpid()}"
+
+
+@dataclass
+class BatchRun:
+    """In-process state of a running job, used for throughput and ETA."""
+
+    job_id: str
+    owner: str = field(default_factory=_get_owner)
+    started_at: float = field(default_factory=monotonic)
+    done_in_run: int = 0
+    failed_in_run: int = 0
+    stop: Event = field(default_factory=Event)
+    lease_lost: Event = field(default_factory=Event)
+    finished: Event = field(default_factory=Event)
+    thread: Thread | None = None
+
+
+_RUNS: dict[str, BatchRun] = {}
+_RUNS_LOCK = Lock()
+_sweeper_stop = Event()
+_sweeper: Thread | None = None
+
+
+def _build_prompt(row: list[str]) -> tuple[str, str]:
+    """Returns (title, query) of a row, using the same columns as the text groups."""
+
+    sanitized_row = sanitize_csv_data(row) if row else [""]
+    title = sanitized_row[0]
+    query = sanitized_row[1] if len(sanitized_row) > 1 else sanitized_row[0]
+    return title, query
+
+
+def _process_row(
+    row_no: int,
+    title: str,
+    query: str,
+    system_prompt: str | None = None,
+    task_id: str | None = None,
+) -> tuple[bool, str]:
+    """
+    Queries the model for one row and returns whether it was answered and the
+    JSONL record of its result, with the error of a failed query. With the chat
+    worker tier, `task_id` lets a resumed job pick up the row's queued or
+    answered query.
+    """
+
+    answered, content = query_chat_checked(query, system_prompt, task_id)
+    record = {"row": row_no, "title": title, "query": query}
+    if answered:
+        record["response"] = content
+        record["error"] = None
+    else:
+        record["response"] = None
+        record["error"] = content
+    return answered, dumps(record)
+
+
+def _rewrite_output(job_id: str, output_path: Path):
+    """Rewrites the output file from the checkpoints, dropping partial writes."""
+
+    with output_path.open("w", encoding="utf-8") as out:
+        for _, result in iter_row_results(job_id):
+            out.write(f"{result}\n")
+
+
+def _renew_lease(run: BatchRun):
+    """Renews the lease of a job until its run finished, stops it if it is lost."""
+
+    while not run.finished.wait(BATCH_JOB_HEARTBEAT_INTERVAL):
+        if not renew_job_lease(run.job_id, run.owner, BATCH_JOB_LEASE):
+            msg = f"Batch job {run.job_id} was claimed by another worker, stopping"
+            logger.error(msg)
+            run.lease_lost.set()
+            run.stop.set()
+            return
+
+
+def _run_job(run: BatchRun):
+    """Processes all missing rows of a job. Runs in the job's background thread."""
+
+    job = get_job(run.job_id)
+    if job is None:
+        release_job(run.job_id, run.owner)
+        return
+    output_path = Path(job["output_path"])
+    row_index = None
+    Thread(target=_renew_lease, args=(run,), daemon=True).start()
+    try:
+        set_job_status(run.job_id, JOB_STATUS_RUNNING)
+        row_index = CsvRowIndex(job["source_path"], bool(job["has_headers"]))
+        row_index.build()
+        finished = get_finished_rows(run.job_id)
+        _rewrite_output(run.job_id, output_path)
+        max_in_flight = 2 * BATCH_MAX_WORKERS
+
+        with (
+            output_path.open("a", encoding="utf-8") as out,
+            ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as pool,
+        ):
+            in_flight: dict[Future, int] = {}
+
+            def drain(return_when: str):
+                done, _ = wait(in_flight, return_when=return_when)
+                for future in done:
+                    row_no = in_flight.pop(future)
+                    if run.lease_lost.is_set():
+                        # the job's new owner writes this row
+                        continue
+                    answered, result = future.result()
+                    if answered:
+                        record_row_result(run.job_id, row_no, result)
+                        run.done_in_run += 1
+                    else:
+                        run.failed_in_run += 1
+                    out.write(f"{result}\n")
+                    out.flush()
+
+            for row_no, row in enumerate(row_index.iter_rows()):
+                if run.stop.is_set():
+                    break
+                if row_no in finished:
+                    continue
+                future = pool.submit(
+                    _process_row,
+                    row_no,
+                    *_build_prompt(row),
+                    job["system_prompt"],
+                    f"{run.job_id}:{row_no}",
+                )
+                in_flight[future] = row_no
+                if len(in_flight) >= max_in_flight:
+                    drain(FIRST_COMPLETED)
+            if run.lease_lost.is_set():
+                for future in in_flight:
+                    future.cancel()
+            if in_flight:
+                drain("ALL_COMPLETED")
+
+        if run.lease_lost.is_set():
+            logger.info(f"Batch job {run.job_id} left to its new owner")
+        elif run.stop.is_set():
+            set_job_status(run.job_id, JOB_STATUS_STOPPED)
+            logger.info(f"Batch job {run.job_id} stopped, resumable")
+        elif run.failed_in_run:
+            set_job_status(run.job_id, JOB_STATUS_FAILED)
+            logger.error(
+                f"Batch job {run.job_id} finished with {run.failed_in_run} failed "
+                "rows, resume it to retry them"
+            )
+        else:
+            set_job_status(run.job_id, JOB_STATUS_DONE)
+            logger.info(f"Batch job {run.job_id} finished: {output_path}")
+    except Exception as e:
+        msg = f"Batch job {run.job_id} failed: {e}"
+        logger.exception(msg)
+        if not run.lease_lost.is_set():
+            set_job_status(run.job_id, JOB_STATUS_FAILED)
+    finally:
+        run.finished.set()
+        release_job(run.job_id, run.owner)
+        if row_index is not None:
+            row_index.close()
+
+
+def _launch(job_id: str) -> BatchRun | None:
+    """
+    Starts the background thread of a job unless it is already running. Returns
+    None if another worker holds the job's lease.
+    """
+
+    with _RUNS_LOCK:
+        run = _RUNS.get(job_id)
+        if run is not None and run.thread is not None and run.thread.is_alive():
+            return run
+        run = BatchRun(job_id)
+        if not claim_job(job_id, run.owner, BATCH_JOB_LEASE):
+            return None
+        run.thread = Thread(target=_run_job, args=(run,), daemon=True)
+        _RUNS[job_id] = run
+        run.thread.start()
+        return run
+
+
+def start_batch_job(
+    session_id: str,
+    source_path: str | Path,
+    has_headers: bool,
+    system_prompt: str | None = None,
+) -> str | None:
+    """
+    Creates a job for all rows of `source_path` and starts it in the background,
+    querying with `system_prompt` or the default. Returns the job id, or None if
+    the file could not be indexed.
+    """
+
+    download_path = get_path_session_id(session_id, Path(SYS_DOWNLOAD_PATH))
+    if isinstance(download_path, str):
+        logger.error(download_path)
+        return None
+    create_path(download_path)
+
+    try:
+        row_index = CsvRowIndex(source_path, bool(has_headers))
+        try:
+            row_index.build()
+            total_rows = row_index.row_count
+        finally:
+            row_index.close()
+    except Exception as e:
+        msg = f"Could not index {source_path} for batch processing: {e}"
+        logger.exception(msg)
+        return None
+
+    job_id = uuid4().hex
+    output_path = download_path / (
+        f"{SYS_DOWNLOAD_PREFIX}{Path(source_path).stem}_{job_id[:8]}.jsonl"
+    )
+    create_job(
+        job_id,
+        session_id,
+        source_path,
+        output_path,
+        has_headers,
+        total_rows,
+        system_prompt,
+        _get_owner(),
+        BATCH_JOB_LEASE,
+    )
+    logger.info(f"Starting batch job {job_id} over {total_rows} rows of {source_path}")
+    _launch(job_id)
+    return job_id
+
+
+def resume_unfinished_jobs(retry_failed: bool = True) -> list[str]:
+    """
+    Restarts running jobs whose lease expired, e.g. because their worker died,
+    and with `retry_failed` the missing rows of failed jobs. Jobs leased to a live
+    worker are left alone. Returns the ids of the jobs resumed here.
+    """
+
+    job_ids = list_unleased_jobs(JOB_STATUS_RUNNING)
+    if retry_failed:
+        job_ids += list_unleased_jobs(JOB_STATUS_FAILED)
+    resumed = []
+    for job_id in job_ids:
+        if _launch(job_id) is not None:
+            logger.info(f"Resumed batch job {job_id}")
+            resumed.append(job_id)
+    return resumed
+
+
+def _run_sweeper():
+    while not _sweeper_stop.wait(BATCH_JOB_SWEEP_INTERVAL):
+        try:
+            resume_unfinished_jobs(retry_failed=False)
+        except Exception as e:
+            logger.exception(f"Batch job sweep failed: {e}")
+
+
+def start_job_sweeper():
+    """Starts the background thread resuming jobs of dead workers once per process."""
+
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    _sweeper_stop.clear()
+    _sweeper = Thread(target=_run_sweeper, name="batch-job-sweeper", daemon=True)
+    _sweeper.start()
+
+
+def stop_job_sweeper():
+    """Stops the background job sweep thread."""
+
+    _sweeper_stop.set()
+
+
+def stop_batch_job(job_id: str):
+    """
+    Marks a job stopped and signals its run to stop after its in-flight rows.
+    Sweeps skip stopped jobs, so it only continues with `resume_batch_job`.
+    """
+
+    set_job_status(job_id, JOB_STATUS_STOPPED)
+    run = _RUNS.get(job_id)
+    if run is not None:
+        run.stop.set()
+
+
+def resume_batch_job(job_id: str) -> bool:
+    """
+    Resumes the missing rows of a stopped or failed job. Returns False if the job
+    is unknown, finished, or leased to another worker.
+    """
+
+    job = get_job(job_id)
+    if job is None or job["status"] == JOB_STATUS_DONE:
+        return False
+    return _launch(job_id) is not None
+
+
+def get_batch_progress(job_id: str) -> dict | None:
+    """
+    Returns progress of a job: status, done and total rows, output path, and the
+    throughput of the current run in rows/sec with the resulting ETA in seconds.
+    """
+
+    job = get_job(job_id)
+    if job is None:
+        return None
+
+    run = _RUNS.get(job_id)
+    elapsed = monotonic() - run.started_at if run is not None else 0.0
+    rows_per_sec = run.done_in_run / elapsed if run is not None and elapsed > 0 else 0.0
+    remaining = job["total_rows"] - job["done_rows"]
+    return {
+        "status": job["status"],
+        "done": job["done_rows"],
+        "total": job["total_rows"],
+        "output_path": job["output_path"],
+        "rows_per_sec": rows_per_sec,
+        "eta_seconds": remaining / rows_per_sec if rows_per_sec > 0 else None,
+    }
@@ -0,0 +1,228 @@
+"""
+SQLite job store for batch runs. Every finished row is committed on its own, so
+an interrupted job resumes with the rows that are still missing. A running job is
+leased to the process running it, which renews the lease while it works; jobs
+whose lease expired are free to be claimed and resumed by any app worker.
+"""
+
+from pathlib import Path
+from sqlite3 import Connection, connect
+from threading import Lock
+from time import time
+
+from src.config import BATCH_DB_FILE
+from src.utils.log import logger
+
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_STOPPED = "stopped"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    has_headers INTEGER NOT NULL,
+    total_rows INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    system_prompt TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE TABLE IF NOT EXISTS job_rows (
+    job_id TEXT NOT NULL,
+    row_no INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, row_no)
+);
+"""
+
+_connection: Connection | None = None
+_connection_lock = Lock()
+
+
+def _get_connection() -> Connection:
+    """Returns the shared connection, creating database and schema on first use."""
+
+    global _connection
+    if _connection is None:
+        Path(BATCH_DB_FILE).parent.mkdir(parents=True, exist_ok=True)
+        _connection = connect(BATCH_DB_FILE, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.executescript(_SCHEMA)
+        columns = {row[1] for row in _connection.execute("PRAGMA table_info(jobs)")}
+        if "system_prompt" not in columns:  # stores created before prompts per job
+            _connection.execute("ALTER TABLE jobs ADD COLUMN system_prompt TEXT")
+        if "owner" not in columns:  # stores created before job leases
+            _connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            _connection.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        logger.info(f"Opened batch job store {BATCH_DB_FILE}")
+    return _connection
+
+
+def create_job(
+    job_id: str,
+    session_id: str,
+    source_path: str | Path,
+    output_path: str | Path,
+    has_headers: bool,
+    total_rows: int,
+    system_prompt: str | None = None,
+    owner: str | None = None,
+    lease: float = 0.0,
+):
+    """
+    Registers a new running job, queried with `system_prompt` or the default and
+    leased to `owner` for `lease` seconds.
+    """
+
+    now = time()
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                session_id,
+                str(source_path),
+                str(output_path),
+                int(has_headers),
+                total_rows,
+                JOB_STATUS_RUNNING,
+                now,
+                now,
+                system_prompt,
+                owner,
+                now + lease if owner is not None else None,
+            ),
+        )
+
+
+def get_job(job_id: str) -> dict | None:
+    """Returns the job record including its count of finished rows."""
+
+    with _connection_lock:
+        cursor = _get_connection().execute(
+            "SELECT j.*, (SELECT COUNT(*) FROM job_rows r WHERE r.job_id = j.job_id) "
+            "AS done_rows FROM jobs j WHERE j.job_id = ?",
+            (job_id,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([col[0] for col in cursor.description], row))
+
+
+def list_jobs(status: str) -> list[str]:
+    """Returns the ids of all jobs with `status`, oldest first."""
+
+    with _connection_lock:
+        rows = _get_connection().execute(
+            "SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+        )
+        return [row[0] for row in rows]
+
+
+def list_unleased_jobs(status: str, now: float | None = None) -> list[str]:
+    """Returns the ids of all jobs with `status` and no live lease, oldest first."""
+
+    now = time() if now is None else now
+    with _connection_lock:
+        rows = _get_connection().execute(
+            "SELECT job_id FROM jobs WHERE status = ? "
+            "AND (lease_until IS NULL OR lease_until < ?) ORDER BY created_at",
+            (status, now),
+        )
+        return [row[0] for row in rows]
+
+
+def claim_job(job_id: str, owner: str, lease: float) -> bool:
+    """
+    Leases a job to `owner` for `lease` seconds unless another owner holds a live
+    lease. Returns whether `owner` holds the job now.
+    """
+
+    now = time()
+    with _connection_lock, _get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET owner = ?, lease_until = ? WHERE job_id = ? "
+            "AND (owner IS NULL OR owner = ? OR lease_until < ?)",
+            (owner, now + lease, job_id, owner, now),
+        )
+        return cursor.rowcount == 1
+
+
+def renew_job_lease(job_id: str, owner: str, lease: float) -> bool:
+    """Extends the lease of `owner` on a job. Returns False if it was lost."""
+
+    with _connection_lock, _get_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND owner = ?",
+            (time() + lease, job_id, owner),
+        )
+        return cursor.rowcount == 1
+
+
+def release_job(job_id: str, owner: str):
+    """Ends the lease of `owner` on a job, so any worker may resume it."""
+
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET owner = NULL, lease_until = NULL "
+            "WHERE job_id = ? AND owner = ?",
+            (job_id, owner),
+        )
+
+
+def set_job_status(job_id: str, status: str):
+    """Updates the status of a job."""
+
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+            (status, time(), job_id),
+        )
+
+
+def record_row_result(job_id: str, row_no: int, result: str):
+    """Checkpoints the result of one row."""
+
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO job_rows VALUES (?, ?, ?)",
+            (job_id, row_no, result),
+        )
+
+
+def get_finished_rows(job_id: str) -> set[int]:
+    """Returns the row numbers already checkpointed for a job."""
+
+    with _connection_lock:
+        rows = _get_connection().execute(
+            "SELECT row_no FROM job_rows WHERE job_id = ?", (job_id,)
+        )
+        return {row[0] for row in rows}
+
+
+def iter_row_results(job_id: str, batch_size: int = 1000):
+    """Yields (row_no, result) of all checkpointed rows in row order."""
+
+    last_row_no = -1
+    while True:
+        with _connection_lock:
+            rows = (
+                _get_connection()
+                .execute(
+                    "SELECT row_no, result FROM job_rows WHERE job_id = ? "
+                    "AND row_no > ? ORDER BY row_no LIMIT ?",
+                    (job_id, last_row_no, batch_size),
+                )
+                .fetchall()
+            )
+        if not rows:
+            return
+        yield from rows
+        last_row_no = rows[-1][0]
@@ -0,0 +1,159 @@
+"""
+Streaming export of result records to CSV, JSONL, Parquet and XLSX. Records are
+written as they are read, Parquet in fixed-size record batches and XLSX with
+the constant-memory writer, so memory stays flat for large result sets. Parquet
+needs pyarrow and XLSX needs xlsxwriter, both optional.
+"""
+
+from collections.abc import Iterable, Iterator
+from csv import writer
+from importlib.util import find_spec
+from itertools import islice
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+
+from src.batch.job_store import get_job, iter_row_results
+from src.config import (
+    BATCH_EXPORT_FORMATS,
+    BATCH_EXPORT_PARQUET_BATCH_ROWS,
+    BATCH_EXPORT_PARQUET_COMPRESSION,
+)
+from src.utils.log import logger
+
+RESULT_FIELDS = ["row", "title", "query", "response"]
+_OPTIONAL_MODULES = {"parquet": "pyarrow", "xlsx": "xlsxwriter"}
+_XLSX_MAX_CELL_CHARS = 32767
+
+
+def get_available_result_formats() -> list[str]:
+    """Returns the export formats whose optional dependencies are installed."""
+
+    return [
+        file_format
+        for file_format in BATCH_EXPORT_FORMATS
+        if file_format not in _OPTIONAL_MODULES
+        or find_spec(_OPTIONAL_MODULES[file_format]) is not None
+    ]
+
+
+def _as_text(value) -> str | None:
+    """Returns text fields as is and structured ones, e.g. parsed JSON, as JSON."""
+
+    return value if value is None or isinstance(value, str) else dumps(value)
+
+
+def _iter_values(records: Iterable[dict]) -> Iterator[list]:
+    """Yields the RESULT_FIELDS values of each record, row number first."""
+
+    for record in records:
+        yield [record.get("row")] + [_as_text(record.get(n)) for n in RESULT_FIELDS[1:]]
+
+
+def _write_csv(records: Iterable[dict], output_path: Path):
+    with output_path.open("w", newline="", encoding="utf-8") as file:
+        csvwriter = writer(file)
+        csvwriter.writerow(RESULT_FIELDS)
+        csvwriter.writerows(_iter_values(records))
+
+
+def _write_jsonl(records: Iterable[dict], output_path: Path):
+    with output_path.open("w", encoding="utf-8") as file:
+        for record in records:
+            file.write(f"{dumps(record, ensure_ascii=False)}\n")
+
+
+def _write_parquet(records: Iterable[dict], output_path: Path):
+    import pyarrow as pa  # optional dependency, imported on demand
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [("row", pa.int64())] + [(name, pa.string()) for name in RESULT_FIELDS[1:]]
+    )
+    rows = _iter_values(records)
+    with pq.ParquetWriter(
+        output_path, schema, compression=BATCH_EXPORT_PARQUET_COMPRESSION
+    ) as parquet_writer:
+        while batch := list(islice(rows, BATCH_EXPORT_PARQUET_BATCH_ROWS)):
+            columns = [list(column) for column in zip(*batch)]
+            parquet_writer.write_batch(pa.record_batch(columns, schema=schema))
+
+
+def _write_xlsx(records: Iterable[dict], output_path: Path):
+    from xlsxwriter import Workbook  # optional dependency, imported on demand
+
+    workbook = Workbook(str(output_path), {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, RESULT_FIELDS)
+        for row_no, values in enumerate(_iter_values(records), start=1):
+            worksheet.write_row(
+                row_no,
+                0,
+                [
+                    value[:_XLSX_MAX_CELL_CHARS] if isinstance(value, str) else value
+                    for value in values
+                ],
+            )
+    finally:
+        workbook.close()
+
+
+_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+    "xlsx": _write_xlsx,
+}
+
+
+def write_results(records: Iterable[dict], output_path: Path, file_format: str) -> Path:
+    """
+    Streams `records` with RESULT_FIELDS to `output_path` as `file_format`. The
+    file is replaced atomically. Raises ValueError for unknown or unavailable
+    formats.
+    """
+
+    if file_format not in _WRITERS:
+        msg = f"Unknown results format '{file_format}', use one of {list(_WRITERS)}"
+        logger.error(msg)
+        raise ValueError(msg)
+    if file_format not in get_available_result_formats():
+        msg = (
+            f"Results format '{file_format}' needs the optional package "
+            f"'{_OPTIONAL_MODULES.get(file_format, file_format)}'"
+        )
+        logger.error(msg)
+        raise ValueError(msg)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    try:
+        _WRITERS[file_format](records, tmp_path)
+        replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info(f"Exported results to {output_path.name}")
+    return output_path
+
+
+def iter_job_records(job_id: str) -> Iterator[dict]:
+    """Yields the result records of a batch job in row order."""
+
+    for _, result in iter_row_results(job_id):
+        yield loads(result)
+
+
+def export_job_results(job_id: str, file_format: str) -> Path | None:
+    """
+    Exports the checkpointed results of a batch job next to its JSONL output.
+    Returns the exported file, or None if the job is unknown.
+    """
+
+    job = get_job(job_id)
+    if job is None:
+        logger.warning(f"Unknown batch job {job_id}")
+        return None
+    job_output = Path(job["output_path"])
+    output_path = job_output.with_name(f"{job_output.stem}_results.{file_format}")
+    return write_results(iter_job_records(job_id), output_path, file_format)
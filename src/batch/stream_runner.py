@@ -0,0 +1,148 @@
+"""
+Streaming batch runner for the command line. Prompts are read lazily from a CSV
+or JSONL file or stdin and at most a fixed window of them is in flight, so memory
+stays constant regardless of input size. Results are written as JSONL, either in
+input order or as they complete.
+"""
+
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from csv import reader
+from json import JSONDecodeError, dumps, loads
+from typing import TYPE_CHECKING, TextIO
+
+from src.chat.azure_client import query_azure_ai_json
+from src.chat.azure_config import AzureConfig
+from src.chat.data_models import AzureResponseFormat_EN
+from src.utils.log import logger
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
+INPUT_FORMAT_CSV = "csv"
+INPUT_FORMAT_JSONL = "jsonl"
+ORDER_INPUT = "input"
+ORDER_COMPLETED = "completed"
+
+
+def iter_csv_prompts(
+    stream: TextIO, column: int = 1, has_headers: bool = True
+) -> Iterator[tuple[str | None, str]]:
+    """
+    Yields (id, prompt) per CSV row. The prompt is taken from `column`, or from the
+    first column if the row is shorter; the first column doubles as id.
+    """
+
+    csvreader = reader(stream)
+    if has_headers:
+        next(csvreader, None)
+    for row in csvreader:
+        if not row:
+            continue
+        yield row[0], row[column] if len(row) > column else row[0]
+
+
+def iter_jsonl_prompts(
+    stream: TextIO, key: str = "prompt"
+) -> Iterator[tuple[str | None, str]]:
+    """
+    Yields (id, prompt) per JSONL line. A line is either a JSON string or an object
+    holding the prompt under `key` and an optional "id".
+    """
+
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except JSONDecodeError as e:
+            logger.error(f"Skipping invalid JSON on line {line_no}: {e}")
+            continue
+        if isinstance(record, str):
+            yield None, record
+        elif isinstance(record, dict):
+            yield record.get("id"), str(record.get(key, ""))
+        else:
+            logger.error(f"Skipping line {line_no}: expected a string or an object")
+
+
+def _run_prompt(
+    index: int,
+    prompt_id: str | None,
+    prompt: str,
+    chat_config: AzureConfig | None,
+    client: "AzureOpenAI | None",
+) -> str:
+    """Queries the model for one prompt and returns its JSONL result record."""
+
+    valid_response, content = query_azure_ai_json(prompt, chat_config, client)
+    record = {"index": index, "id": prompt_id, "prompt": prompt}
+    if valid_response:
+        record["response"] = AzureResponseFormat_EN.model_validate_json(
+            content  # type: ignore[arg-type]
+        ).model_dump(mode="json")
+        record["error"] = None
+    else:
+        record["response"] = None
+        record["error"] = content
+    return dumps(record, ensure_ascii=False)
+
+
+def run_stream(
+    prompts: Iterator[tuple[str | None, str]],
+    out: TextIO,
+    workers: int,
+    order: str = ORDER_INPUT,
+    chat_config: AzureConfig | None = None,
+    client: "AzureOpenAI | None" = None,
+) -> int:
+    """
+    Runs all `prompts` on `workers` threads and writes one JSONL record per prompt
+    to `out`. At most twice `workers` prompts are read ahead. Returns the number of
+    records written.
+    """
+
+    max_in_flight = 2 * max(1, workers)
+    written = 0
+
+    def emit(future: Future):
+        nonlocal written
+        out.write(f"{future.result()}\n")
+        out.flush()
+        written += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if order == ORDER_COMPLETED:
+            in_flight: set[Future] = set()
+            for index, (prompt_id, prompt) in enumerate(prompts):
+                in_flight.add(
+                    pool.submit(
+                        _run_prompt, index, prompt_id, prompt, chat_config, client
+                    )
+                )
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future)
+            for future in as_completed(in_flight):
+                emit(future)
+        else:
+            pending: deque[Future] = deque()
+            for index, (prompt_id, prompt) in enumerate(prompts):
+                pending.append(
+                    pool.submit(
+                        _run_prompt, index, prompt_id, prompt, chat_config, client
+                    )
+                )
+                if len(pending) >= max_in_flight:
+                    emit(pending.popleft())
+            while pending:
+                emit(pending.popleft())
+    return written
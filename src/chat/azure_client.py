@@ -1,7 +1,12 @@
-"""Azure OpenAI API client for sending prompts and receiving responses."""
+"""
+Azure OpenAI API client for sending prompts and receiving responses. `openai` is
+imported on first use, it is the slowest import of the app's startup.
+"""
+
+from functools import cache
+from typing import TYPE_CHECKING
 
 from httpx import RequestError, HTTPStatusError
-from openai import AzureOpenAI, OpenAIError
 from pydantic import BaseModel, ValidationError
 
 from src.chat.azure_config import AzureConfig, generate_full_chat_system_prompt
@@ -14,6 +19,9 @@ from src.config import (
 )
 from src.utils.log import logger
 
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
 
 def validate_json_response(
     response: str | None, schema: type[BaseModel] = AzureResponseFormat_EN
@@ -102,55 +110,102 @@ def parse_json_response(
         return msg
 
 
-def query_azure_ai(prompt: str, chat_config: AzureConfig | None = None) -> str | None:
+def create_azure_client(chat_config: AzureConfig | None = None) -> "AzureOpenAI":
     """
-    Sends a prompt to the Azure OpenAI API and retrieves the response.
+    Creates an Azure OpenAI client from `chat_config`, or the default `AzureConfig`.
+    The client is thread-safe and can be shared across many queries.
+    """
+
+    from openai import AzureOpenAI
+
+    if chat_config is None:
+        chat_config = AzureConfig()  # type: ignore
+    return AzureOpenAI(
+        api_version=chat_config.AZURE_API_VERSION,
+        azure_endpoint=str(chat_config.AZURE_ENDPOINT),
+        api_key=chat_config.AZURE_KEY,
+    )
+
+
+@cache
+def get_azure_client() -> "AzureOpenAI":
+    """
+    Returns the client of the default `AzureConfig`, shared by all queries that
+    bring none, so they reuse its pooled connections.
+    """
+
+    return create_azure_client()
+
+
+def warm_azure_client(timeout: float) -> int:
+    """
+    Connects the shared client to the endpoint by listing the models, returns the
+    HTTP status. Raises OpenAIError if the endpoint cannot be reached.
+    """
+
+    from openai import APIStatusError
+
+    try:
+        get_azure_client().with_options(max_retries=0, timeout=timeout).models.list()
+    except APIStatusError as e:
+        return e.status_code
+    return 200
+
+
+def query_azure_ai_json(
+    prompt: str,
+    chat_config: AzureConfig | None = None,
+    client: "AzureOpenAI | None" = None,
+    system_prompt: str | None = None,
+) -> tuple[bool, str | None]:
+    """
+    Sends a prompt to the Azure OpenAI API and returns the raw JSON response after
+    validating it against `AzureResponseFormat_EN`.
 
     Args:
         prompt (str): The prompt or query to send to the Azure OpenAI API.
         chat_config (AzureConfig | None): The configuration for the Azure API client.
             If not provided, the default `AzureConfig` is used.
+        client (AzureOpenAI | None): An existing client to reuse. If not provided,
+            the shared client, or a new one for an explicit `chat_config`, is used.
+        system_prompt (str | None): The full system message, e.g. a session's
+            edited prompt. If not provided, `generate_full_chat_system_prompt()`
+            is used.
 
     Returns:
-        str | None: The response text from the Azure OpenAI API as a string. If an error
-            occurs during the API request, an error message is returned instead. If the
-            response content is not in the expected format, it returns an error message.
-
-    Notes:
-        - The function configures and sends a request to the Azure OpenAI API,
-            including the prompt and necessary parameters such as temperature, model,
-            and token limits.
-        - In case of an API error, various exceptions (e.g., `RequestError`,
-            `HTTPStatusError`, `OpenAIError`) are caught and logged.
-        - If the response is valid and contains a string, it will be returned.
-            If it contains any unexpected content, it will return the raw response.
-
-    Example:
-        result = query_azure_ai("What is the weather like today?")
-        print(result)  # Outputs the AI's response to the prompt.
+        tuple: A tuple containing:
+            - `True` and the validated JSON string, if the response adheres to the
+                schema.
+            - `False` and an error message, or the raw content if it is not a
+                string.
     """
 
     if not prompt:
         msg = "No prompt provided"
         logger.warning(msg)
-        return msg
+        return False, msg
 
+    use_shared_client = client is None and chat_config is None
     if chat_config is None:
         chat_config = AzureConfig()  # type: ignore
 
+    if system_prompt is None:
+        system_prompt = generate_full_chat_system_prompt()
+
     messages = [
-        {"role": "system", "content": generate_full_chat_system_prompt()},
+        {"role": "system", "content": system_prompt},
         {"role": "user", "content": prompt},
     ]
 
     logger.info(f"Trying {messages} at {chat_config.AZURE_ENDPOINT}")
 
+    from openai import OpenAIError
+
     try:
-        client = AzureOpenAI(
-            api_version=chat_config.AZURE_API_VERSION,
-            azure_endpoint=str(chat_config.AZURE_ENDPOINT),
-            api_key=chat_config.AZURE_KEY,
-        )
+        if use_shared_client:
+            client = get_azure_client()
+        elif client is None:
+            client = create_azure_client(chat_config)
         response = client.chat.completions.create(
             messages=messages,  # type: ignore[reportArgumentType]
             response_format={"type": CHAT_RESPONSE_FORMAT},
@@ -161,30 +216,72 @@ def query_azure_ai(prompt: str, chat_config: AzureConfig | None = None) -> str |
     except HTTPStatusError as e:  # non 2xx
         msg = f"HTTP error occurred while querying Azure AI: {e}"
         logger.error(msg)
-        return msg
+        return False, msg
     except RequestError as e:
         msg = f"Request error occurred while querying Azure AI: {e}"
         logger.error(msg)
-        return msg
+        return False, msg
     except OpenAIError as e:
         msg = f"OpenAI API error occurred: {e}"
         logger.error(msg)
-        return msg
+        return False, msg
     except ValueError as e:  # input format error
         msg = f"Value error occurred: {e}"
         logger.error(msg)
-        return msg
+        return False, msg
     except Exception as e:
         msg = f"Unexpected error occurred while querying Azure AI: {e}"
         logger.exception(msg)
-        return msg
+        return False, msg
 
     content = response.choices[0].message.content
-    if isinstance(content, str):
-        valid_response, valid_msg = validate_json_response(content)
-        if valid_response:
-            return parse_json_response(content)
-        else:
-            return valid_msg
-    else:
-        return content
+    if not isinstance(content, str):
+        return False, content
+    valid_response, valid_msg = validate_json_response(content)
+    if valid_response:
+        return True, content
+    return False, valid_msg
+
+
+def query_azure_ai(
+    prompt: str,
+    chat_config: AzureConfig | None = None,
+    system_prompt: str | None = None,
+    client: "AzureOpenAI | None" = None,
+) -> str | None:
+    """
+    Sends a prompt to the Azure OpenAI API and retrieves the response.
+
+    Args:
+        prompt (str): The prompt or query to send to the Azure OpenAI API.
+        chat_config (AzureConfig | None): The configuration for the Azure API client.
+            If not provided, the default `AzureConfig` is used.
+        system_prompt (str | None): The full system message, e.g. a session's
+            edited prompt. If not provided, `generate_full_chat_system_prompt()`
+            is used.
+        client (AzureOpenAI | None): An existing client to reuse. If not provided,
+            the shared client, or a new one for an explicit `chat_config`, is used.
+
+    Returns:
+        str | None: The response text from the Azure OpenAI API as a string. If an error
+            occurs during the API request, an error message is returned instead. If the
+            response content is not in the expected format, it returns an error message.
+
+    Notes:
+        - The request and schema validation are done by `query_azure_ai_json`.
+        - In case of an API error, various exceptions (e.g., `RequestError`,
+            `HTTPStatusError`, `OpenAIError`) are caught and logged.
+        - If the response is valid, it is returned in human-readable form.
+            If it contains any unexpected content, it will return the raw response.
+
+    Example:
+        result = query_azure_ai("What is the weather like today?")
+        print(result)  # Outputs the AI's response to the prompt.
+    """
+
+    valid_response, content = query_azure_ai_json(
+        prompt, chat_config, client, system_prompt
+    )
+    if valid_response:
+        return parse_json_response(content)
+    return content
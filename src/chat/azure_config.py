@@ -3,6 +3,8 @@ Configuration for Azure OpenAI integration using pydantic-settings.
 Loads environment variables from a .env file automatically.
 """
 
+from functools import lru_cache
+from hashlib import sha256
 from json import dumps
 from os import environ
 from typing import ClassVar, List
@@ -132,6 +134,17 @@ def load_chat_config_to_env(chat_config: AzureConfig | None = None):
             environ[k] = str(v)
 
 
+@lru_cache(maxsize=32)
+def _append_response_schema(prompt: str) -> str:
+    """Appends the structured JSON response schema to `prompt`."""
+
+    response_announce = "\n\nStructured JSON response output schema:\n\n"
+    json_schema_pretty = dumps(AzureResponseFormat_EN.model_json_schema(), indent=4)
+    json_schema_pretty = json_schema_pretty.replace(r"\n", "\n")
+
+    return f"{prompt}{response_announce}{json_schema_pretty}"
+
+
 def generate_full_chat_system_prompt() -> str:
     """Returns CHAT_SYSTEM_MESSAGE from environment."""
 
@@ -140,13 +153,18 @@ def generate_full_chat_system_prompt() -> str:
     else:
         prompt = environ["CHAT_SYSTEM_MESSAGE"]
 
-    response_announce = "\n\nStructured JSON response output schema:\n\n"
-    json_schema_pretty = dumps(AzureResponseFormat_EN.model_json_schema(), indent=4)
-    json_schema_pretty = json_schema_pretty.replace(r"\n", "\n")
+    return _append_response_schema(prompt)
 
-    return f"{prompt}{response_announce}{json_schema_pretty}"
+
+def get_system_prompt_version(system_prompt: str) -> str:
+    """Returns the version of a system prompt, a short hash of its text."""
+
+    return sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
 
 
 def set_chat_system_prompt(chat_system_message: str = ""):
-    """Sets CHAT_SYSTEM_MESSAGE in environment."""
+    """
+    Sets CHAT_SYSTEM_MESSAGE in environment, the default of all sessions. A
+    session's own prompt is passed to `query_azure_ai` instead.
+    """
     environ["CHAT_SYSTEM_MESSAGE"] = chat_system_message
@@ -0,0 +1,255 @@
+"""
+Durable local queue of chat queries in SQLite. With FT_CHAT_WORKER_TIER, handlers
+enqueue their queries and wait for the result, while `python -m src.chat.worker`
+processes claim and answer them. A claimed task is leased; if its worker dies,
+the lease runs out and another worker retries it, up to CHAT_BROKER_MAX_ATTEMPTS.
+Tasks outlive the app process, so a restarted app picks up the results of queries
+answered in the meantime.
+"""
+
+from os import getpid
+from pathlib import Path
+from sqlite3 import Connection, connect
+from threading import Lock
+from time import sleep, time
+from uuid import uuid4
+
+from src.chat.azure_client import parse_json_response, query_azure_ai_json
+from src.config import (
+    CHAT_BROKER_DB_FILE,
+    CHAT_BROKER_LEASE,
+    CHAT_BROKER_MAX_ATTEMPTS,
+    CHAT_BROKER_POLL_INTERVAL,
+    CHAT_BROKER_RESULT_TIMEOUT,
+    CHAT_BROKER_RESULT_TTL,
+    FT_CHAT_WORKER_TIER,
+)
+from src.utils.log import logger
+
+TASK_STATUS_QUEUED = "queued"
+TASK_STATUS_RUNNING = "running"
+TASK_STATUS_DONE = "done"
+TASK_STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_tasks (
+    task_id TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    system_prompt TEXT,
+    status TEXT NOT NULL,
+    result TEXT,
+    worker_id TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_tasks_status ON chat_tasks (status, created_at);
+"""
+
+_connection: Connection | None = None
+_connection_pid: int | None = None
+_connection_lock = Lock()
+
+
+def _get_connection() -> Connection:
+    """
+    Returns the connection of this process, creating database and schema on first
+    use. Worker processes open their own connection.
+    """
+
+    global _connection, _connection_pid
+    if _connection is None or _connection_pid != getpid():
+        Path(CHAT_BROKER_DB_FILE).parent.mkdir(parents=True, exist_ok=True)
+        _connection = connect(CHAT_BROKER_DB_FILE, check_same_thread=False, timeout=30)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.executescript(_SCHEMA)
+        _connection_pid = getpid()
+        logger.info(f"Opened chat broker {CHAT_BROKER_DB_FILE}")
+    return _connection
+
+
+def enqueue_query(
+    prompt: str, system_prompt: str | None = None, task_id: str | None = None
+) -> str:
+    """
+    Queues a query and returns its task id. Queueing an existing `task_id` again,
+    e.g. a batch row of a resumed job, keeps the task and its result.
+    """
+
+    task_id = task_id or uuid4().hex
+    now = time()
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO chat_tasks (task_id, prompt, system_prompt, "
+            "status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (task_id, prompt, system_prompt, TASK_STATUS_QUEUED, now, now),
+        )
+    return task_id
+
+
+def claim_task(worker_id: str) -> dict | None:
+    """
+    Leases the oldest queued task, or a running one whose lease ran out, to
+    `worker_id`. Tasks out of attempts fail instead. Returns None if idle.
+    """
+
+    now = time()
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "UPDATE chat_tasks SET status = ?, result = ?, updated_at = ? "
+            "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+            (
+                TASK_STATUS_FAILED,
+                "Chat worker did not answer the query",
+                now,
+                TASK_STATUS_RUNNING,
+                now,
+                CHAT_BROKER_MAX_ATTEMPTS,
+            ),
+        )
+        row = conn.execute(
+            "UPDATE chat_tasks SET status = ?, worker_id = ?, lease_until = ?, "
+            "attempts = attempts + 1, updated_at = ? WHERE task_id = ("
+            "SELECT task_id FROM chat_tasks WHERE status = ? "
+            "OR (status = ? AND lease_until < ?) ORDER BY created_at LIMIT 1) "
+            "RETURNING task_id, prompt, system_prompt",
+            (
+                TASK_STATUS_RUNNING,
+                worker_id,
+                now + CHAT_BROKER_LEASE,
+                now,
+                TASK_STATUS_QUEUED,
+                TASK_STATUS_RUNNING,
+                now,
+            ),
+        ).fetchone()
+    if row is None:
+        return None
+    return {"task_id": row[0], "prompt": row[1], "system_prompt": row[2]}
+
+
+def complete_task(task_id: str, worker_id: str, result: str | None, failed: bool):
+    """Stores the result of a task, unless its lease passed to another worker."""
+
+    status = TASK_STATUS_FAILED if failed else TASK_STATUS_DONE
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "UPDATE chat_tasks SET status = ?, result = ?, updated_at = ? "
+            "WHERE task_id = ? AND worker_id = ? AND status = ?",
+            (status, result, time(), task_id, worker_id, TASK_STATUS_RUNNING),
+        )
+
+
+def get_task(task_id: str) -> dict | None:
+    """Returns status, result and attempts of a task, None if unknown."""
+
+    with _connection_lock:
+        row = (
+            _get_connection()
+            .execute(
+                "SELECT status, result, attempts FROM chat_tasks WHERE task_id = ?",
+                (task_id,),
+            )
+            .fetchone()
+        )
+    if row is None:
+        return None
+    return {"status": row[0], "result": row[1], "attempts": row[2]}
+
+
+def _delete_task(task_id: str):
+    with _connection_lock, _get_connection() as conn:
+        conn.execute("DELETE FROM chat_tasks WHERE task_id = ?", (task_id,))
+
+
+def _fail_queued_task(task_id: str, msg: str):
+    """Fails a task nobody waits for anymore, unless a worker already claimed it."""
+
+    with _connection_lock, _get_connection() as conn:
+        conn.execute(
+            "UPDATE chat_tasks SET status = ?, result = ?, updated_at = ? "
+            "WHERE task_id = ? AND status = ?",
+            (TASK_STATUS_FAILED, msg, time(), task_id, TASK_STATUS_QUEUED),
+        )
+
+
+def await_task(
+    task_id: str, timeout: float = CHAT_BROKER_RESULT_TIMEOUT
+) -> tuple[bool, str | None]:
+    """
+    Waits for a task to finish and returns whether it was answered and its
+    result, forgetting the task. Returns False and an error message if it failed,
+    is unknown or takes too long. A task still queued on timeout is failed, so no
+    worker queries it for nobody.
+    """
+
+    deadline = time() + timeout
+    while (task := get_task(task_id)) is not None:
+        if task["status"] in (TASK_STATUS_DONE, TASK_STATUS_FAILED):
+            _delete_task(task_id)
+            return task["status"] == TASK_STATUS_DONE, task["result"]
+        if time() > deadline:
+            msg = f"No chat worker answered within {timeout:.0f}s, is one running?"
+            logger.error(msg)
+            _fail_queued_task(task_id, msg)
+            return False, msg
+        sleep(CHAT_BROKER_POLL_INTERVAL)
+    msg = f"Unknown chat task {task_id}"
+    logger.error(msg)
+    return False, msg
+
+
+def await_task_result(
+    task_id: str, timeout: float = CHAT_BROKER_RESULT_TIMEOUT
+) -> str | None:
+    """Waits for a task like `await_task` and returns its result or error message."""
+
+    return await_task(task_id, timeout)[1]
+
+
+def purge_finished_tasks(now: float | None = None) -> int:
+    """Deletes finished tasks nobody fetched for CHAT_BROKER_RESULT_TTL seconds."""
+
+    now = time() if now is None else now
+    with _connection_lock, _get_connection() as conn:
+        cursor = conn.execute(
+            "DELETE FROM chat_tasks WHERE status IN (?, ?) AND updated_at < ?",
+            (TASK_STATUS_DONE, TASK_STATUS_FAILED, now - CHAT_BROKER_RESULT_TTL),
+        )
+    return cursor.rowcount
+
+
+def get_broker_stats() -> dict:
+    """Returns the number of tasks per status."""
+
+    with _connection_lock:
+        rows = _get_connection().execute(
+            "SELECT status, COUNT(*) FROM chat_tasks GROUP BY status"
+        )
+        return dict(rows.fetchall())
+
+
+def query_chat_checked(
+    prompt: str, system_prompt: str | None = None, task_id: str | None = None
+) -> tuple[bool, str | None]:
+    """
+    Queries the chat model in-process or, with FT_CHAT_WORKER_TIER, through the
+    queue and a chat worker. Returns True and the readable response, or False
+    and the error message.
+    """
+
+    if FT_CHAT_WORKER_TIER:
+        return await_task(enqueue_query(prompt, system_prompt, task_id))
+    valid_response, content = query_azure_ai_json(prompt, system_prompt=system_prompt)
+    if valid_response:
+        return True, parse_json_response(content)
+    return False, content
+
+
+def query_chat(
+    prompt: str, system_prompt: str | None = None, task_id: str | None = None
+) -> str | None:
+    """Queries the chat model like `query_azure_ai`, see `query_chat_checked`."""
+
+    return query_chat_checked(prompt, system_prompt, task_id)[1]
@@ -0,0 +1,166 @@
+"""
+Chat worker tier: processes answering the queries the app queued in the chat
+broker, see src/chat/job_broker.py. Run next to an app started with
+CHAT_WORKER_TIER=true. Workers scale and restart independently of the UI, queued
+and leased queries survive restarts of either side.
+
+Usage:
+    python -m src.chat.worker --processes 4 --threads 8
+"""
+
+from argparse import ArgumentParser, Namespace
+from multiprocessing import Event as ProcessEvent, Process
+from os import getpid
+from signal import SIGTERM, signal
+from socket import gethostname
+from threading import Event, Thread
+from typing import TYPE_CHECKING
+
+from src.chat.azure_client import (
+    create_azure_client,
+    parse_json_response,
+    query_azure_ai_json,
+)
+from src.chat.azure_config import AzureConfig, load_chat_config_to_env
+from src.chat.job_broker import claim_task, complete_task, purge_finished_tasks
+from src.config import (
+    CHAT_BROKER_POLL_INTERVAL,
+    CHAT_DRY_RUN_NO_LOAD_ENV,
+    CHAT_WORKER_PROCESSES,
+    CHAT_WORKER_THREADS,
+)
+from src.utils.log import logger
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
+_PURGE_INTERVAL = 60.0  # seconds between purges of results nobody fetched
+
+
+def _serve(
+    worker_id: str,
+    stop: Event,
+    chat_config: AzureConfig | None,
+    client: "AzureOpenAI | None",
+):
+    """Claims and answers tasks one by one until `stop` is set."""
+
+    while not stop.is_set():
+        task = claim_task(worker_id)
+        if task is None:
+            stop.wait(CHAT_BROKER_POLL_INTERVAL)
+            continue
+        try:
+            valid_response, result = query_azure_ai_json(
+                task["prompt"], chat_config, client, task["system_prompt"]
+            )
+            if valid_response:
+                result = parse_json_response(result)
+            failed = not valid_response
+        except Exception as e:
+            result = f"Error while querying Azure AI: {e}"
+            logger.exception(result)
+            failed = True
+        complete_task(task["task_id"], worker_id, result, failed)
+
+
+def run_worker(
+    stop: Event,
+    threads: int = CHAT_WORKER_THREADS,
+    chat_config: AzureConfig | None = None,
+    client: "AzureOpenAI | None" = None,
+):
+    """Answers queued queries on `threads` threads until `stop` is set."""
+
+    worker_name = f"{gethostname()}-{getpid()}"
+    loops = [
+        Thread(
+            target=_serve,
+            args=(f"{worker_name}-{i}", stop, chat_config, client),
+            name=f"chat-worker-{i}",
+            daemon=True,
+        )
+        for i in range(max(1, threads))
+    ]
+    for loop in loops:
+        loop.start()
+    logger.info(f"Chat worker {worker_name} serving on {len(loops)} threads")
+    try:
+        while not stop.wait(_PURGE_INTERVAL):
+            purge_finished_tasks()
+    except KeyboardInterrupt:
+        stop.set()
+    for loop in loops:
+        loop.join()
+    logger.info(f"Chat worker {worker_name} stopped")
+
+
+def _run_process(threads: int, stop: Event, chat_config: AzureConfig | None):
+    """Entry point of one worker process, sharing one client across threads."""
+
+    if chat_config is not None:
+        load_chat_config_to_env(chat_config)
+    client = create_azure_client(chat_config) if chat_config is not None else None
+    run_worker(stop, threads, chat_config, client)
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    """Parses the command-line arguments of the chat workers."""
+
+    parser = ArgumentParser(
+        prog="python -m src.chat.worker",
+        description="Answer chat queries queued by the app.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=CHAT_WORKER_PROCESSES,
+        help=f"worker processes (default {CHAT_WORKER_PROCESSES})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=CHAT_WORKER_THREADS,
+        help=f"queries in flight per process (default {CHAT_WORKER_THREADS})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the worker processes until interrupted, returns the exit code."""
+
+    args = parse_args(argv)
+    chat_config = None
+    if not CHAT_DRY_RUN_NO_LOAD_ENV:
+        try:
+            chat_config = AzureConfig()  # type: ignore[reportCallIssue]
+        except (TypeError, ValueError) as e:
+            logger.error(f"Cannot run chat workers without a valid AzureConfig: {e}")
+            return 2
+
+    stop = ProcessEvent()
+    # let in-flight queries finish, expired leases cover the rest
+    signal(SIGTERM, lambda *_: stop.set())
+    processes = [
+        Process(
+            target=_run_process,
+            args=(args.threads, stop, chat_config),
+            name=f"chat-worker-{i}",
+        )
+        for i in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.warning("KeyboardInterrupt caught. Stopping chat workers ...")
+        stop.set()
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
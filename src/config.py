@@ -5,7 +5,7 @@ Defines system parameters (e.g., paths, port, logging), GUI settings
 feature toggles.
 """
 
-from os import getenv
+from os import cpu_count, getenv
 
 # MARK: Project
 PROJECT_NAME = "Chat-MVP-Gradio"
@@ -17,6 +17,7 @@ SYS_ROOT_PATH = getenv("SYS_ROOT_PATH", "/home/site/wwwroot")
 SYS_LOG_PATH = getenv("SYS_LOG_PATH", f"{SYS_ROOT_PATH}/logs")
 SYS_UPLOAD_PATH = f"{SYS_ROOT_PATH}/uploads"
 SYS_DOWNLOAD_PATH = f"{SYS_ROOT_PATH}/downloads"
+SYS_BATCH_PATH = f"{SYS_ROOT_PATH}/batch"
 SYS_APP_RUNTIME_LOG_FILE = f"{SYS_LOG_PATH}/app_runtime.log"
 SYS_ASSETS_PATH = f"{SYS_ROOT_PATH}/assets"
 SYS_SAMPLE_CSV_PATH = f"{SYS_ASSETS_PATH}/datasets/chat_upload_sample.csv"
@@ -25,6 +26,18 @@ SYS_TEMPLATE_HTML = f"{SYS_TEMPLATE_FOLDER}/template.html.tpl"
 SYS_TEMPLATE_CSS = f"{SYS_TEMPLATE_FOLDER}/template.html.css"
 SYS_TEMPLATE_DOCX = f"{SYS_TEMPLATE_FOLDER}/template.docx"
 SYS_DOWNLOAD_PREFIX = "Output_"
+SYS_EXPORT_CACHE_PATH = f"{SYS_DOWNLOAD_PATH}/.export_cache"
+SYS_EXPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+SYS_EXPORT_CACHE_TTL = 24 * 60 * 60  # seconds
+SYS_PDF_FORMAT_PATH = f"{SYS_DOWNLOAD_PATH}/.latex_formats"
+SYS_TEMPLATE_BUILD_PATH = f"{SYS_DOWNLOAD_PATH}/.templates"
+SYS_SESSION_SPILL_PATH = f"{SYS_DOWNLOAD_PATH}/.sessions"
+SYS_SESSION_ACTIVITY_PATH = f"{SYS_DOWNLOAD_PATH}/.activity"  # shared by workers
+SYS_EXPORT_BUNDLE_PATH = f"{SYS_DOWNLOAD_PATH}/.bundles"  # shared by workers
+SYS_SESSION_TTL = 4 * 60 * 60  # seconds without activity before files are removed
+SYS_SESSION_SWEEP_INTERVAL = 10 * 60  # seconds between background sweeps
+SYS_SESSION_MAX_BYTES = 1024 * 1024 * 1024  # 1GB, above the chunked upload size cap
+SYS_SESSIONS_MAX_BYTES = 4 * 1024 * 1024 * 1024  # 4GB over all sessions
 SYS_LOG_FORMAT_FOLDING = (
     " {time:YYYY-MM-DD HH:mm:ss} | {level.icon}  [{level}] | "
     "{name}:{function}:{line} | {message}"
@@ -36,6 +49,20 @@ SERVER_PORT = int(getenv("PORT", "8000"))
 # FIXME Bandit - B104: hardcoded_bind_all_interfaces
 # secure "192.168.0.1"
 SERVER_NAME = "0.0.0.0"
+SERVER_CHUNKED_UPLOAD_ROUTE = "/upload/chunked"
+SERVER_EXPORTS_ROUTE = "/exports"
+SERVER_SESSIONS_ROUTE = "/sessions"
+SERVER_HEALTH_ROUTE = "/healthz"
+SERVER_READY_ROUTE = "/readyz"
+SERVER_WARMUP_TIMEOUT = 10.0  # seconds per warm-up probe, e.g. the Azure connect
+SERVER_WARMUP_RETRY_INTERVAL = 30.0  # seconds until failed required checks rerun
+# more than one worker process is served behind a local sticky-session router
+SERVER_WORKERS = int(getenv("SERVER_WORKERS", "1"))
+SERVER_WORKER_INDEX = int(getenv("SERVER_WORKER_INDEX", "0"))  # set per worker
+SERVER_WORKER_HOST = "127.0.0.1"
+SERVER_WORKER_PORT_START = int(getenv("SERVER_WORKER_PORT_START", str(SERVER_PORT + 1)))
+SERVER_CLUSTER_COOKIE = "chat_worker"
+SERVER_WORKER_RETRY_AFTER = 10  # seconds a failed worker gets no new sessions
 
 
 # MARK: GUI
@@ -43,10 +70,33 @@ GUI_CORP_NAME = "MYCORP"
 GUI_INFO_DURATION = 2
 GUI_MAX_DYN_GROUPS = 10
 GUI_MAX_FILE_SIZE_UPLOAD = 10 * 1024 * 1024  # 10MB
+GUI_MAX_FILE_SIZE_CHUNKED_UPLOAD = 512 * 1024 * 1024  # 512MB, resumable uploads
+GUI_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB
 GUI_UPLOAD_FILE_EXT = [".csv", ".tsv", ".xlsx", ".txt"]
 GUI_UPLOAD_FILE_TYPES = ["text"]
-GUI_UPLOAD_MAX_ROWS = 500
+GUI_UPLOAD_MAX_ROWS = 500  # rows used to prefill text groups
+GUI_UPLOAD_MAX_WORKERS = 4  # files validated, stored and indexed in parallel
+GUI_PREVIEW_PAGE_SIZE = 50
+GUI_PREVIEW_INDEX_STRIDE = 256  # keep every n-th row offset
+GUI_PREVIEW_VIEW_CACHE_SIZE = 4  # sorted/filtered views kept per file
+GUI_RESULTS_PAGE_SIZE = 20  # rows of the results grid sent to the browser at once
+GUI_RESULTS_SUBMIT_WORKERS = 5  # rows of a results page queried in parallel
+GUI_SESSION_STORE_MAX_SESSIONS = 200  # sessions kept in memory, LRU beyond
+GUI_SESSION_STORE_TTL = 2 * 60 * 60  # seconds an idle session is kept
+GUI_SESSION_STORE_SPILL = True  # write evicted sessions to disk instead of dropping
 GUI_CSS_FILE = f"{SYS_ROOT_PATH}/src/gui/gui.css"
+GUI_JS_FILE = f"{SYS_ROOT_PATH}/src/gui/gui.js"
+GUI_EXPORT_MAX_WORKERS = 2  # concurrent pandoc/LaTeX runs, separate from chat
+GUI_EXPORT_MAX_QUEUED = 16  # exports waiting before new ones are rejected
+GUI_EXPORT_PDF_ENGINE = getenv("PDF_ENGINE", "")  # forces an engine if available
+GUI_EXPORT_PDF_ENGINES = ["weasyprint", "wkhtmltopdf", "tectonic", "pdflatex"]
+GUI_EXPORT_PRERENDER_DEBOUNCE = 1.5  # seconds the document must settle
+GUI_EXPORT_PRERENDER_FORMATS = ["html", "pdf", "docx"]  # rendered in this order
+GUI_EXPORT_BUNDLE_FORMATS = ["html", "pdf", "docx"]  # zipped by "Download all"
+GUI_EXPORT_BUNDLE_TTL = 5 * 60  # seconds a bundle link stays valid
+GUI_EXPORT_CHUNK_SECTIONS = 250  # text groups per chunk of very large exports
+GUI_EXPORT_CHUNK_WORKERS = cpu_count() or 2  # chunks rendered in parallel
+GUI_BATCH_PROGRESS_INTERVAL = 1.0  # seconds between batch progress refreshes
 
 
 # MARK: Chat
@@ -63,7 +113,29 @@ CHAT_FREQ_PENALTY = 0.0
 CHAT_PRES_PENALTY = 0.0
 CHAT_STREAM = True
 CHAT_RESPONSE_FORMAT = "json_object"
+# worker tier, see FT_CHAT_WORKER_TIER and src/chat/worker.py
+CHAT_BROKER_DB_FILE = f"{SYS_BATCH_PATH}/chat_broker.sqlite3"
+CHAT_BROKER_POLL_INTERVAL = 0.1  # seconds between polls for tasks and results
+CHAT_BROKER_LEASE = 5 * 60  # seconds a worker holds a task before it is retried
+CHAT_BROKER_MAX_ATTEMPTS = 3
+CHAT_BROKER_RESULT_TIMEOUT = 15 * 60  # seconds a handler waits for its result
+CHAT_BROKER_RESULT_TTL = 60 * 60  # seconds results nobody fetched are kept
+CHAT_WORKER_PROCESSES = 2
+CHAT_WORKER_THREADS = 4  # queries in flight per worker process
+
+
+# MARK: Batch
+BATCH_DB_FILE = f"{SYS_BATCH_PATH}/jobs.sqlite3"
+BATCH_MAX_WORKERS = 4  # rows queried concurrently per job
+BATCH_JOB_LEASE = 60  # seconds a job stays with a worker that stopped renewing it
+BATCH_JOB_HEARTBEAT_INTERVAL = 15  # seconds between lease renewals of a running job
+BATCH_JOB_SWEEP_INTERVAL = 30  # seconds between checks for jobs with expired leases
+BATCH_EXPORT_FORMATS = ["csv", "jsonl", "parquet", "xlsx"]
+BATCH_EXPORT_PARQUET_BATCH_ROWS = 10_000  # rows per record batch held in memory
+BATCH_EXPORT_PARQUET_COMPRESSION = "zstd"
 
 
 # MARK: Feature Toggles
 FT_GUI_ENABLE_UPLOAD_COLLAPSE = False
+# queue chat queries for `python -m src.chat.worker` instead of querying in-process
+FT_CHAT_WORKER_TIER = getenv("CHAT_WORKER_TIER", "false").lower() == "true"
@@ -0,0 +1,256 @@
+// Client-side helpers loaded into the page head by build_ui().
+
+// MARK: Chunked upload
+
+/**
+ * Set the value of a Gradio textbox by elem_id and notify Gradio of the input.
+ */
+function setGradioTextbox(elemId, value) {
+    const el = document.querySelector(`#${elemId} textarea, #${elemId} input`);
+    if (!el) return;
+    el.value = value;
+    el.dispatchEvent(new Event("input", { bubbles: true }));
+}
+
+/**
+ * Read the value of a Gradio textbox by elem_id.
+ */
+function getGradioTextbox(elemId) {
+    const el = document.querySelector(`#${elemId} textarea, #${elemId} input`);
+    return el ? el.value : "";
+}
+
+/**
+ * Upload `file` in chunks, resuming at the offset the server already holds.
+ * Retries a failed chunk with backoff, then gives up; selecting the same file
+ * again resumes where it stopped.
+ */
+async function chunkedUpload(file, endpoint, chunkSize, onProgress) {
+    if (file.size === 0) throw new Error("empty file");
+    const sessionId = getGradioTextbox("session-id");
+    const url = `${endpoint}/${sessionId}/${encodeURIComponent(file.name)}`;
+    const status = await (await fetch(url)).json();
+    let offset = status.complete ? 0 : status.received || 0;
+    let retries = 0;
+
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + chunkSize);
+        let resp;
+        try {
+            resp = await fetch(`${url}?offset=${offset}&total=${file.size}`, {
+                method: "PUT",
+                body: chunk,
+            });
+        } catch (err) {
+            if (++retries > 5) throw err;
+            await new Promise((r) => setTimeout(r, 500 * 2 ** retries));
+            continue;
+        }
+        const body = await resp.json();
+        if (resp.status === 409) {
+            offset = body.received;
+            continue;
+        }
+        if (!resp.ok) throw new Error(body.detail || resp.statusText);
+        retries = 0;
+        offset = body.received;
+        onProgress(offset, file.size);
+        if (body.complete) return body;
+    }
+}
+
+document.addEventListener("change", async (event) => {
+    const input = event.target;
+    if (!input.matches || !input.matches("#chunked-upload-input")) return;
+    const container = input.closest("[data-chunked-upload]");
+    const progress = container.querySelector(".chunked-upload-progress");
+    const endpoint = container.dataset.endpoint;
+    const chunkSize = parseInt(container.dataset.chunkSize, 10);
+
+    for (const file of input.files) {
+        try {
+            await chunkedUpload(file, endpoint, chunkSize, (done, total) => {
+                progress.textContent = `${file.name}: ${Math.floor((100 * done) / total)}%`;
+            });
+            progress.textContent = `${file.name}: done`;
+            setGradioTextbox("chunked-upload-done", file.name);
+        } catch (err) {
+            progress.textContent = `${file.name}: ${err.message}`;
+        }
+    }
+    input.value = "";
+});
+
+// MARK: Report document
+
+// sections of the generated document as last sent by the server
+let reportSections = [];
+let reportVersion = -1;
+
+/**
+ * Apply a document delta from the server to the Markdown editor. A reset carries
+ * the section lengths of the full document just placed in the editor; otherwise
+ * only changed sections are sent and spliced in. Manual edits in the editor win
+ * over deltas until the document is generated again.
+ */
+function applyReportDelta(deltaJson) {
+    if (!deltaJson) return;
+    const delta = JSON.parse(deltaJson);
+    if (delta.version <= reportVersion && !delta.reset) return;
+    const editor = document.querySelector("#report-editor textarea");
+    if (!editor) return;
+
+    if (delta.reset) {
+        let offset = 0;
+        reportSections = delta.reset.map((length) =>
+            editor.value.slice(offset, (offset += length)),
+        );
+        // the server stored the same document as its editor copy
+        reportSynced = editor.value;
+    } else {
+        if (editor.value !== reportSections.join("")) return;
+        for (const [index, markdown] of Object.entries(delta.sections)) {
+            reportSections[index] = markdown;
+        }
+        setGradioTextbox("report-editor", reportSections.join(""));
+    }
+    reportVersion = delta.version;
+}
+
+// MARK: Report editor sync
+
+const REPORT_PREVIEW_DEBOUNCE_MS = 300;
+const REPORT_SYNC_DEBOUNCE_MS = 1000;
+
+let previewTimer = null;
+let previewMarkdown = "";
+let previewWaiting = [];
+
+/**
+ * Resolve to the editor Markdown once typing paused, to be shown as preview.
+ * Every pending call resolves to the latest text, so the preview is rendered
+ * once per pause instead of once per keystroke.
+ */
+function previewReportMarkdown(md) {
+    previewMarkdown = md;
+    clearTimeout(previewTimer);
+    return new Promise((resolve) => {
+        previewWaiting.push(resolve);
+        previewTimer = setTimeout(() => {
+            for (const waiting of previewWaiting.splice(0)) waiting(previewMarkdown);
+        }, REPORT_PREVIEW_DEBOUNCE_MS);
+    });
+}
+
+// editor text the server holds as its copy, and the text of the diff in flight
+let reportSynced = "";
+let reportSending = null;
+let reportSendingFull = false;
+let reportSyncPending = false;
+let reportSyncTimer = null;
+
+/**
+ * Diff two strings as the replaced range of `before` between their common
+ * prefix and suffix, offsets in UTF-16 code units.
+ */
+function diffText(before, after) {
+    const max = Math.min(before.length, after.length);
+    let start = 0;
+    while (start < max && before[start] === after[start]) start++;
+    let suffix = 0;
+    while (
+        suffix < max - start &&
+        before[before.length - 1 - suffix] === after[after.length - 1 - suffix]
+    )
+        suffix++;
+    return {
+        start,
+        end: before.length - suffix,
+        text: after.slice(start, after.length - suffix),
+        length: before.length,
+    };
+}
+
+/**
+ * Send the editor changes since the last acknowledged sync as one diff, or the
+ * full text if `full`. Only one diff is in flight, later edits follow its ack.
+ */
+function sendReportDiff(full = false) {
+    const editor = document.querySelector("#report-editor textarea");
+    if (!editor) return;
+    if (reportSending !== null) {
+        reportSyncPending = true;
+        return;
+    }
+    const text = editor.value;
+    if (!full && text === reportSynced) return;
+    const diff = full ? { full: true, text } : diffText(reportSynced, text);
+    reportSending = text;
+    reportSendingFull = full;
+    setGradioTextbox("report-diff", JSON.stringify(diff));
+}
+
+/**
+ * Handle the server's answer to a diff: keep the sent text as synced, or send
+ * the full text once if the server's copy diverged or the diff failed.
+ */
+function ackReportDiff(ackJson) {
+    let ack = {};
+    try {
+        ack = JSON.parse(ackJson);
+    } catch (err) {}
+    const sent = reportSending;
+    reportSending = null;
+    if (ack.synced === undefined) {
+        // a failed full sync is not retried, the next edit tries again
+        if (!reportSendingFull) sendReportDiff(true);
+        return;
+    }
+    reportSynced = sent;
+    if (reportSyncPending) {
+        reportSyncPending = false;
+        sendReportDiff();
+    }
+}
+
+document.addEventListener("input", (event) => {
+    const target = event.target;
+    if (!target.matches || !target.matches("#report-editor textarea")) return;
+    clearTimeout(reportSyncTimer);
+    reportSyncTimer = setTimeout(sendReportDiff, REPORT_SYNC_DEBOUNCE_MS);
+});
+
+// MARK: Collapsible groups
+
+// elem_ids of collapsed groups, kept client-side so a toggle needs no server call
+const collapsedGroups = new Set();
+const collapseLabels = { collapse: "", expand: "" };
+
+/**
+ * Set the collapsed class and toggle button label of one group to its state.
+ */
+function syncGroupCollapse(groupId) {
+    const group = document.getElementById(groupId);
+    if (!group) return;
+    const isCollapsed = collapsedGroups.has(groupId);
+    const content = group.querySelector(".collapsible-content");
+    if (content) content.classList.toggle("collapsed", isCollapsed);
+    const button = group.querySelector(".toggle-collapse-btn");
+    const label = isCollapsed ? collapseLabels.expand : collapseLabels.collapse;
+    if (button && label && button.textContent !== label) button.textContent = label;
+}
+
+/**
+ * Collapse or expand the group with elem_id `groupId`.
+ */
+function toggleGroupCollapse(groupId, collapseLabel, expandLabel) {
+    collapseLabels.collapse = collapseLabel;
+    collapseLabels.expand = expandLabel;
+    if (!collapsedGroups.delete(groupId)) collapsedGroups.add(groupId);
+    syncGroupCollapse(groupId);
+}
+
+// groups re-created by a render start expanded, restore their collapsed state
+new MutationObserver(() => {
+    for (const groupId of collapsedGroups) syncGroupCollapse(groupId);
+}).observe(document.documentElement, { childList: true, subtree: true });
@@ -7,27 +7,34 @@ from secrets import token_hex
 import gradio as gr
 
 
-from src.config import SYS_SAMPLE_CSV_PATH, GUI_CSS_FILE
+from src.config import SYS_SAMPLE_CSV_PATH, GUI_CSS_FILE, GUI_JS_FILE
 from src.utils.log import logger
 from src.gui.gui_builder.gui_bind_events import (
+    bind_batch_job_events,
     bind_upload_logic,
     bind_has_headers_toggle,
     bind_toggle_collapse_events,
     bind_text_submission_events,
     bind_groups_add_remove_events,
     bind_preview_csv_toggle,
+    bind_preview_csv_paging,
+    bind_results_grid_events,
     bind_edit_system_prompt_events,
     bind_generate_preview_output_events,
+    bind_export_prerender_events,
     bind_txt_to_md_update_events,
 )
 from src.gui.gui_builder.gui_create_controls import (
     create_upload_download_controls,
+    create_batch_section,
     create_preview_csv_section,
     create_preview_doc_section,
+    create_results_grid_section,
     create_edit_system_prompt_section,
     render_all_text_groups,
 )
-from src.gui.gui_builder.gui_file_utils import load_css_file
+from src.gui.gui_builder.gui_file_utils import load_css_file, load_js_file
+from src.server.session_lifecycle import close_session, register_session
 from src.gui.i18n.gui_text_en import (
     GUI_BTN_ADD_GRP_LBL,
     GUI_BTN_DEL_GRP_LBL,
@@ -44,24 +51,31 @@ def setup_upload_group(
     session_id_state: gr.State,
     group_count: gr.State,
     group_header_titles: gr.State,
-    collapsed_state: gr.State,
     input_values: gr.State,
     has_headers_state: gr.State,
     last_uploaded_files_state: gr.State,
 ) -> tuple[
-    gr.Button, gr.Button, gr.DownloadButton, gr.DownloadButton, gr.DownloadButton
+    gr.Button,
+    gr.Button,
+    gr.DownloadButton,
+    gr.DownloadButton,
+    gr.DownloadButton,
+    gr.Button,
+    gr.Textbox,
 ]:
     """Setup upload group UI and bind events."""
 
     with gr.Group(elem_id="upload-group"):
         controls = {
-            **create_upload_download_controls(False),  # collapsed_state.value
+            **create_upload_download_controls(False),
             **create_preview_csv_section(),
+            **create_results_grid_section(),
+            **create_batch_section(),
             **create_edit_system_prompt_section(),
         }
-        toggle_upload_btn_grp = [(controls["toggle_btn"], "text-group-upload")]
+        toggle_upload_btn_grp = [(controls["toggle_btn"], "upload-group")]
 
-        bind_toggle_collapse_events(toggle_upload_btn_grp, collapsed_state)
+        bind_toggle_collapse_events(toggle_upload_btn_grp)
         bind_upload_logic(
             controls,
             session_id_state,
@@ -72,16 +86,22 @@ def setup_upload_group(
             last_uploaded_files_state,
         )
         bind_edit_system_prompt_events(
+            session_id_state,
             controls["edit_system_prompt_btn"],
             controls["edit_system_prompt_output"],
             controls["edit_system_prompt_visible"],
         )
         bind_preview_csv_toggle(
             controls["toggle_preview_btn"],
-            controls["preview_output"],
+            controls["preview_section"],
             controls["preview_visible"],
         )
+        bind_preview_csv_paging(controls, session_id_state)
+        bind_results_grid_events(controls, session_id_state)
         bind_has_headers_toggle(controls["toggle_headers_btn"], has_headers_state)
+        bind_batch_job_events(
+            controls, session_id_state, has_headers_state, last_uploaded_files_state
+        )
 
         return (
             controls["submit_all_btn"],
@@ -89,13 +109,14 @@ def setup_upload_group(
             controls["download_html_dwnbtn"],
             controls["download_pdf_dwnbtn"],
             controls["download_docx_dwnbtn"],
+            controls["download_all_btn"],
+            controls["download_all_token"],
         )
 
 
 def setup_text_groups(
     session_id_state: gr.State,
     group_count: gr.State,
-    collapsed_state: gr.State,
     group_header_titles: gr.State,
     input_values: gr.State,
     submit_all_btn: gr.Button,
@@ -103,54 +124,58 @@ def setup_text_groups(
     download_html_dwnbtn: gr.DownloadButton,
     download_pdf_dwnbtn: gr.DownloadButton,
     download_docx_dwnbtn: gr.DownloadButton,
-    last_uploaded_files_state: gr.State,
+    download_all_btn: gr.Button,
+    download_all_token: gr.Textbox,
 ):
     """Set up dynamic text groups UI and bind events."""
 
     with gr.Group(elem_id="preview-output-group"):
-        combined_output_md_box, combined_output_txt_box, combined_output_row_visible = (
-            create_preview_doc_section()
-        )
+        (
+            combined_output_md_box,
+            combined_output_txt_box,
+            combined_output_row_visible,
+            report_delta_box,
+            report_diff_box,
+        ) = create_preview_doc_section()
+    bind_txt_to_md_update_events(combined_output_md_box, combined_output_txt_box)
+    bind_export_prerender_events(session_id_state, report_diff_box)
 
     # FIXME bind only generate output event for doc
     # bind preview csv and doc in setup_text_groups()
     # bind_preview_doc_toggle(controls)
 
-    @gr.render(inputs=[group_count, collapsed_state, group_header_titles, input_values])
-    def render_text_groups(n_groups, collapsed, titles, input_vals):
+    @gr.render(inputs=[group_count, group_header_titles, input_values])
+    def render_text_groups(n_groups, titles, input_vals):
         """
         Dynamically renders 'group_count' of text input/output groups
         based on the other given parameters.
         """
 
         # Render all text groups (headers, input fields, outputs)
-        toggle_buttons, submit_buttons, header_states, text_inputs, text_outputs = (
-            render_all_text_groups(n_groups, collapsed, titles, input_vals)
+        toggle_buttons, submit_buttons, _, text_inputs, text_outputs = (
+            render_all_text_groups(n_groups, titles, input_vals)
         )
         # Bind toggle collapse events (to show/hide groups)
-        bind_toggle_collapse_events(toggle_buttons, collapsed_state)
+        bind_toggle_collapse_events(toggle_buttons)
         # Bind submit and download button events
         bind_generate_preview_output_events(
             session_id_state,
-            header_states,
             text_inputs,
             text_outputs,
             show_generated_output_btn,
             download_html_dwnbtn,
             download_pdf_dwnbtn,
             download_docx_dwnbtn,
+            download_all_btn,
+            download_all_token,
             combined_output_md_box,
             combined_output_txt_box,
             combined_output_row_visible,
-            last_uploaded_files_state,
-        )
-        bind_txt_to_md_update_events(
-            combined_output_md_box,
-            combined_output_txt_box,
+            report_delta_box,
         )
         bind_text_submission_events(
+            session_id_state,
             submit_buttons,
-            text_inputs,
             text_outputs,
             submit_all_btn,
         )
@@ -181,16 +206,32 @@ def build_ui() -> gr.Blocks:
         logger.warning("No custom CSS given. Continuing without ...")
     else:
         logger.info(f"Using custom CSS given: {GUI_CSS_FILE} ...")
+    custom_js = load_js_file(GUI_JS_FILE)
 
     with gr.Blocks(
         title=GUI_BROWSER_TAB_TITLE,
         analytics_enabled=None,
         css=custom_css,
+        head=f"<script>{custom_js}</script>",
         # theme=gr.themes.Monochrome(),  # type: ignore[reportPrivateImportUsage]
     ) as app:
-        session_id_state: gr.State = gr.State(lambda: token_hex(16))
+        # the session's files and server-side state are removed once it is deleted
+        session_id_state: gr.State = gr.State(
+            lambda: token_hex(16), delete_callback=close_session
+        )
+        # exposes the session id to client-side helpers, e.g. chunked upload
+        session_id_box = gr.Textbox(
+            elem_id="session-id",
+            elem_classes="hidden-io",
+            show_label=False,
+            container=False,
+        )
+        app.load(
+            fn=register_session,
+            inputs=session_id_state,
+            outputs=session_id_box,
+        )
         group_count: gr.State = gr.State(1)
-        collapsed_state: gr.State = gr.State({})
         group_header_titles: gr.State = gr.State([])
         input_value_state: gr.State = gr.State([])
         has_headers_state: gr.State = gr.State({})
@@ -205,11 +246,12 @@ def build_ui() -> gr.Blocks:
             download_html_dwnbtn,
             download_pdf_dwnbtn,
             download_docx_dwnbtn,
+            download_all_btn,
+            download_all_token,
         ) = setup_upload_group(
             session_id_state,
             group_count,
             group_header_titles,
-            collapsed_state,
             input_value_state,
             has_headers_state,
             last_uploaded_files_state,
@@ -217,7 +259,6 @@ def build_ui() -> gr.Blocks:
         setup_text_groups(
             session_id_state,
             group_count,
-            collapsed_state,
             group_header_titles,
             input_value_state,
             submit_all_btn,
@@ -225,7 +266,8 @@ def build_ui() -> gr.Blocks:
             download_html_dwnbtn,
             download_pdf_dwnbtn,
             download_docx_dwnbtn,
-            last_uploaded_files_state,
+            download_all_btn,
+            download_all_token,
         )
         setup_groups_add_remove_group(group_count)
         gr.HTML(GUI_FOOTER, elem_id="footer")
@@ -1,170 +1,453 @@
 """
-Functions for generating CSV file previews and extracting column data for Gradio UI components.
+Functions for generating paged CSV file previews and extracting column data for
+Gradio UI components.
 """
 
-from csv import Error, reader
+from concurrent.futures import ThreadPoolExecutor
+from csv import Error
+from math import ceil
 from pathlib import Path
 import gradio as gr
 
+from src.batch.engine import get_batch_progress, start_batch_job
+from src.batch.job_store import JOB_STATUS_RUNNING
 from src.config import (
     SYS_UPLOAD_PATH,
+    GUI_PREVIEW_PAGE_SIZE,
+    GUI_RESULTS_PAGE_SIZE,
     GUI_UPLOAD_MAX_ROWS,
+    GUI_UPLOAD_MAX_WORKERS,
 )
 from src.utils.log import logger
+from src.gui.gui_builder.gui_csv_index import (
+    CsvDatasetIndex,
+    CsvRowIndex,
+    get_session_row_index,
+    set_session_row_index,
+)
 from src.gui.gui_builder.gui_file_utils import (
     convert_file_path,
-    is_valid_file,
     sanitize_csv_data,
     sanitize_filename,
 )
+from src.gui.gui_builder.gui_report_document import (
+    ReportDocument,
+    get_session_document,
+    render_footer_section,
+    render_row_section,
+    render_title_section,
+)
+from src.gui.gui_builder.gui_session_store import get_session_data
+from src.gui.gui_builder.gui_results_grid import (
+    RESULTS_COL_QUERY,
+    RESULTS_COL_ROW,
+    get_results_page_count,
+    get_session_results_grid,
+)
 from src.gui.i18n import gui_text_en as txt
 
 
+def _flatten_file_list(files: str | list | None) -> list[str]:
+    """Flattens nested file lists as delivered by gr.State into file paths."""
+
+    if not files:
+        return []
+    if isinstance(files, str):
+        return [files]
+    return [f for item in files for f in _flatten_file_list(item)]
+
+
+def _get_report_title(last_uploaded_files: list[str] | str) -> str:
+    """Returns the names of the uploaded files, used as document title."""
+
+    return ", ".join(
+        Path(file).name for file in _flatten_file_list(last_uploaded_files)
+    )
+
+
 def generate_output(
     headers: list[str],
     text_inputs: list[str],
     text_outputs: list[str],
-    last_uploaded_files: list[str],
+    last_uploaded_files: list[str] | str,
 ) -> str:
     """Process all text input/output values and produce a combined output."""
 
-    # TODO handle multiple file
-    file_name = Path(last_uploaded_files[0]).name
-
-    combined = [f"# {file_name}\n\n"]
+    combined = [render_title_section(_get_report_title(last_uploaded_files))]
     for i, (head, inp, outp) in enumerate(
         zip(headers, text_inputs, text_outputs), start=1
     ):
-        combined.append(f"## {i}. {head}\n\n{inp}: {outp}\n\n")
-    combined.append(f"\n_{txt.GUI_TXT_DOC_DISCLAIMER}_")
+        combined.append(render_row_section(i, head, inp, outp))
+    combined.append(render_footer_section())
     return "".join(combined)
 
 
+def update_session_document(session_id: str, n_rows: int) -> tuple[ReportDocument, int]:
+    """
+    Updates the session's document from the stored values of the first `n_rows`
+    text groups, re-rendering only the changed sections. Returns the document and
+    the number of sections rendered.
+    """
+
+    data = get_session_data(session_id)
+    headers, text_inputs, text_outputs = data.get_rows(n_rows)
+    document = get_session_document(session_id)
+    changed = document.set_rows(
+        _get_report_title(data.uploaded_files), headers, text_inputs, text_outputs
+    )
+    return document, changed
+
+
+def store_uploaded_rows(
+    session_id: str,
+    headers: list[str] | None,
+    text_inputs: list[str] | None,
+    uploaded_files: list[str],
+    has_headers: bool,
+):
+    """Stores prefill values and upload metadata in the session store."""
+
+    data = get_session_data(session_id)
+    data.set_rows(headers or [], text_inputs or [])
+    data.uploaded_files = list(uploaded_files)
+    data.has_headers = bool(has_headers)
+
+
+def _preview_unavailable(reason: str) -> dict:
+    """Returns a DataFrame update showing why no preview is available."""
+
+    return gr.update(value=[[f"Preview unavailable ({reason})"]], headers=[""])
+
+
+def get_preview_sort_choices(session_id: str) -> list[tuple[str, int]]:
+    """Returns (label, column index) choices for sorting the session's preview."""
+
+    row_index = get_session_row_index(session_id)
+    choices = [(txt.GUI_TXT_PREVIEW_SORT_NONE, -1)]
+    if row_index is None:
+        return choices
+    return choices + [
+        (label, i) for i, label in enumerate(_get_preview_headers(row_index))
+    ]
+
+
+def _get_preview_headers(row_index: CsvDatasetIndex) -> list[str]:
+    """Returns sanitized headers padded to the widest row, or column numbers."""
+
+    max_len = row_index.max_columns
+    if not row_index.has_headers:
+        return [str(i + 1) for i in range(max_len)]
+    csv_headers = sanitize_csv_data(row_index.headers)
+    return csv_headers + [""] * (max_len - len(csv_headers))
+
+
+def generate_preview_page(
+    session_id: str,
+    page: float | None = 1,
+    sort_by: int | None = None,
+    sort_order: str = txt.GUI_TXT_PREVIEW_ORDER_ASC,
+    query: str | None = "",
+) -> tuple[dict, int, str]:
+    """
+    Reads one page of the session's indexed CSV, optionally sorted by column index
+    `sort_by` and filtered by `query`. Returns the DataFrame update, the clamped
+    one-based page number and a page info text.
+    """
+
+    row_index = get_session_row_index(session_id)
+    if row_index is None:
+        return _preview_unavailable("no valid files"), 1, ""
+
+    sort_col = None if sort_by is None or int(sort_by) < 0 else int(sort_by)
+    ascending = sort_order != txt.GUI_TXT_PREVIEW_ORDER_DESC
+    query = (query or "").strip()
+    page = max(1, int(page or 1))
+
+    try:
+        rows, total = row_index.read_page(
+            page - 1, GUI_PREVIEW_PAGE_SIZE, sort_col, ascending, query
+        )
+        pages = max(1, ceil(total / GUI_PREVIEW_PAGE_SIZE))
+        if page > pages:
+            page = pages
+            rows, total = row_index.read_page(
+                page - 1, GUI_PREVIEW_PAGE_SIZE, sort_col, ascending, query
+            )
+    except UnicodeDecodeError as e:
+        logger.error(f"Encoding error while reading {row_index.name}: {e}")
+        return _preview_unavailable("encoding issue"), 1, ""
+    except Error as e:
+        logger.error(f"CSV parsing error in file {row_index.name}: {e}")
+        return _preview_unavailable("CSV error"), 1, ""
+    except Exception as e:
+        logger.exception(
+            f"Unexpected error while reading preview page of {row_index.name}: {e}"
+        )
+        return _preview_unavailable("unexpected error"), 1, ""
+
+    # Normalize rows to match header length
+    max_len = row_index.max_columns
+    csv_rows = [
+        sanitize_csv_data(row) + [""] * (max_len - len(row)) for row in rows
+    ] or [[""] * max_len]
+    first_row = (page - 1) * GUI_PREVIEW_PAGE_SIZE + 1 if total else 0
+    page_info = txt.GUI_TXT_PREVIEW_PAGE_INFO.format(
+        start=first_row,
+        end=first_row + len(rows) - 1 if rows else 0,
+        total=total,
+        page=page,
+        pages=pages,
+    )
+
+    return (
+        gr.update(value=csv_rows, headers=_get_preview_headers(row_index)),
+        page,
+        page_info,
+    )
+
+
+def generate_results_page(
+    session_id: str, page: float | None = 1
+) -> tuple[dict, int, str]:
+    """
+    Reads one page of the session's results grid. Returns the DataFrame update, the
+    clamped one-based page number and a page info text.
+    """
+
+    grid = get_session_results_grid(session_id)
+    if grid is None:
+        return gr.update(value=[]), 1, ""
+
+    pages = get_results_page_count(grid)
+    page = min(max(1, int(page or 1)), pages)
+    rows = grid.read_page(page - 1, GUI_RESULTS_PAGE_SIZE)
+    first_row = (page - 1) * GUI_RESULTS_PAGE_SIZE + 1 if rows else 0
+    page_info = txt.GUI_TXT_PREVIEW_PAGE_INFO.format(
+        start=first_row,
+        end=first_row + len(rows) - 1 if rows else 0,
+        total=grid.row_count,
+        page=page,
+        pages=pages,
+    )
+    return gr.update(value=rows), page, page_info
+
+
+def update_results_queries(session_id: str, page_rows: list[list]) -> int:
+    """Stores queries edited in the visible grid page. Returns the number changed."""
+
+    grid = get_session_results_grid(session_id)
+    if grid is None:
+        return 0
+    changed = 0
+    for values in page_rows:
+        try:
+            row = int(values[RESULTS_COL_ROW]) - 1
+        except (IndexError, TypeError, ValueError):
+            continue
+        if 0 <= row < grid.row_count:
+            changed += grid.set_query(row, str(values[RESULTS_COL_QUERY] or ""))
+    return changed
+
+
+def _index_single_file(
+    file: str, upload_dir: Path, has_headers: bool
+) -> tuple[CsvRowIndex | None, str | None]:
+    """
+    Index one uploaded CSV file, already validated by `upload_files`. Returns the
+    row index and, if the file could not be indexed, the reason why.
+    """
+
+    try:
+        file_path = convert_file_path(file)
+    except ValueError as e:
+        logger.warning(e)
+        return None, None
+    except Exception as e:
+        logger.exception(f"Unexpected error while processing file {file}: {e}")
+        return None, None
+
+    file_name = Path(file_path).name
+    if not file_name.endswith(".csv"):
+        return None, None
+
+    row_index = None
+    try:
+        sanitized_name = sanitize_filename(file_name)
+        file_path = upload_dir / sanitized_name
+
+        # TODO display file size
+        # file_size = getsize(file_path) / 1024  # Size in KB
+        # previews.append((str(file_path), f"{sanitized_name}: {file_size:.2f} KB"))
+
+        row_index = CsvRowIndex(file_path, has_headers)
+        row_index.build(GUI_UPLOAD_MAX_ROWS)
+        return row_index, None
+    except UnicodeDecodeError as e:
+        logger.error(f"Encoding error while reading file {file_path}: {e}")
+        reason = "encoding issue"
+    except Error as e:
+        logger.error(f"CSV parsing error in file {file_path}: {e}")
+        reason = "CSV error"
+    except Exception as e:
+        logger.exception(
+            f"Unexpected error while generating preview for {file_path}: {e}"
+        )
+        reason = "unexpected error"
+
+    if row_index is not None:
+        row_index.close()
+    return None, reason
+
+
 def generate_file_preview(
     files: list[str] | None, session_id: str, has_headers: bool
-) -> tuple[dict[str, str] | None, list[str] | None, list[str] | None]:
+) -> tuple[dict[str, str] | None, list[str] | None, list[str] | None, int, str]:
     """
-    Generate a preview for the first valid CSV file, extracting headers, rows, and
-    first/second column values. Returns a tuple of (headers, rows) for Dataframe
-    display and (first_column, second_column) values for text groups, or None if no
-    valid files are provided.
-    Info: only_first_file_used = True
+    Index all valid CSV files in parallel and merge them into one dataset for paged
+    preview, with a file-of-origin column if more than one file was given. Returns
+    a tuple of the first preview page for Dataframe display, (first_column,
+    second_column) values of the merged rows for text groups, or None if no valid
+    files are provided, and the page number and info text of the preview.
     """
 
     if files is None:
-        return None, [txt.GUI_GRP_DYN_HEAD], None
+        return None, [txt.GUI_GRP_DYN_HEAD], None, 1, ""
     if isinstance(files, str):
         files = [files]
+    if not files:
+        return _preview_unavailable("no valid files"), [], [], 1, ""
 
-    only_first_file_used = True
     upload_dir = Path(SYS_UPLOAD_PATH, session_id)
-    no_col_input_found = "no column input found"
 
-    csv_rows = []
+    with ThreadPoolExecutor(
+        max_workers=min(len(files), GUI_UPLOAD_MAX_WORKERS)
+    ) as pool:
+        results = list(
+            pool.map(lambda f: _index_single_file(f, upload_dir, has_headers), files)
+        )
+
+    parts = [row_index for row_index, _ in results if row_index is not None]
+    if not parts:
+        set_session_row_index(session_id, None)
+        reason = next((r for _, r in results if r), "no valid files")
+        return _preview_unavailable(reason), [], [], 1, ""
+
+    set_session_row_index(
+        session_id,
+        CsvDatasetIndex(
+            parts, txt.GUI_TXT_PREVIEW_ORIGIN_COL if len(parts) > 1 else None
+        ),
+    )
+    preview, page, page_info = generate_preview_page(session_id)
+    return preview, *_get_prefill_values(parts), page, page_info
+
+
+def _get_prefill_values(parts: list[CsvRowIndex]) -> tuple[list[str], list[str]]:
+    """Returns first and second column values of the indexed prefill rows."""
+
+    no_col_input_found = "no column input found"
     first_column_values = []
     second_column_values = []
-    csv_headers: list[str] = []
+    for part in parts:
+        for row in part.prefill_rows:
+            if len(first_column_values) >= GUI_UPLOAD_MAX_ROWS:
+                break
+            if row and row[0]:
+                sanitized_row = sanitize_csv_data(row)
+                first_column_values.append(sanitized_row[0])
+                second_column_values.append(
+                    sanitized_row[1] if len(sanitized_row) > 1 else no_col_input_found
+                )
+    return first_column_values, second_column_values
+
+
+def generate_chunked_upload_preview(
+    file_name: str, session_id: str, has_headers: bool
+) -> tuple[dict, list[str], list[str], str, int, str]:
+    """
+    Generate preview and prefill values for a file received through the chunked
+    upload route, which indexed it while it arrived. The index is only rebuilt if
+    the headers toggle differs from what was detected. Returns the preview, the
+    first and second column values, the stored file path, and the page number and
+    info text of the preview.
+    """
 
-    for file in files:
-        max_len = 0
+    file_path = Path(SYS_UPLOAD_PATH, session_id, sanitize_filename(file_name))
+    if not file_path.exists():
+        return _preview_unavailable("no valid files"), [], [], "", 1, ""
 
+    dataset = get_session_row_index(session_id)
+    if (
+        dataset is None
+        or [part.file_path for part in dataset.parts] != [file_path]
+        or dataset.has_headers != bool(has_headers)
+    ):
+        row_index = CsvRowIndex(file_path, bool(has_headers))
         try:
-            file_path = convert_file_path(file)
-        except ValueError as e:
-            logger.warning(e)
-            continue
-        except Exception as e:
-            logger.exception(f"Unexpected error while processing file {file}: {e}")
-            continue
+            row_index.build(GUI_UPLOAD_MAX_ROWS)
+        except Exception:
+            row_index.close()
+            raise
+        dataset = CsvDatasetIndex([row_index])
+        set_session_row_index(session_id, dataset)
 
-        if not is_valid_file(file_path):
-            continue
+    preview, page, page_info = generate_preview_page(session_id)
+    return preview, *_get_prefill_values(dataset.parts), str(file_path), page, page_info
 
-        file_name = Path(file_path).name
 
-        try:
-            sanitized_name = sanitize_filename(file_name)
-            file_path = upload_dir / sanitized_name
-
-            # TODO display file size
-            # file_size = getsize(file_path) / 1024  # Size in KB
-            # previews.append((str(file_path), f"{sanitized_name}: {file_size:.2f} KB"))
-
-            with file_path.open("r", encoding="utf-8") as f:
-                if file_name.endswith(".csv"):
-                    csvreader = reader(f)
-
-                    # TODO short version
-                    # all_rows = list(csvreader)
-                    # if has_headers:
-                    #     csv_headers = sanitize_csv_data(all_rows[0])
-                    #     csv_rows = [
-                    #         sanitize_csv_data(row)
-                    #         for row in all_rows[1 : (GUI_UPLOAD_MAX_ROWS - 1)]
-                    #     ]
-                    # else:
-                    #     csv_rows = [
-                    #         sanitize_csv_data(row) for row in all_rows[:GUI_UPLOAD_MAX_ROWS]
-                    #     ]
-                    # max_len = max(len(csv_headers), len(csv_rows))
-
-                    for i, row in enumerate(csvreader):
-                        if i >= GUI_UPLOAD_MAX_ROWS:
-                            csv_rows.append(["..."])
-                            break
-                        if i == 0 and has_headers:
-                            csv_headers = sanitize_csv_data(row)
-                            max_len = len(csv_headers)
-                            continue
-                        if row and row[0]:
-                            sanitized_row = sanitize_csv_data(row)
-                            first_column_values.append(sanitized_row[0])
-                            second_column_values.append(
-                                sanitized_row[1]
-                                if len(sanitized_row) > 1
-                                else no_col_input_found
-                            )
-                            csv_rows.append(sanitized_row)
-                        else:
-                            csv_rows.append(sanitize_csv_data(row))
-                        max_len = max(max_len, len(row))
-
-            # Normalize header and rows to match max length
-            if has_headers:
-                if len(csv_headers) < max_len:
-                    csv_headers += [""] * (max_len - len(csv_headers))
-            else:
-                csv_headers = [str(i + 1) for i in range(max_len)]
-            normalized_csv_rows = [
-                row + [""] * (max_len - len(row)) if len(row) < max_len else row
-                for row in csv_rows
-            ]
-            csv_rows = normalized_csv_rows
-
-        except UnicodeDecodeError as e:
-            logger.error(f"Encoding error while reading file {file_path}: {e}")
-            csv_rows = [["Preview unavailable (encoding issue)"]]
-        except Error as e:
-            logger.error(f"CSV parsing error in file {file_path}: {e}")
-            csv_rows = [["Preview unavailable (CSV error)"]]
-        except Exception as e:
-            logger.exception(
-                f"Unexpected error while generating preview for {file_path}: {e}"
-            )
-            csv_rows = [["Preview unavailable (unexpected error)"]]
+def start_batch_jobs(
+    session_id: str, has_headers: bool, last_uploaded_files: list[str] | str
+) -> list[str]:
+    """
+    Starts one background batch job per uploaded file, with the session's system
+    prompt. Returns the job ids.
+    """
 
-        if only_first_file_used:
-            break
-        else:
-            csv_rows = []
-            first_column_values = []
-            second_column_values = []
+    system_prompt = get_session_data(session_id).system_prompt
+    job_ids = []
+    for file in _flatten_file_list(last_uploaded_files):
+        job_id = start_batch_job(session_id, file, bool(has_headers), system_prompt)
+        if job_id is not None:
+            job_ids.append(job_id)
+    return job_ids
 
-    if not csv_rows:
-        csv_rows = [["Preview unavailable (no valid files)"]]
 
-    return (
-        gr.update(value=csv_rows, headers=csv_headers),
-        first_column_values,
-        second_column_values,
-    )
+def _format_eta(eta_seconds: float | None) -> str:
+    """Formats an ETA in seconds as H:MM:SS, or '-' if unknown."""
+
+    if eta_seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(eta_seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def generate_batch_progress(job_ids: list[str]) -> tuple[str, list[str], bool]:
+    """
+    Returns a progress line per job, the output files written so far, and whether
+    any of the jobs is still running.
+    """
+
+    lines = []
+    output_paths = []
+    running = False
+    for job_id in job_ids:
+        progress = get_batch_progress(job_id)
+        if progress is None:
+            continue
+        running = running or progress["status"] == JOB_STATUS_RUNNING
+        output_path = Path(progress["output_path"])
+        if output_path.exists():
+            output_paths.append(str(output_path))
+        lines.append(
+            "- "
+            + txt.GUI_TXT_BATCH_PROGRESS.format(
+                name=output_path.name,
+                done=progress["done"],
+                total=progress["total"],
+                status=progress["status"],
+                rate=progress["rows_per_sec"],
+                eta=_format_eta(progress["eta_seconds"]),
+            )
+        )
+    return "\n".join(lines), output_paths, running
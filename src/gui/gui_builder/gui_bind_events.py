@@ -2,16 +2,32 @@
 Event binding functions for Gradio GUI components, connecting UI controls to their logic handlers.
 """
 
+from json import dumps
+
 import gradio as gr
 
 from src.config import (
+    SERVER_EXPORTS_ROUTE,
     SYS_SAMPLE_CSV_PATH,
 )
 from src.gui.gui_builder.gui_handle_events import (
+    handle_apply_report_diff,
+    handle_event_batch_progress,
+    handle_event_chunked_upload_complete,
+    handle_event_export_batch_results,
+    handle_event_export_results_grid,
     handle_event_file_processing,
-    handle_text_submission,
-    set_toggle_btn_value,
-    toggle_collapse,
+    handle_event_preview_page,
+    handle_event_preview_page_step,
+    handle_event_results_edit,
+    handle_event_results_page,
+    handle_event_results_page_step,
+    handle_event_results_select,
+    handle_event_results_submit_page,
+    handle_event_start_batch,
+    handle_store_text_input,
+    handle_submit_all,
+    handle_text_group_submission,
     toggle_preview,
     toggle_edit_system_prompt_output,
     toggle_generated_output,
@@ -22,7 +38,19 @@ from src.gui.gui_builder.gui_handle_events import (
     handle_generate_html_from_md,
     handle_generate_pdf_from_html,
     handle_generate_docx_from_html,
-    flatten_inputs_and_generate_output,
+    handle_prepare_export_bundle,
+    handle_update_report_row,
+    handle_generate_output,
+)
+from src.gui.i18n import gui_text_en as txt
+
+# applies document section deltas to the editor, see applyReportDelta in gui.js
+_APPLY_REPORT_DELTA_JS = "(delta) => applyReportDelta(delta)"
+# acknowledges an applied editor diff, see ackReportDiff in gui.js
+_ACK_REPORT_DIFF_JS = "(ack) => ackReportDiff(ack)"
+# toggle button labels passed to toggleGroupCollapse in gui.js
+_COLLAPSE_LABELS = (
+    f"{dumps(txt.GUI_BTN_TGL_COLLAPSE_LBL)}, {dumps(txt.GUI_BTN_TGL_EXPAND_LBL)}"
 )
 
 
@@ -44,10 +72,13 @@ def bind_upload_logic(
         group_count,
         controls["output_box"],
         last_uploaded_files_state,
+        controls["preview_page"],
+        controls["preview_sort_col"],
+        controls["preview_page_info"],
     ]
 
     # Upload > Preview > Prefill
-    controls["upload_button"].upload(
+    upload_event = controls["upload_button"].upload(
         fn=handle_event_file_processing,
         inputs=[
             controls["upload_button"],
@@ -59,7 +90,7 @@ def bind_upload_logic(
     )
 
     # Sample > Preview > Prefill
-    controls["load_sample_button"].click(
+    sample_event = controls["load_sample_button"].click(
         fn=handle_event_file_processing,
         inputs=[
             gr.State(SYS_SAMPLE_CSV_PATH),
@@ -70,8 +101,19 @@ def bind_upload_logic(
         outputs=output_states,
     )
 
+    # Chunked upload completed in browser > Preview > Prefill
+    chunked_upload_event = controls["chunked_upload_done"].input(
+        fn=handle_event_chunked_upload_complete,
+        inputs=[
+            controls["chunked_upload_done"],
+            session_id_state,
+            has_headers_state,
+        ],
+        outputs=output_states,
+    )
+
     # Check Has Headers > Preview
-    controls["toggle_headers_btn"].click(
+    headers_event = controls["toggle_headers_btn"].click(
         fn=handle_event_file_processing,
         inputs=[
             controls["upload_button"],  # last_uploaded_files_state,
@@ -82,10 +124,22 @@ def bind_upload_logic(
         outputs=output_states,
     )
 
+    # Preview > first page of the results grid over the new dataset
+    for event in (upload_event, sample_event, chunked_upload_event, headers_event):
+        event.then(
+            fn=handle_event_results_page,
+            inputs=[session_id_state, gr.State(1)],
+            outputs=[
+                controls["results_grid"],
+                controls["results_page"],
+                controls["results_page_info"],
+            ],
+        )
+
 
 def bind_preview_csv_toggle(
     toggle_preview_btn: gr.Button,
-    preview_output: gr.DataFrame,
+    preview_section: gr.Column,
     preview_visible: gr.State,
 ):
     """Bind the preview toggle button logic."""
@@ -94,13 +148,155 @@ def bind_preview_csv_toggle(
         fn=toggle_preview,
         inputs=preview_visible,
         outputs=[
-            preview_output,
+            preview_section,
             toggle_preview_btn,
             preview_visible,
         ],
     )
 
 
+def bind_preview_csv_paging(controls: dict, session_id_state: gr.State):
+    """Bind page, sort and filter controls of the CSV preview to server-side paging."""
+
+    view_inputs = [
+        controls["preview_page"],
+        controls["preview_sort_col"],
+        controls["preview_sort_order"],
+        controls["preview_filter"],
+    ]
+    page_outputs = [
+        controls["preview_output"],
+        controls["preview_page"],
+        controls["preview_page_info"],
+    ]
+
+    # Page number typed > Page
+    controls["preview_page"].submit(
+        fn=handle_event_preview_page,
+        inputs=[session_id_state, *view_inputs],
+        outputs=page_outputs,
+        trigger_mode="always_last",
+    )
+
+    # Prev / Next > Page
+    for btn, step in (
+        (controls["preview_prev_btn"], -1),
+        (controls["preview_next_btn"], 1),
+    ):
+        btn.click(
+            fn=handle_event_preview_page_step,
+            inputs=[gr.State(step), session_id_state, *view_inputs],
+            outputs=page_outputs,
+            trigger_mode="always_last",
+        )
+
+    # Sort or filter changed > first page of the new view
+    for event in (
+        controls["preview_sort_col"].change,
+        controls["preview_sort_order"].change,
+        controls["preview_filter"].submit,
+    ):
+        event(
+            fn=handle_event_preview_page,
+            inputs=[session_id_state, gr.State(1), *view_inputs[1:]],
+            outputs=page_outputs,
+            trigger_mode="always_last",
+        )
+
+
+def bind_results_grid_events(controls: dict, session_id_state: gr.State):
+    """Bind paging, editing and row submission of the results grid."""
+
+    page_outputs = [
+        controls["results_grid"],
+        controls["results_page"],
+        controls["results_page_info"],
+    ]
+
+    # Page number typed > Page
+    controls["results_page"].submit(
+        fn=handle_event_results_page,
+        inputs=[session_id_state, controls["results_page"]],
+        outputs=page_outputs,
+        trigger_mode="always_last",
+    )
+
+    # Prev / Next > Page
+    for btn, step in (
+        (controls["results_prev_btn"], -1),
+        (controls["results_next_btn"], 1),
+    ):
+        btn.click(
+            fn=handle_event_results_page_step,
+            inputs=[gr.State(step), session_id_state, controls["results_page"]],
+            outputs=page_outputs,
+            trigger_mode="always_last",
+        )
+
+    # Query edited > stored server-side, the page is not sent back
+    controls["results_grid"].input(
+        fn=handle_event_results_edit,
+        inputs=[session_id_state, controls["results_grid"]],
+        show_progress="hidden",
+    )
+
+    # Submit cell clicked > row queried > Page
+    controls["results_grid"].select(
+        fn=handle_event_results_select,
+        inputs=[session_id_state, controls["results_page"]],
+        outputs=page_outputs,
+        concurrency_limit=5,
+    )
+    controls["results_submit_page_btn"].click(
+        fn=handle_event_results_submit_page,
+        inputs=[session_id_state, controls["results_page"]],
+        outputs=page_outputs,
+        concurrency_limit=5,
+    )
+    controls["results_export_btn"].click(
+        fn=handle_event_export_results_grid,
+        inputs=[session_id_state, controls["results_export_format"]],
+        outputs=controls["results_export_file"],
+        concurrency_limit=None,  # capped by the export pool
+    )
+
+
+def bind_batch_job_events(
+    controls: dict,
+    session_id_state: gr.State,
+    has_headers_state: gr.State,
+    last_uploaded_files_state: gr.State,
+):
+    """Bind the batch button to start jobs and the timer to refresh their progress."""
+
+    controls["run_batch_btn"].click(
+        fn=handle_event_start_batch,
+        inputs=[session_id_state, has_headers_state, last_uploaded_files_state],
+        outputs=[
+            controls["batch_section"],
+            controls["batch_job_ids"],
+            controls["batch_timer"],
+            controls["batch_progress"],
+        ],
+    )
+    controls["batch_timer"].tick(
+        fn=handle_event_batch_progress,
+        inputs=controls["batch_job_ids"],
+        outputs=[
+            controls["batch_progress"],
+            controls["batch_output_files"],
+            controls["batch_timer"],
+        ],
+        show_progress="hidden",
+    )
+    controls["batch_export_btn"].click(
+        fn=handle_event_export_batch_results,
+        inputs=[controls["batch_job_ids"], controls["batch_export_format"]],
+        outputs=controls["batch_export_files"],
+        concurrency_limit=None,  # capped by the export pool
+    )
+
+
 def bind_edit_system_prompt_toggle(
     edit_system_prompt_btn: gr.Button,
     edit_system_prompt_output: gr.Textbox,
@@ -110,7 +306,7 @@ def bind_edit_system_prompt_toggle(
 
     edit_system_prompt_btn.click(
         fn=toggle_edit_system_prompt_output,
-        inputs=edit_system_prompt_visible,
+        inputs=[edit_system_prompt_visible, edit_system_prompt_output],
         outputs=[
             edit_system_prompt_output,
             edit_system_prompt_btn,
@@ -121,30 +317,23 @@ def bind_edit_system_prompt_toggle(
 
 def bind_show_editor_toggle(
     show_generated_output_btn: gr.Button,
-    header_states: list[gr.State],
-    text_inputs: list[gr.Textbox],
-    text_outputs: list[gr.Textbox],
-    last_uploaded_files: gr.State,
+    n_rows: int,
     combined_output_md_box: gr.Markdown | gr.HTML,
     combined_output_txt_box: gr.Textbox,
     combined_output_row_visible: gr.State,
+    session_id: gr.State,
+    report_delta_box: gr.Textbox,
 ):
-    """Bind the preview toggle button logic."""
+    """
+    Bind the preview toggle button logic. The document is generated from the
+    session store, so only the session id and row count are sent.
+    """
 
     show_generated_output_btn.click(
-        fn=flatten_inputs_and_generate_output,
-        # gradio expects flattened inputs to fn
-        inputs=[
-            gr.State(len(header_states)),
-            gr.State(len(text_inputs)),
-            gr.State(len(text_outputs)),
-            *header_states,
-            *text_inputs,
-            *text_outputs,
-            last_uploaded_files,
-        ],
-        outputs=[combined_output_md_box, combined_output_txt_box],
-    )
+        fn=handle_generate_output,
+        inputs=[session_id, gr.State(n_rows), report_delta_box],
+        outputs=[combined_output_txt_box, report_delta_box],
+    ).then(fn=None, inputs=[report_delta_box], js=_APPLY_REPORT_DELTA_JS)
 
     show_generated_output_btn.click(
         fn=toggle_generated_output,
@@ -158,6 +347,32 @@ def bind_show_editor_toggle(
     )
 
 
+def bind_report_section_events(
+    session_id: gr.State,
+    text_inputs: list[gr.Textbox],
+    text_outputs: list[gr.Textbox],
+    report_delta_box: gr.Textbox,
+):
+    """
+    Bind each text group's query edits to the session store, and its output to an
+    update of its document section, sent to the client as delta.
+    """
+
+    for row, (text_input, text_output) in enumerate(zip(text_inputs, text_outputs)):
+        text_input.input(
+            fn=handle_store_text_input,
+            inputs=[session_id, gr.State(row), text_input],
+            queue=False,
+            show_progress="hidden",
+        )
+        text_output.change(
+            fn=handle_update_report_row,
+            inputs=[session_id, gr.State(row), report_delta_box],
+            outputs=report_delta_box,
+            show_progress="hidden",
+        ).then(fn=None, inputs=[report_delta_box], js=_APPLY_REPORT_DELTA_JS)
+
+
 def bind_download_html(
     session_id: gr.State,
     download_html_dwnbtn: gr.DownloadButton,
@@ -165,8 +380,7 @@ def bind_download_html(
     # text_inputs: list[gr.Textbox],
     # text_outputs: list[gr.Textbox],
     # last_uploaded_files: gr.State,
-    combined_output_md_box: gr.Markdown | gr.HTML,
-    # combined_output_txt_box: gr.Textbox,
+    combined_output_txt_box: gr.Textbox,
 ):
     """Bind the donwload HTML button logic."""
 
@@ -188,48 +402,99 @@ def bind_download_html(
 
     download_html_dwnbtn.click(
         fn=handle_generate_html_from_md,
-        inputs=[session_id, combined_output_md_box],
+        inputs=[session_id, combined_output_txt_box],
         outputs=[download_html_dwnbtn],
+        concurrency_limit=None,  # capped by the export pool
     )
 
 
 def bind_download_pdf(
     session_id: gr.State,
     download_pdf_dwnbtn: gr.DownloadButton,
-    combined_output_md_box: gr.Markdown | gr.HTML,
+    combined_output_txt_box: gr.Textbox,
 ):
     """Bind the donwload PDF button logic."""
 
     download_pdf_dwnbtn.click(
         fn=handle_generate_pdf_from_html,
-        inputs=[session_id, combined_output_md_box],
+        inputs=[session_id, combined_output_txt_box],
         outputs=[download_pdf_dwnbtn],
+        concurrency_limit=None,  # capped by the export pool
     )
 
 
 def bind_download_docx(
     session_id: gr.State,
     download_docx_dwnbtn: gr.DownloadButton,
-    combined_output_md_box: gr.Markdown | gr.HTML,
+    combined_output_txt_box: gr.Textbox,
 ):
     """Bind the donwload DOCX button logic."""
 
     download_docx_dwnbtn.click(
         fn=handle_generate_docx_from_html,
-        inputs=[session_id, combined_output_md_box],
+        inputs=[session_id, combined_output_txt_box],
         outputs=[download_docx_dwnbtn],
+        concurrency_limit=None,  # capped by the export pool
+    )
+
+
+def bind_download_all(
+    session_id: gr.State,
+    download_all_btn: gr.Button,
+    download_all_token: gr.Textbox,
+    n_rows: int,
+    combined_output_txt_box: gr.Textbox,
+):
+    """
+    Bind the download all button: snapshot document and stored results
+    server-side, then let the browser fetch the streamed zip by token.
+    """
+
+    download_all_btn.click(
+        fn=handle_prepare_export_bundle,
+        inputs=[session_id, combined_output_txt_box, gr.State(n_rows)],
+        outputs=[download_all_token],
+    ).success(
+        fn=None,
+        inputs=[download_all_token],
+        js=(
+            "(token) => { if (token) "
+            f"window.location.assign('{SERVER_EXPORTS_ROUTE}/bundle/' + token); }}"
+        ),
     )
 
 
 def bind_txt_to_md_update_events(
     combined_output_md_box: gr.Markdown | gr.HTML, combined_output_txt_box: gr.Textbox
 ):
-    """Bind the text to markdown update events."""
+    """
+    Bind editor changes to a debounced client-side update of the preview, see
+    previewReportMarkdown in gui.js. No server round trip per keystroke.
+    """
     combined_output_txt_box.change(
-        fn=lambda x: x, inputs=combined_output_txt_box, outputs=combined_output_md_box
+        fn=None,
+        inputs=combined_output_txt_box,
+        outputs=combined_output_md_box,
+        js="(md) => previewReportMarkdown(md)",
+        queue=False,
+        show_progress="hidden",
     )
 
 
+def bind_export_prerender_events(session_id: gr.State, report_diff_box: gr.Textbox):
+    """
+    Bind debounced editor diffs, see sendReportDiff in gui.js, to the session's
+    copy of the document and background rendering of the downloads.
+    """
+    report_diff_box.input(
+        fn=handle_apply_report_diff,
+        inputs=[session_id, report_diff_box],
+        outputs=report_diff_box,
+        show_progress="hidden",
+        concurrency_limit=None,
+    ).then(fn=None, inputs=[report_diff_box], js=_ACK_REPORT_DIFF_JS)
+
+
 def bind_has_headers_toggle(toggle_headers_btn: gr.Button, has_headers_state: gr.State):
     """Bind the CSV has headers toggle button logic."""
     toggle_headers_btn.click(
@@ -239,27 +504,23 @@ def bind_has_headers_toggle(toggle_headers_btn: gr.Button, has_headers_state: gr
     )
 
 
-def bind_toggle_collapse_events(
-    toggle_buttons: list[tuple[gr.Button, str]],
-    collapsed_state: gr.State,
-):
-    """Bind toggle buttons to update collapsed state for each group."""
+def bind_toggle_collapse_events(toggle_buttons: list[tuple[gr.Button, str]]):
+    """
+    Bind toggle buttons to collapse or expand their group client-side, see
+    toggleGroupCollapse in gui.js. No server round trip or re-render per toggle.
+    """
 
     for toggle_btn, group_id in toggle_buttons:
-
-        def handle_click(state, group_id=group_id):
-            new_state = toggle_collapse(state, group_id)
-            label_update = set_toggle_btn_value(new_state, group_id)
-            return label_update, new_state
-
         toggle_btn.click(
-            fn=handle_click,
-            inputs=[collapsed_state],
-            outputs=[toggle_btn, collapsed_state],
+            fn=None,
+            js=f"() => toggleGroupCollapse({dumps(group_id)}, {_COLLAPSE_LABELS})",
+            queue=False,
+            show_progress="hidden",
         )
 
 
 def bind_edit_system_prompt_events(
+    session_id: gr.State,
     edit_system_prompt_btn: gr.Button,
     edit_system_prompt_output: gr.Textbox,
     edit_system_prompt_visible: gr.State,
@@ -267,6 +528,7 @@ def bind_edit_system_prompt_events(
     """Bind the events for editing the system prompt."""
 
     bind_edit_system_prompt_content(
+        session_id,
         edit_system_prompt_output,
     )
     bind_edit_system_prompt_toggle(
@@ -277,95 +539,105 @@ def bind_edit_system_prompt_events(
 
 
 def bind_edit_system_prompt_content(
+    session_id: gr.State,
     edit_system_prompt_output: gr.Textbox,
 ):
-    """Bind the events for editing the system prompt content."""
-
-    edit_system_prompt_output.change(
-        fn=update_system_prompt, inputs=edit_system_prompt_output
+    """
+    Bind the events for editing the system prompt content. The prompt is
+    committed to the session once editing ends, not per keystroke.
+    """
+
+    edit_system_prompt_output.blur(
+        fn=update_system_prompt,
+        inputs=[session_id, edit_system_prompt_output],
+        queue=False,
+        show_progress="hidden",
     )
 
 
 def bind_generate_preview_output_events(
     session_id_state: gr.State,
-    header_states: list[gr.State],
     text_inputs: list[gr.Textbox],
     text_outputs: list[gr.Textbox],
     show_generated_output_btn: gr.Button,
     download_html_dwnbtn: gr.DownloadButton,
     download_pdf_dwnbtn: gr.DownloadButton,
     download_docx_dwnbtn: gr.DownloadButton,
+    download_all_btn: gr.Button,
+    download_all_token: gr.Textbox,
     combined_output_md_box: gr.Markdown | gr.HTML,
     combined_output_txt_box: gr.Textbox,
     combined_output_row_visible: gr.State,
-    last_uploaded_files: gr.State,
-    # has_headers_state: gr.State = gr.State(""),
+    report_delta_box: gr.Textbox,
 ):
     """Bind the events for generating and displaying the output from text inputs."""
 
     bind_show_editor_toggle(
         show_generated_output_btn,
-        header_states,
-        text_inputs,
-        text_outputs,
-        last_uploaded_files,
+        len(text_inputs),
         combined_output_md_box,
         combined_output_txt_box,
         combined_output_row_visible,
+        session_id_state,
+        report_delta_box,
+    )
+    bind_report_section_events(
+        session_id_state, text_inputs, text_outputs, report_delta_box
     )
     bind_download_html(
         session_id_state,
         download_html_dwnbtn,
-        combined_output_md_box,
+        combined_output_txt_box,
     )
     bind_download_pdf(
         session_id_state,
         download_pdf_dwnbtn,
-        combined_output_md_box,
+        combined_output_txt_box,
     )
     bind_download_docx(
         session_id_state,
         download_docx_dwnbtn,
-        combined_output_md_box,
+        combined_output_txt_box,
+    )
+    bind_download_all(
+        session_id_state,
+        download_all_btn,
+        download_all_token,
+        len(text_inputs),
+        combined_output_txt_box,
     )
 
 
 def bind_text_submission_events(
-    # session_id: str,
+    session_id: gr.State,
     submit_buttons: list[gr.Button],
-    text_inputs: list[gr.Textbox],
     text_outputs: list[gr.Textbox],
     submit_all_btn: gr.Button,
 ):
     """Bind each submit button and 'Submit All' if provided."""
 
-    for submit_btn, text_input, text_output in zip(
-        submit_buttons, text_inputs, text_outputs
-    ):
+    for row, (submit_btn, text_output) in enumerate(zip(submit_buttons, text_outputs)):
         submit_btn.click(
-            fn=handle_text_submission,
-            inputs=text_input,
+            fn=handle_text_group_submission,
+            inputs=[session_id, gr.State(row)],
             outputs=text_output,
             concurrency_limit=5,
         )
 
     if submit_all_btn:
-        bind_submit_all_button(submit_all_btn, text_inputs, text_outputs)
+        bind_submit_all_button(session_id, submit_all_btn, text_outputs)
 
 
 def bind_submit_all_button(
+    session_id: gr.State,
     submit_all_btn: gr.Button,
-    text_inputs: list[gr.Textbox],
     text_outputs: list[gr.Textbox],
 ):
-    """Bind the 'Submit All' button to submit all text inputs in batch."""
-
-    def submit_all(*texts: str) -> list[str | None]:
-        return [handle_text_submission(text) for text in texts]
+    """Bind the 'Submit All' button to submit all stored queries in batch."""
 
     submit_all_btn.click(
-        fn=submit_all,
-        inputs=text_inputs,
+        fn=handle_submit_all,
+        inputs=[session_id, gr.State(len(text_outputs))],
         outputs=text_outputs,
         concurrency_limit=5,
     )
@@ -3,13 +3,18 @@ GUI controls for the Gradio-based interdface, including upload controls, preview
 and dynamic text groups. Provides functions to create and manage interactive UI components.
 """
 
+from hashlib import sha256
+
 import gradio as gr
 
 from src.config import (
+    GUI_BATCH_PROGRESS_INTERVAL,
+    GUI_UPLOAD_CHUNK_SIZE,
     GUI_UPLOAD_FILE_TYPES,
     FT_GUI_ENABLE_UPLOAD_COLLAPSE,
+    SERVER_CHUNKED_UPLOAD_ROUTE,
 )
-from src.chat.azure_config import generate_full_chat_system_prompt
+from src.batch.results_export import get_available_result_formats
 from src.gui.i18n import gui_text_en as txt
 
 
@@ -58,6 +63,25 @@ def create_upload_download_controls(
                         elem_classes="upload-btn",
                         scale=0,
                     )
+                    gr.HTML(
+                        value=(
+                            f'<div data-chunked-upload class="chunked-upload" '
+                            f'data-endpoint="{SERVER_CHUNKED_UPLOAD_ROUTE}" '
+                            f'data-chunk-size="{GUI_UPLOAD_CHUNK_SIZE}">'
+                            f'<label for="chunked-upload-input">'
+                            f"{txt.GUI_BTN_CHUNKED_UPLOAD_LBL}</label>"
+                            f'<input id="chunked-upload-input" type="file" '
+                            f'accept=".csv" multiple>'
+                            f'<span class="chunked-upload-progress"></span></div>'
+                        ),
+                        elem_classes="upload-btn",
+                    )
+                    chunked_upload_done = gr.Textbox(
+                        elem_id="chunked-upload-done",
+                        elem_classes="hidden-io",
+                        show_label=False,
+                        container=False,
+                    )
                     load_sample_button = gr.Button(
                         value=txt.GUI_BTN_LOAD_SAMPLE_LBL,
                         elem_classes="load-sample-btn",
@@ -83,6 +107,11 @@ def create_upload_download_controls(
                         elem_classes="toggle-btn",
                         scale=0,
                     )
+                    run_batch_btn = gr.Button(
+                        value=txt.GUI_BTN_RUN_BATCH_LBL,
+                        elem_classes="toggle-btn",
+                        scale=0,
+                    )
 
                 # Column 2: Generate and Download
                 with gr.Column(scale=1, elem_classes="centered-col"):
@@ -110,37 +139,224 @@ def create_upload_download_controls(
                         elem_classes="toggle-btn",
                         scale=0,
                     )
+                    download_all_btn = gr.Button(
+                        value=txt.GUI_BTN_DOWNLOAD_ALL,
+                        elem_classes="toggle-btn",
+                        scale=0,
+                    )
+                    # token of the prepared bundle, fetched by the browser
+                    download_all_token = gr.Textbox(
+                        elem_classes="hidden-io",
+                        show_label=False,
+                        container=False,
+                    )
 
     return {
         "toggle_btn": toggle_btn,
         "output_box": output_box,
         "upload_button": upload_button,
+        "chunked_upload_done": chunked_upload_done,
         "load_sample_button": load_sample_button,
         "toggle_preview_btn": toggle_preview_btn,
         "toggle_headers_btn": toggle_headers_btn,
         "edit_system_prompt_btn": edit_system_prompt_btn,
         "submit_all_btn": submit_all_btn,
+        "run_batch_btn": run_batch_btn,
         "show_generated_output_btn": show_generated_output_btn,
         "download_html_dwnbtn": download_html_dwnbtn,
         "download_pdf_dwnbtn": download_pdf_dwnbtn,
         "download_docx_dwnbtn": download_docx_dwnbtn,
+        "download_all_btn": download_all_btn,
+        "download_all_token": download_all_token,
     }
 
 
-def create_preview_csv_section() -> dict[str, gr.DataFrame | gr.State]:
-    """Create the preview CSV section and its toggle state."""
-    with gr.Row():
+def create_preview_csv_section() -> dict[
+    str,
+    gr.Column
+    | gr.DataFrame
+    | gr.State
+    | gr.Button
+    | gr.Number
+    | gr.Dropdown
+    | gr.Radio
+    | gr.Textbox
+    | gr.Markdown,
+]:
+    """Create the paged preview CSV section, its page controls and toggle state."""
+    with gr.Column(visible=False) as preview_section:
         preview_visible = gr.State(False)
-        preview_output = gr.DataFrame(
-            label=txt.GUI_TXT_CSV_UPLOAD_PREVIEW,
-            elem_classes="preview-frames",
-            show_label=True,
-            interactive=False,
-            visible=False,
-        )
+        with gr.Row():
+            preview_output = gr.DataFrame(
+                label=txt.GUI_TXT_CSV_UPLOAD_PREVIEW,
+                elem_classes="preview-frames",
+                show_label=True,
+                interactive=False,
+            )
+        with gr.Row(elem_classes="preview-pager"):
+            preview_prev_btn = gr.Button(
+                value=txt.GUI_BTN_PREVIEW_PREV_LBL,
+                elem_classes="toggle-btn",
+                scale=0,
+            )
+            preview_page = gr.Number(
+                value=1,
+                label=txt.GUI_TXT_PREVIEW_PAGE_LBL,
+                minimum=1,
+                precision=0,
+                scale=1,
+            )
+            preview_next_btn = gr.Button(
+                value=txt.GUI_BTN_PREVIEW_NEXT_LBL,
+                elem_classes="toggle-btn",
+                scale=0,
+            )
+            preview_sort_col = gr.Dropdown(
+                choices=[(txt.GUI_TXT_PREVIEW_SORT_NONE, -1)],
+                value=-1,
+                label=txt.GUI_TXT_PREVIEW_SORT_LBL,
+                scale=2,
+            )
+            preview_sort_order = gr.Radio(
+                choices=[txt.GUI_TXT_PREVIEW_ORDER_ASC, txt.GUI_TXT_PREVIEW_ORDER_DESC],
+                value=txt.GUI_TXT_PREVIEW_ORDER_ASC,
+                label=txt.GUI_TXT_PREVIEW_ORDER_LBL,
+                scale=2,
+            )
+            preview_filter = gr.Textbox(
+                label=txt.GUI_TXT_PREVIEW_FILTER_LBL,
+                placeholder=txt.GUI_TXT_PREVIEW_FILTER_PLACEHOLDER,
+                scale=3,
+            )
+        preview_page_info = gr.Markdown(elem_classes="preview-page-info")
     return {
+        "preview_section": preview_section,
         "preview_output": preview_output,
         "preview_visible": preview_visible,
+        "preview_prev_btn": preview_prev_btn,
+        "preview_page": preview_page,
+        "preview_next_btn": preview_next_btn,
+        "preview_sort_col": preview_sort_col,
+        "preview_sort_order": preview_sort_order,
+        "preview_filter": preview_filter,
+        "preview_page_info": preview_page_info,
+    }
+
+
+def create_results_grid_section() -> dict[
+    str, gr.DataFrame | gr.Button | gr.Number | gr.Markdown | gr.Dropdown | gr.File
+]:
+    """
+    Create the paginated results grid over all uploaded rows. Only the visible page
+    is sent to the browser, rows are kept server-side.
+    """
+    gr.Markdown(value=f"#### {txt.GUI_TXT_RESULTS_HEAD}")
+    results_grid = gr.DataFrame(
+        value=[],
+        headers=txt.GUI_TXT_RESULTS_HEADERS,
+        col_count=(len(txt.GUI_TXT_RESULTS_HEADERS), "fixed"),
+        row_count=(0, "fixed"),
+        type="array",
+        label=txt.GUI_TXT_RESULTS_GRID_LBL,
+        interactive=True,
+        static_columns=[0, 1, 3, 4, 5],
+        wrap=True,
+        elem_classes="results-grid",
+    )
+    with gr.Row(elem_classes="preview-pager"):
+        results_prev_btn = gr.Button(
+            value=txt.GUI_BTN_PREVIEW_PREV_LBL,
+            elem_classes="toggle-btn",
+            scale=0,
+        )
+        results_page = gr.Number(
+            value=1,
+            label=txt.GUI_TXT_PREVIEW_PAGE_LBL,
+            minimum=1,
+            precision=0,
+            scale=1,
+        )
+        results_next_btn = gr.Button(
+            value=txt.GUI_BTN_PREVIEW_NEXT_LBL,
+            elem_classes="toggle-btn",
+            scale=0,
+        )
+        results_submit_page_btn = gr.Button(
+            value=txt.GUI_BTN_RESULTS_SUBMIT_PAGE_LBL,
+            elem_classes="toggle-btn",
+            scale=0,
+        )
+    results_page_info = gr.Markdown(elem_classes="preview-page-info")
+    with gr.Row():
+        results_export_format = gr.Dropdown(
+            label=txt.GUI_TXT_RESULTS_EXPORT_FORMAT_LBL,
+            choices=get_available_result_formats(),
+            value="csv",
+            scale=1,
+        )
+        results_export_btn = gr.Button(
+            value=txt.GUI_BTN_RESULTS_EXPORT_LBL,
+            elem_classes="toggle-btn",
+            scale=0,
+        )
+    results_export_file = gr.File(
+        label=txt.GUI_TXT_RESULTS_EXPORT_FILE_LBL,
+        interactive=False,
+    )
+    return {
+        "results_grid": results_grid,
+        "results_prev_btn": results_prev_btn,
+        "results_page": results_page,
+        "results_next_btn": results_next_btn,
+        "results_submit_page_btn": results_submit_page_btn,
+        "results_page_info": results_page_info,
+        "results_export_format": results_export_format,
+        "results_export_btn": results_export_btn,
+        "results_export_file": results_export_file,
+    }
+
+
+def create_batch_section() -> dict[
+    str,
+    gr.Column | gr.Markdown | gr.File | gr.Dropdown | gr.Button | gr.State | gr.Timer,
+]:
+    """Create the batch progress section, polled by a timer while jobs run."""
+    with gr.Column(visible=False) as batch_section:
+        gr.Markdown(value=f"#### {txt.GUI_TXT_BATCH_HEAD}")
+        batch_progress = gr.Markdown(elem_classes="batch-progress")
+        batch_output_files = gr.File(
+            label=txt.GUI_TXT_BATCH_OUTPUT_LBL,
+            file_count="multiple",
+            interactive=False,
+        )
+        with gr.Row():
+            batch_export_format = gr.Dropdown(
+                label=txt.GUI_TXT_BATCH_EXPORT_FORMAT_LBL,
+                choices=get_available_result_formats(),
+                value="csv",
+                scale=1,
+            )
+            batch_export_btn = gr.Button(
+                value=txt.GUI_BTN_BATCH_EXPORT_LBL,
+                elem_classes="toggle-btn",
+                scale=0,
+            )
+        batch_export_files = gr.File(
+            label=txt.GUI_TXT_BATCH_EXPORT_FILES_LBL,
+            file_count="multiple",
+            interactive=False,
+        )
+    batch_job_ids = gr.State([])
+    batch_timer = gr.Timer(value=GUI_BATCH_PROGRESS_INTERVAL, active=False)
+    return {
+        "batch_section": batch_section,
+        "batch_progress": batch_progress,
+        "batch_output_files": batch_output_files,
+        "batch_export_format": batch_export_format,
+        "batch_export_btn": batch_export_btn,
+        "batch_export_files": batch_export_files,
+        "batch_job_ids": batch_job_ids,
+        "batch_timer": batch_timer,
     }
 
 
@@ -149,7 +365,6 @@ def create_edit_system_prompt_section() -> dict[str, gr.Textbox | gr.State]:
     with gr.Row():
         edit_system_prompt_visible = gr.State(False)
         edit_system_prompt_output = gr.Textbox(
-            value=generate_full_chat_system_prompt(),
             label=txt.GUI_TXT_EDIT_SYS_PROMPT,
             interactive=True,
             show_copy_button=True,
@@ -162,8 +377,13 @@ def create_edit_system_prompt_section() -> dict[str, gr.Textbox | gr.State]:
     }
 
 
-def create_preview_doc_section() -> tuple[gr.Markdown | gr.HTML, gr.Textbox, gr.State]:
-    """Create the preview Doc section and its toggle state."""
+def create_preview_doc_section() -> tuple[
+    gr.Markdown | gr.HTML, gr.Textbox, gr.State, gr.Textbox, gr.Textbox
+]:
+    """
+    Create the preview Doc section, its toggle state and the hidden boxes carrying
+    document section deltas to the client and editor diffs to the server.
+    """
 
     with gr.Row():
         combined_output_row_visible = gr.State(False)
@@ -179,25 +399,52 @@ def create_preview_doc_section() -> tuple[gr.Markdown | gr.HTML, gr.Textbox, gr.
             interactive=True,
             visible=False,
             show_copy_button=True,
+            elem_id="report-editor",
         )
-    return combined_output_md_box, combined_output_txt_box, combined_output_row_visible
+    report_delta_box = gr.Textbox(
+        elem_id="report-delta",
+        elem_classes="hidden-io",
+        show_label=False,
+        container=False,
+    )
+    report_diff_box = gr.Textbox(
+        elem_id="report-diff",
+        elem_classes="hidden-io",
+        show_label=False,
+        container=False,
+    )
+    return (
+        combined_output_md_box,
+        combined_output_txt_box,
+        combined_output_row_visible,
+        report_delta_box,
+        report_diff_box,
+    )
+
+
+def _get_group_key(group_id: str, title: str, input_val: str) -> str:
+    """Returns the render key of a text group, changing with its content."""
+
+    content_hash = sha256(f"{title}\x1f{input_val}".encode()).hexdigest()
+    return f"{group_id}-{content_hash[:12]}"
 
 
 def create_single_text_group(
     i: int,
     group_id: str,
-    is_collapsed: bool,
     title: str,
     input_val: str,
 ) -> tuple[tuple[gr.Button, str], gr.Button, gr.State, gr.Textbox, gr.Textbox]:
-    """Create a single text group with toggle button, input/output textboxes, and submit button."""
+    """
+    Create a single text group with toggle button, input/output textboxes, and
+    submit button. Components are keyed by group and content, so a re-render
+    only creates groups that were added or changed and keeps typed inputs and
+    responses of the others.
+    """
 
     header_state = gr.State(title)
     input_state = gr.State(input_val)
-
-    toggle_label = (
-        txt.GUI_BTN_TGL_COLLAPSE_LBL if not is_collapsed else txt.GUI_BTN_TGL_EXPAND_LBL
-    )
+    key = _get_group_key(group_id, title, input_val)
 
     with gr.Group(elem_id=group_id, elem_classes="text-group"):
         with gr.Row(elem_classes="collapsible-header"):
@@ -205,24 +452,23 @@ def create_single_text_group(
                 # TODO SoC/SRP formatting ### to css
                 value=f"### {txt.GUI_GRP_CHAT_HEAD} {i}: {header_state.value}",
                 elem_id=f"header-{i}",
+                key=f"{key}-header",
             )
             toggle_btn = gr.Button(
-                value=toggle_label,
+                value=txt.GUI_BTN_TGL_COLLAPSE_LBL,
                 scale=0,
                 elem_id=f"toggle-collapse-btn-{i}",
                 elem_classes="toggle-collapse-btn",
+                key=f"{group_id}-toggle",
             )
-        with gr.Column(
-            elem_classes="collapsible-content"
-            if not is_collapsed
-            else "collapsible-content collapsed"
-        ):
+        with gr.Column(elem_classes="collapsible-content"):
             with gr.Row():
                 text_output: gr.Textbox = gr.Textbox(
                     label=txt.GUI_TXT_BX_OUT_LBL,
                     interactive=False,
                     show_copy_button=True,
                     lines=3,
+                    key=f"{key}-output",
                 )
             with gr.Row():
                 text_input = gr.Textbox(
@@ -230,10 +476,13 @@ def create_single_text_group(
                     scale=6,
                     value=input_state.value,
                     show_copy_button=True,
+                    key=f"{key}-input",
                 )
                 with gr.Column(scale=1, elem_classes="centered-col"):
                     submit_button = gr.Button(
-                        txt.GUI_BTN_SUBMIT_LBL, elem_classes="submit-btn"
+                        txt.GUI_BTN_SUBMIT_LBL,
+                        elem_classes="submit-btn",
+                        key=f"{group_id}-submit",
                     )
 
     return (toggle_btn, group_id), submit_button, header_state, text_input, text_output
@@ -241,7 +490,6 @@ def create_single_text_group(
 
 def render_all_text_groups(
     n_groups: int,
-    collapsed: dict[str, bool],
     titles: list[str],
     input_vals: list[str],
 ) -> tuple[
@@ -260,7 +508,6 @@ def render_all_text_groups(
         create_single_text_group(
             i=i,
             group_id=f"text-group-{i}",
-            is_collapsed=collapsed.get(f"text-group-{i}", False),
             title=get_value_or_default(titles, i - 1, txt.GUI_GRP_DYN_HEAD),
             input_val=get_value_or_default(input_vals, i - 1, ""),
         )
@@ -0,0 +1,452 @@
+"""
+Sparse row-offset index over memory-mapped CSV uploads. Serves preview pages,
+sorted and filtered views on demand instead of loading the whole file, and merges
+several uploaded files into one dataset.
+"""
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from csv import reader
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+
+from src.config import (
+    GUI_PREVIEW_INDEX_STRIDE,
+    GUI_PREVIEW_VIEW_CACHE_SIZE,
+)
+from src.utils.log import logger
+
+_BUILD_SLICE_SIZE = 1024 * 1024
+
+
+class _MmapLineReader:
+    """
+    Line iterator over a memory-mapped file that remembers the byte offset of the
+    next unread line, so record start offsets can be taken between csv.reader calls.
+    Keeps its own position instead of the shared mmap cursor to stay thread-safe.
+    """
+
+    def __init__(self, mm: mmap, start: int = 0):
+        self.mm = mm
+        self.pos = start
+
+    def __iter__(self) -> "_MmapLineReader":
+        return self
+
+    def __next__(self) -> str:
+        if self.pos >= len(self.mm):
+            raise StopIteration
+        end = self.mm.find(b"\n", self.pos)
+        end = len(self.mm) if end == -1 else end + 1
+        line = self.mm[self.pos : end]
+        self.pos = end
+        return line.decode("utf-8")
+
+
+def _ends_in_quoted_field(line: bytes, in_quotes: bool) -> bool:
+    """
+    Returns whether a record is still inside a quoted field after `line`, with
+    csv.reader's rules: a quote opens a quoted field only at the start of a field,
+    `""` inside one is a literal quote, and quotes elsewhere are literal.
+    """
+
+    field_start = not in_quotes
+    pos = 0
+    while pos < len(line):
+        if in_quotes:
+            quote = line.find(b'"', pos)
+            if quote == -1:
+                return True
+            if line[quote + 1 : quote + 2] == b'"':
+                pos = quote + 2
+                continue
+            in_quotes, field_start, pos = False, False, quote + 1
+        elif field_start and line[pos : pos + 1] == b'"':
+            in_quotes, pos = True, pos + 1
+        else:
+            comma = line.find(b",", pos)
+            if comma == -1:
+                return False
+            field_start, pos = True, comma + 1
+    return in_quotes
+
+
+class CsvIndexBuilder:
+    """
+    Incremental CSV scanner that records sparse record offsets, row count, width
+    and prefill rows from bytes fed in arbitrary chunks, e.g. while an upload is
+    still arriving. Record boundaries follow csv.reader's quoting, so records
+    spanning several lines and literal quotes in unquoted fields index as they
+    read back.
+    """
+
+    def __init__(
+        self,
+        has_headers: bool,
+        stride: int = GUI_PREVIEW_INDEX_STRIDE,
+        prefill_limit: int = 0,
+    ):
+        self.has_headers = has_headers
+        self.stride = max(1, stride)
+        self.prefill_limit = prefill_limit
+        self.headers: list[str] = []
+        self.row_count = 0
+        self.max_columns = 0
+        self.checkpoints = array("Q")
+        self.data_start = 0
+        self.prefill_rows: list[list[str]] = []
+        self.bytes_seen = 0
+        self._tail = b""
+        self._record_lines: list[bytes] = []
+        self._record_start = 0
+        self._record_quoted = False
+        self._in_quotes = False
+        self._header_pending = has_headers
+
+    def feed(self, data: bytes):
+        """Consumes all complete lines of `data`, keeping the incomplete tail."""
+
+        data = self._tail + data
+        start = 0
+        while (end := data.find(b"\n", start)) != -1:
+            self._add_line(data[start : end + 1])
+            start = end + 1
+        self._tail = data[start:]
+
+    def finish(self):
+        """Consumes the last line without line break and any unterminated record."""
+
+        if self._tail:
+            self._add_line(self._tail)
+            self._tail = b""
+        if self._record_lines:
+            self._add_record()
+
+    def _add_line(self, line: bytes):
+        if not self._record_lines:
+            self._record_start = self.bytes_seen
+        self._record_lines.append(line)
+        self.bytes_seen += len(line)
+        if self._in_quotes or b'"' in line:
+            self._record_quoted = True
+            self._in_quotes = _ends_in_quoted_field(line, self._in_quotes)
+        if not self._in_quotes:
+            self._add_record()
+
+    def _add_record(self):
+        if not self._record_quoted:
+            # fast path, unquoted single-line record
+            text = self._record_lines[0].decode("utf-8").rstrip("\r\n")
+            row = text.split(",") if text else []
+        else:
+            row = next(reader(line.decode("utf-8") for line in self._record_lines), [])
+        offset = self._record_start
+        self._record_lines = []
+        self._record_quoted = False
+        self._in_quotes = False
+
+        if self._header_pending:
+            self._header_pending = False
+            self.headers = row
+            self.max_columns = len(row)
+            self.data_start = self.bytes_seen
+            return
+
+        if self.row_count % self.stride == 0:
+            self.checkpoints.append(offset)
+        self.max_columns = max(self.max_columns, len(row))
+        if self.row_count < self.prefill_limit:
+            self.prefill_rows.append(row)
+        self.row_count += 1
+
+
+class CsvRowIndex:
+    """
+    Sparse row-offset index over a memory-mapped CSV file.
+
+    Every `stride`-th record start offset is kept, so any row is reached by one
+    seek plus at most `stride` skipped records.
+    """
+
+    def __init__(
+        self,
+        file_path: str | Path,
+        has_headers: bool,
+        stride: int = GUI_PREVIEW_INDEX_STRIDE,
+    ):
+        self.file_path = Path(file_path)
+        self.has_headers = has_headers
+        self.stride = max(1, stride)
+        self.headers: list[str] = []
+        self.row_count = 0
+        self.max_columns = 0
+        self.prefill_rows: list[list[str]] = []
+        self._checkpoints = array("Q")
+        self._data_start = 0
+        self._file = self.file_path.open("rb")
+        try:
+            self._mm: mmap | None = (
+                mmap(self._file.fileno(), 0, access=ACCESS_READ)
+                if self.file_path.stat().st_size > 0
+                else None
+            )
+        except Exception:
+            self._file.close()
+            raise
+
+    @classmethod
+    def from_builder(cls, file_path: str | Path, builder: CsvIndexBuilder):
+        """Opens `file_path` with the state of a finished incremental scan."""
+
+        row_index = cls(file_path, builder.has_headers, builder.stride)
+        row_index._adopt(builder)
+        return row_index
+
+    def _adopt(self, builder: CsvIndexBuilder):
+        self.headers = builder.headers
+        self.row_count = builder.row_count
+        self.max_columns = builder.max_columns
+        self.prefill_rows = builder.prefill_rows
+        self._checkpoints = builder.checkpoints
+        self._data_start = builder.data_start
+        logger.info(
+            f"Indexed {self.row_count} rows of {self.file_path.name} "
+            f"with {len(self._checkpoints)} checkpoints"
+        )
+
+    def build(self, prefill_limit: int = 0) -> list[list[str]]:
+        """
+        Scans the file once, recording sparse record offsets, row count and width.
+        Returns the first `prefill_limit` data rows for prefilling text groups.
+        """
+
+        builder = CsvIndexBuilder(self.has_headers, self.stride, prefill_limit)
+        if self._mm is not None:
+            for start in range(0, len(self._mm), _BUILD_SLICE_SIZE):
+                builder.feed(self._mm[start : start + _BUILD_SLICE_SIZE])
+            builder.finish()
+        self._adopt(builder)
+        return self.prefill_rows
+
+    def close(self):
+        """Releases the memory map and file handle."""
+
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _read_at(self, offset: int) -> list[str]:
+        """Parses the single record starting at byte `offset`."""
+
+        return next(reader(_MmapLineReader(self._mm, offset)), [])  # type: ignore[arg-type]
+
+    def _iter_from(self, row: int) -> Iterator[list[str]]:
+        """Yields records starting at data row `row` using the nearest checkpoint."""
+
+        checkpoint = row // self.stride
+        csvreader = reader(_MmapLineReader(self._mm, self._checkpoints[checkpoint]))  # type: ignore[arg-type]
+        for _ in range(row - checkpoint * self.stride):
+            next(csvreader, None)
+        yield from csvreader
+
+    def _iter_with_offsets(self) -> Iterator[tuple[int, list[str]]]:
+        """Yields (record offset, record) for all data rows."""
+
+        lines = _MmapLineReader(self._mm, self._data_start)  # type: ignore[arg-type]
+        csvreader = reader(lines)
+        record_start = lines.pos
+        for row in csvreader:
+            yield record_start, row
+            record_start = lines.pos
+
+    def iter_rows(self, start: int = 0) -> Iterator[list[str]]:
+        """Yields data rows in file order, starting at row `start`."""
+
+        if self._mm is None or start >= self.row_count:
+            return
+        for row_no, row in enumerate(self._iter_from(start), start):
+            if row_no >= self.row_count:
+                break
+            yield row
+
+    def read_rows(self, start: int, count: int) -> list[list[str]]:
+        """Returns up to `count` data rows in file order, starting at row `start`."""
+
+        if self._mm is None or start >= self.row_count or count <= 0:
+            return []
+        rows = []
+        for row in self._iter_from(start):
+            rows.append(row)
+            if len(rows) >= min(count, self.row_count - start):
+                break
+        return rows
+
+
+class CsvDatasetIndex:
+    """
+    One logical dataset over the row indexes of one or more uploaded files.
+
+    If `origin_label` is given, a file-of-origin column is prepended. Unsorted,
+    unfiltered pages are served straight from the per-file checkpoints. Sorted or
+    filtered views are built once per (column, order, query) as dense
+    (file, record offset) arrays and cached.
+    """
+
+    def __init__(self, parts: list[CsvRowIndex], origin_label: str | None = None):
+        self.parts = parts
+        self.origin_label = origin_label
+        self.has_headers = any(part.has_headers for part in parts)
+        self.name = ", ".join(part.file_path.name for part in parts)
+        self._views: OrderedDict[tuple[int, bool, str], tuple[array, array]] = (
+            OrderedDict()
+        )
+
+    @property
+    def row_count(self) -> int:
+        """Total data rows over all files."""
+
+        return sum(part.row_count for part in self.parts)
+
+    @property
+    def max_columns(self) -> int:
+        """Width of the widest row, including the file-of-origin column."""
+
+        width = max((part.max_columns for part in self.parts), default=0)
+        return width if self.origin_label is None else width + 1
+
+    @property
+    def headers(self) -> list[str]:
+        """First non-empty header per column position over all files."""
+
+        width = max((part.max_columns for part in self.parts), default=0)
+        headers = [
+            next(
+                (h[i] for h in (p.headers for p in self.parts) if i < len(h) and h[i]),
+                "",
+            )
+            for i in range(width)
+        ]
+        return headers if self.origin_label is None else [self.origin_label, *headers]
+
+    def close(self):
+        """Releases all per-file indexes."""
+
+        self._views.clear()
+        for part in self.parts:
+            part.close()
+
+    def _with_origin(self, part: CsvRowIndex, row: list[str]) -> list[str]:
+        """Prepends the file-of-origin column if enabled."""
+
+        return row if self.origin_label is None else [part.file_path.name, *row]
+
+    def _get_view(
+        self, sort_col: int | None, ascending: bool, query: str
+    ) -> tuple[array, array]:
+        """Returns cached (file, record offset) pairs matching `query`, sorted."""
+
+        key = (-1 if sort_col is None else sort_col, ascending, query)
+        if key in self._views:
+            self._views.move_to_end(key)
+            return self._views[key]
+
+        query_folded = query.casefold()
+        matches: list[tuple[tuple[int, float, str] | None, int, int]] = []
+        for part_no, part in enumerate(self.parts):
+            for offset, raw_row in part._iter_with_offsets():
+                row = self._with_origin(part, raw_row)
+                if query_folded and not any(query_folded in c.casefold() for c in row):
+                    continue
+                sort_value = (
+                    None
+                    if sort_col is None
+                    else _sort_key(row[sort_col] if sort_col < len(row) else "")
+                )
+                matches.append((sort_value, part_no, offset))
+        if sort_col is not None:
+            matches.sort(key=lambda m: m[0], reverse=not ascending)  # type: ignore[arg-type, return-value]
+
+        part_nos, offsets = array("H"), array("Q")
+        for _, part_no, offset in matches:
+            part_nos.append(part_no)
+            offsets.append(offset)
+
+        self._views[key] = (part_nos, offsets)
+        if len(self._views) > GUI_PREVIEW_VIEW_CACHE_SIZE:
+            self._views.popitem(last=False)
+        return part_nos, offsets
+
+    def read_page(
+        self,
+        page: int,
+        page_size: int,
+        sort_col: int | None = None,
+        ascending: bool = True,
+        query: str = "",
+    ) -> tuple[list[list[str]], int]:
+        """
+        Returns the rows of the given zero-based page and the total row count of the
+        (optionally sorted and filtered) view.
+        """
+
+        if page < 0 or page_size <= 0:
+            return [], 0
+        start = page * page_size
+
+        if sort_col is None and not query:
+            rows: list[list[str]] = []
+            for part in self.parts:
+                if start >= part.row_count:
+                    start -= part.row_count
+                    continue
+                rows += [
+                    self._with_origin(part, row)
+                    for row in part.read_rows(start, page_size - len(rows))
+                ]
+                start = 0
+                if len(rows) >= page_size:
+                    break
+            return rows, self.row_count
+
+        part_nos, offsets = self._get_view(sort_col, ascending, query)
+        return [
+            self._with_origin(self.parts[part_no], self.parts[part_no]._read_at(offset))
+            for part_no, offset in zip(
+                part_nos[start : start + page_size], offsets[start : start + page_size]
+            )
+        ], len(offsets)
+
+
+def _sort_key(value: str) -> tuple[int, float, str]:
+    """Sorts numbers numerically before text, text case-insensitively."""
+
+    try:
+        return 0, float(value), ""
+    except ValueError:
+        return 1, 0.0, value.casefold()
+
+
+# region session registry
+
+_SESSION_INDEXES: dict[str, CsvDatasetIndex] = {}
+
+
+def set_session_row_index(session_id: str, index: CsvDatasetIndex | None):
+    """Registers the row index for a session, closing any previous one."""
+
+    previous = _SESSION_INDEXES.pop(session_id, None)
+    if previous is not None and previous is not index:
+        previous.close()
+    if index is not None:
+        _SESSION_INDEXES[session_id] = index
+
+
+def get_session_row_index(session_id: str) -> CsvDatasetIndex | None:
+    """Returns the row index registered for a session, if any."""
+
+    return _SESSION_INDEXES.get(session_id)
+
+
+# endregion session registry
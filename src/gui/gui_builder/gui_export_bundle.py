@@ -0,0 +1,184 @@
+"""
+"Download all" export bundles. A click stores a snapshot of the document and
+the text group results under a one-time token. Fetching the token renders all
+formats concurrently on the export pool and streams them as a zip generated on
+the fly: the results CSV first, then each format as soon as it is done. File
+reads and compression run in threads, off the event loop serving the stream.
+Snapshots are files in SYS_EXPORT_BUNDLE_PATH, so any app worker serves them.
+"""
+
+from asyncio import as_completed, to_thread
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from io import BufferedReader, RawIOBase
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from secrets import token_urlsafe
+from time import time
+from typing import IO
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from src.config import (
+    GUI_EXPORT_BUNDLE_FORMATS,
+    GUI_EXPORT_BUNDLE_TTL,
+    SYS_DOWNLOAD_PREFIX,
+    SYS_EXPORT_BUNDLE_PATH,
+)
+from src.gui.gui_builder.gui_export_pool import run_export
+from src.gui.gui_builder.gui_file_utils import (
+    generate_and_save_results,
+    generate_docx_from_html,
+    generate_html_from_md,
+    generate_pdf_from_html,
+)
+from src.utils.log import logger
+
+_EXPORT_FUNCTIONS = {
+    "html": generate_html_from_md,
+    "pdf": generate_pdf_from_html,
+    "docx": generate_docx_from_html,
+}
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ExportBundle:
+    """Snapshot of one session's document and results for a bundle download."""
+
+    session_id: str
+    md_str: str
+    records: list[dict]
+    created_at: float = field(default_factory=time)
+
+    @property
+    def file_name(self) -> str:
+        return f"{SYS_DOWNLOAD_PREFIX}{self.session_id[:6]}.zip"
+
+
+class _ZipStream(RawIOBase):
+    """Write-only, unseekable sink collecting the bytes ZipFile produced so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _get_bundle_path(token: str) -> Path:
+    return Path(SYS_EXPORT_BUNDLE_PATH, f"{token}.json")
+
+
+def _remove_expired_bundles(now: float):
+    for bundle_path in Path(SYS_EXPORT_BUNDLE_PATH).glob("*.json"):
+        try:
+            if now - bundle_path.stat().st_mtime > GUI_EXPORT_BUNDLE_TTL:
+                bundle_path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
+
+
+def create_export_bundle(session_id: str, md_str: str, records: list[dict]) -> str:
+    """Stores a bundle snapshot and returns the token to download it with."""
+
+    token = token_urlsafe(16)
+    bundle_path = _get_bundle_path(token)
+    tmp_path = bundle_path.with_name(f".{bundle_path.name}.tmp")
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    _remove_expired_bundles(time())
+    bundle = ExportBundle(session_id, md_str, records)
+    tmp_path.write_text(dumps(asdict(bundle), ensure_ascii=False), encoding="utf-8")
+    replace(tmp_path, bundle_path)
+    return token
+
+
+def pop_export_bundle(token: str) -> ExportBundle | None:
+    """Returns and forgets the bundle of `token`, or None if unknown or expired."""
+
+    if not token.replace("-", "").replace("_", "").isalnum():
+        return None
+    bundle_path = _get_bundle_path(token)
+    # renaming claims the token, so only one worker serves it
+    claimed_path = bundle_path.with_name(f".{bundle_path.name}.{token_urlsafe(4)}")
+    try:
+        bundle_path.rename(claimed_path)
+    except FileNotFoundError:
+        return None
+    try:
+        bundle = ExportBundle(**loads(claimed_path.read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Could not read export bundle: {e}")
+        return None
+    finally:
+        claimed_path.unlink(missing_ok=True)
+    if time() - bundle.created_at > GUI_EXPORT_BUNDLE_TTL:
+        return None
+    return bundle
+
+
+def _compress_chunk(src: BufferedReader, dest: IO[bytes]) -> bool:
+    """Compresses the next chunk of `src` into `dest`, returns False at its end."""
+
+    chunk = src.read(_READ_CHUNK_SIZE)
+    if chunk:
+        dest.write(chunk)
+    return bool(chunk)
+
+
+async def _render_format(bundle: ExportBundle, file_ext: str) -> tuple[str, Path | str]:
+    """Renders one format on the export pool. Returns the path or an error message."""
+
+    try:
+        result = await run_export(
+            file_ext, _EXPORT_FUNCTIONS[file_ext], bundle.session_id, bundle.md_str
+        )
+    except Exception as e:
+        msg = f"Error while generating {file_ext.upper()} for bundle: {e}"
+        logger.exception(msg)
+        return file_ext, msg
+    return file_ext, result
+
+
+async def iter_export_bundle_zip(bundle: ExportBundle) -> AsyncIterator[bytes]:
+    """
+    Yields the zip of all GUI_EXPORT_BUNDLE_FORMATS plus the results CSV. Formats
+    render concurrently and are added in the order they finish; failed formats
+    are listed in errors.txt.
+    """
+
+    stream = _ZipStream()
+    errors = []
+    renders = [_render_format(bundle, ext) for ext in GUI_EXPORT_BUNDLE_FORMATS]
+    with ZipFile(stream, mode="w", compression=ZIP_DEFLATED) as zip_file:
+        results_path = await to_thread(
+            generate_and_save_results, bundle.session_id, bundle.records
+        )
+        if isinstance(results_path, str):
+            errors.append(f"csv: {results_path}")
+        else:
+            await to_thread(zip_file.write, results_path, results_path.name)
+            yield stream.drain()
+
+        for render in as_completed(renders):
+            file_ext, result = await render
+            if isinstance(result, str):
+                errors.append(f"{file_ext}: {result}")
+                continue
+            src = await to_thread(open, result, "rb")
+            with src, zip_file.open(result.name, "w") as dest:
+                while await to_thread(_compress_chunk, src, dest):
+                    yield stream.drain()
+
+        if errors:
+            zip_file.writestr("errors.txt", "\n".join(errors) + "\n")
+    yield stream.drain()
@@ -0,0 +1,165 @@
+"""
+Content-addressed cache for exported documents. Entries are keyed by the hash of
+the Markdown, the templates that shape the output and the target format, so the
+same document is only rendered once per format and repeat downloads are served
+by linking the cached file into the session's download folder.
+"""
+
+from functools import lru_cache
+from hashlib import sha256
+from os import link, replace
+from pathlib import Path
+from shutil import copyfile
+from threading import Lock
+from time import time
+
+from src.config import (
+    SYS_EXPORT_CACHE_MAX_BYTES,
+    SYS_EXPORT_CACHE_PATH,
+    SYS_EXPORT_CACHE_TTL,
+    SYS_TEMPLATE_CSS,
+    SYS_TEMPLATE_DOCX,
+    SYS_TEMPLATE_HTML,
+)
+from src.utils.log import logger
+
+# templates that shape each export format, derived formats include their source's
+_FORMAT_TEMPLATES = {
+    "html": (SYS_TEMPLATE_HTML, SYS_TEMPLATE_CSS),
+    "pdf": (SYS_TEMPLATE_HTML, SYS_TEMPLATE_CSS),
+    "docx": (SYS_TEMPLATE_HTML, SYS_TEMPLATE_CSS, SYS_TEMPLATE_DOCX),
+}
+
+_cache_lock = Lock()
+_output_locks: dict[str, Lock] = {}
+
+
+@lru_cache(maxsize=32)
+def _hash_file_version(file_path: str, mtime: float) -> str:
+    return sha256(Path(file_path).read_bytes()).hexdigest()
+
+
+def _hash_file(file_path: str) -> str:
+    """Returns the content hash of a file, recomputed only if its mtime changed."""
+
+    try:
+        mtime = Path(file_path).stat().st_mtime
+    except FileNotFoundError:
+        return ""
+    return _hash_file_version(file_path, mtime)
+
+
+def get_export_cache_key(md_str: str, file_ext: str, variant: str = "") -> str:
+    """
+    Returns the cache key of `md_str` exported as `file_ext`. `variant` tells apart
+    outputs of different converters for the same format, e.g. the PDF engine.
+    """
+
+    digest = sha256(md_str.encode("utf-8"))
+    for template in _FORMAT_TEMPLATES.get(file_ext, ()):
+        digest.update(_hash_file(template).encode())
+    digest.update(f"{file_ext}:{variant}".encode())
+    return digest.hexdigest()
+
+
+def get_output_lock(dest_path: Path) -> Lock:
+    """
+    Returns the lock guarding one session export file, so a background prerender
+    and a download click never render into the same file at once.
+    """
+
+    with _cache_lock:
+        return _output_locks.setdefault(str(dest_path), Lock())
+
+
+def drop_session_output_locks(session_id: str):
+    """Forgets the export file locks of an ended session."""
+
+    with _cache_lock:
+        for output_path in [p for p in _output_locks if session_id in Path(p).parts]:
+            del _output_locks[output_path]
+
+
+def _get_cache_path(key: str, file_ext: str) -> Path:
+    return Path(SYS_EXPORT_CACHE_PATH, f"{key}.{file_ext}")
+
+
+def _link_or_copy(src: Path, dest: Path):
+    """Atomically places `src` at `dest`, as hard link where the filesystem allows."""
+
+    tmp_path = dest.with_name(f".{dest.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        link(src, tmp_path)
+    except OSError:
+        copyfile(src, tmp_path)
+    replace(tmp_path, dest)
+
+
+def get_cached_export(key: str, file_ext: str, dest_path: Path) -> Path | None:
+    """
+    Places the cached export for `key` at `dest_path` and returns it, or returns
+    None on a cache miss or expired entry.
+    """
+
+    cache_path = _get_cache_path(key, file_ext)
+    try:
+        stat = cache_path.stat()
+    except FileNotFoundError:
+        return None
+    if time() - stat.st_mtime > SYS_EXPORT_CACHE_TTL:
+        cache_path.unlink(missing_ok=True)
+        return None
+
+    try:
+        _link_or_copy(cache_path, dest_path)
+    except OSError as e:
+        logger.warning(f"Could not serve cached export {cache_path.name}: {e}")
+        return None
+    logger.info(f"Serving {dest_path.name} from export cache")
+    return dest_path
+
+
+def store_export(key: str, file_ext: str, produced_path: Path):
+    """Adds a freshly produced export to the cache and evicts old entries."""
+
+    cache_path = _get_cache_path(key, file_ext)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(produced_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not cache export {produced_path.name}: {e}")
+        return
+    evict_export_cache()
+
+
+def evict_export_cache(
+    max_bytes: int = SYS_EXPORT_CACHE_MAX_BYTES, ttl: float = SYS_EXPORT_CACHE_TTL
+):
+    """Removes expired entries, then the oldest ones until the cache fits `max_bytes`."""
+
+    cache_dir = Path(SYS_EXPORT_CACHE_PATH)
+    if not cache_dir.exists():
+        return
+
+    with _cache_lock:
+        now = time()
+        entries = []
+        for entry in cache_dir.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > ttl:
+                entry.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total_bytes -= size
@@ -0,0 +1,212 @@
+"""
+Chunked export of very large documents. The Markdown is split at its text group
+sections into chunks of GUI_EXPORT_CHUNK_SECTIONS, which render in parallel:
+HTML bodies in worker processes and streamed into the template, PDF and DOCX
+per chunk and merged afterwards. Peak memory and wall time then scale with chunk size and
+core count instead of document size.
+"""
+
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from importlib.util import find_spec
+from itertools import pairwise
+from multiprocessing import get_context
+from pathlib import Path
+from re import MULTILINE, compile as re_compile
+from shutil import which
+from subprocess import CalledProcessError, run
+from tempfile import TemporaryDirectory
+
+from src.config import GUI_EXPORT_CHUNK_SECTIONS, GUI_EXPORT_CHUNK_WORKERS
+from src.gui.gui_builder.gui_export_template import HtmlExportTemplate
+from src.gui.gui_builder.gui_md_render import can_render_in_process, render_md_body
+from src.utils.log import logger
+
+_SECTION_START = re_compile(r"^## ", MULTILINE)
+# heading ids are numbered across chunks by the parent, see _number_heading_ids
+_ID_MARKER = "\x1f"
+_MARKED_ID = re_compile(rf'id="([^"{_ID_MARKER}]*){_ID_MARKER}\d+"')
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Returns the worker processes for Markdown rendering, spawned on first use."""
+
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=GUI_EXPORT_CHUNK_WORKERS, mp_context=get_context("spawn")
+        )
+    return _process_pool
+
+
+def split_md_chunks(md_str: str, sections_per_chunk: int | None = None) -> list[str]:
+    """
+    Splits `md_str` before level-two headings into chunks of at most
+    `sections_per_chunk` sections, GUI_EXPORT_CHUNK_SECTIONS by default. Text
+    before the first section, e.g. the title, stays in the first chunk.
+    """
+
+    sections_per_chunk = sections_per_chunk or GUI_EXPORT_CHUNK_SECTIONS
+    starts = [match.start() for match in _SECTION_START.finditer(md_str)]
+    cut_points = starts[sections_per_chunk::sections_per_chunk]
+    bounds = [0, *cut_points, len(md_str)]
+    return [md_str[start:end] for start, end in pairwise(bounds)]
+
+
+def is_chunked_export(md_str: str) -> bool:
+    """Returns True if `md_str` has more sections than fit into one chunk."""
+
+    return len(_SECTION_START.findall(md_str)) > GUI_EXPORT_CHUNK_SECTIONS
+
+
+def _render_chunk_body(md_chunk: str) -> str:
+    """Renders one chunk to an HTML body fragment. Runs in a worker process."""
+
+    if can_render_in_process(md_chunk):
+        return render_md_body(md_chunk, id_marker=_ID_MARKER)
+    try:
+        result = run(
+            ["pandoc", "-f", "markdown", "-t", "html5"],
+            input=md_chunk.encode("utf-8"),
+            capture_output=True,
+            check=True,
+        )
+    except CalledProcessError as e:
+        msg = f"Pandoc failed on chunk with code {e.returncode}: {e.stderr}"
+        raise RuntimeError(msg) from e
+    return result.stdout.decode("utf-8")
+
+
+def _number_heading_ids(body: str, seen: dict[str, int]) -> str:
+    """Numbers marked heading ids like pandoc would for the whole document."""
+
+    def replace(match) -> str:
+        identifier = match.group(1)
+        count = seen.get(identifier, 0)
+        seen[identifier] = count + 1
+        return f'id="{identifier}"' if count == 0 else f'id="{identifier}-{count}"'
+
+    return _MARKED_ID.sub(replace, body)
+
+
+def iter_chunk_bodies(md_chunks: list[str]) -> Iterator[str]:
+    """Yields the HTML bodies of `md_chunks` in order, rendered in parallel."""
+
+    seen: dict[str, int] = {}
+    bodies = _get_process_pool().map(_render_chunk_body, md_chunks)
+    for i, body in enumerate(bodies):
+        # fragments end without newline, like the single-pass body between blocks
+        yield ("\n" if i else "") + _number_heading_ids(body, seen)
+
+
+def write_html_chunked(
+    output_path: Path, template: HtmlExportTemplate, title: str, md_str: str
+):
+    """Renders `md_str` chunk by chunk, streaming the bodies into `template`."""
+
+    md_chunks = split_md_chunks(md_str)
+    logger.info(f"Rendering {output_path.name} in {len(md_chunks)} chunks")
+    with output_path.open("w", encoding="utf-8") as file:
+        template.write(file, title, iter_chunk_bodies(md_chunks))
+
+
+def _merge_pdfs(pdf_paths: list[Path], output_path: Path):
+    """
+    Concatenates `pdf_paths` with pypdf, qpdf or pdfunite, whichever is
+    available. Raises RuntimeError if none is.
+    """
+
+    if find_spec("pypdf") is not None:
+        from pypdf import PdfWriter  # optional dependency, imported on demand
+
+        writer = PdfWriter()
+        for pdf_path in pdf_paths:
+            writer.append(str(pdf_path))
+        with output_path.open("wb") as file:
+            writer.write(file)
+        return
+
+    if which("qpdf"):
+        args = [
+            "qpdf",
+            "--empty",
+            "--pages",
+            *map(str, pdf_paths),
+            "--",
+            str(output_path),
+        ]
+    elif which("pdfunite"):
+        args = ["pdfunite", *map(str, pdf_paths), str(output_path)]
+    else:
+        msg = "Merging PDF chunks needs pypdf, qpdf or pdfunite"
+        logger.error(msg)
+        raise RuntimeError(msg)
+    try:
+        run(args, capture_output=True, check=True)
+    except CalledProcessError as e:
+        msg = f"{args[0]} failed with code {e.returncode}: {e.stderr}"
+        logger.error(msg)
+        raise RuntimeError(msg) from e
+
+
+def _merge_docx(docx_paths: list[Path], output_path: Path):
+    """Concatenates `docx_paths` with docxcompose. Raises RuntimeError if missing."""
+
+    if find_spec("docxcompose") is None:
+        msg = "Merging DOCX chunks needs docxcompose"
+        logger.error(msg)
+        raise RuntimeError(msg)
+    from docx import Document  # optional dependencies, imported on demand
+    from docxcompose.composer import Composer
+
+    composer = Composer(Document(str(docx_paths[0])))
+    for docx_path in docx_paths[1:]:
+        composer.append(Document(str(docx_path)))
+    composer.save(str(output_path))
+
+
+_MERGE_FUNCTIONS = {"pdf": _merge_pdfs, "docx": _merge_docx}
+
+
+def can_merge_chunks(file_ext: str) -> bool:
+    """Returns True if `file_ext` chunks can be merged in this environment."""
+
+    if file_ext == "pdf":
+        return find_spec("pypdf") is not None or bool(
+            which("qpdf") or which("pdfunite")
+        )
+    return file_ext == "docx" and find_spec("docxcompose") is not None
+
+
+def render_chunked(
+    target_path: Path,
+    template: HtmlExportTemplate,
+    title: str,
+    md_str: str,
+    convert: Callable[[Path, Path], None],
+):
+    """
+    Renders each chunk of `md_str` to HTML and converts it to the format of
+    `target_path` with `convert`, in parallel, then merges the chunks into
+    `target_path`. Raises RuntimeError if a chunk fails or cannot be merged.
+    """
+
+    file_ext = target_path.suffix.lstrip(".")
+    md_chunks = split_md_chunks(md_str)
+    logger.info(f"Rendering {target_path.name} in {len(md_chunks)} chunks")
+    with (
+        TemporaryDirectory(dir=target_path.parent) as tmp_dir,
+        ThreadPoolExecutor(max_workers=GUI_EXPORT_CHUNK_WORKERS) as pool,
+    ):
+        futures = []
+        chunk_paths = []
+        for i, body in enumerate(iter_chunk_bodies(md_chunks)):
+            html_path = Path(tmp_dir, f"chunk_{i:05d}.html")
+            html_path.write_text(template.render(title, body), encoding="utf-8")
+            chunk_paths.append(html_path.with_suffix(target_path.suffix))
+            futures.append(pool.submit(convert, html_path, chunk_paths[-1]))
+        for future in futures:
+            future.result()  # re-raises the first failed chunk
+        _MERGE_FUNCTIONS[file_ext](chunk_paths, target_path)
@@ -0,0 +1,131 @@
+"""
+Dedicated executor for document exports. Pandoc and LaTeX runs wait on their
+own small thread pool instead of Gradio's worker threads, so slow PDF exports
+cannot starve chat requests. Queue depth and per-format durations are tracked
+for the stats route.
+"""
+
+from asyncio import wrap_future
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
+from src.config import GUI_EXPORT_MAX_QUEUED, GUI_EXPORT_MAX_WORKERS
+from src.utils.log import logger
+
+
+class ExportQueueFullError(RuntimeError):
+    """Raised if more exports are waiting than GUI_EXPORT_MAX_QUEUED allows."""
+
+
+_executor: ThreadPoolExecutor | None = None
+_stats_lock = Lock()
+_queued = 0
+_running = 0
+_durations: dict[str, dict[str, float]] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=GUI_EXPORT_MAX_WORKERS, thread_name_prefix="export"
+        )
+    return _executor
+
+
+def _record_duration(file_ext: str, duration_ms: float, failed: bool):
+    """Adds one export run to the per-format statistics."""
+
+    stats = _durations.setdefault(
+        file_ext,
+        {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0},
+    )
+    stats["count"] += 1
+    stats["failures"] += int(failed)
+    stats["total_ms"] += duration_ms
+    stats["max_ms"] = max(stats["max_ms"], duration_ms)
+    stats["last_ms"] = duration_ms
+
+
+def _run_timed(file_ext: str, fn: Callable[..., Any], *args) -> Any:
+    """Runs `fn` on an export thread and records queue and duration statistics."""
+
+    global _queued, _running
+    with _stats_lock:
+        _queued -= 1
+        _running += 1
+    start = perf_counter()
+    failed = True
+    try:
+        result = fn(*args)
+        failed = isinstance(result, str)
+        return result
+    finally:
+        duration_ms = (perf_counter() - start) * 1000
+        with _stats_lock:
+            _running -= 1
+            _record_duration(file_ext, duration_ms, failed)
+        logger.info(f"Export {file_ext} took {duration_ms:.0f} ms")
+
+
+def submit_export(file_ext: str, fn: Callable[..., Any], *args) -> Future:
+    """
+    Submits the export function `fn(*args)` to the export pool and returns its
+    future. Raises ExportQueueFullError if the queue is full.
+    """
+
+    global _queued
+    with _stats_lock:
+        if _queued >= GUI_EXPORT_MAX_QUEUED:
+            msg = f"Export queue full ({_queued} waiting), please retry shortly"
+            logger.warning(msg)
+            raise ExportQueueFullError(msg)
+        _queued += 1
+    try:
+        return _get_executor().submit(_run_timed, file_ext, fn, *args)
+    except Exception:
+        with _stats_lock:
+            _queued -= 1
+        raise
+
+
+async def run_export(file_ext: str, fn: Callable[..., Any], *args) -> Any:
+    """
+    Runs the export function `fn(*args)` on the export pool and awaits its result
+    without holding a Gradio worker thread. Raises ExportQueueFullError if the
+    queue is full.
+    """
+
+    return await wrap_future(submit_export(file_ext, fn, *args))
+
+
+def is_export_queue_idle() -> bool:
+    """Returns True if no export is waiting for a free worker."""
+
+    with _stats_lock:
+        return _queued == 0
+
+
+def get_export_stats() -> dict:
+    """Returns queued and running exports and duration statistics per format."""
+
+    with _stats_lock:
+        formats = {
+            file_ext: {
+                "count": int(stats["count"]),
+                "failures": int(stats["failures"]),
+                "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "last_ms": round(stats["last_ms"], 1),
+            }
+            for file_ext, stats in _durations.items()
+        }
+        return {
+            "workers": GUI_EXPORT_MAX_WORKERS,
+            "queued": _queued,
+            "running": _running,
+            "formats": formats,
+        }
@@ -0,0 +1,105 @@
+"""
+Speculative background rendering of downloads. Once the combined Markdown has
+settled for a debounce interval, all export formats are rendered on the export
+pool into the export cache, so a later download click is usually a cache hit.
+Newer Markdown for the same session supersedes pending and running prerenders.
+"""
+
+from collections.abc import Callable
+from itertools import count
+from threading import Lock, Timer
+
+from src.config import GUI_EXPORT_PRERENDER_DEBOUNCE, GUI_EXPORT_PRERENDER_FORMATS
+from src.gui.gui_builder.gui_export_pool import (
+    ExportQueueFullError,
+    is_export_queue_idle,
+    submit_export,
+)
+from src.gui.gui_builder.gui_file_utils import (
+    generate_docx_from_html,
+    generate_html_from_md,
+    generate_pdf_from_html,
+)
+from src.utils.log import logger
+
+_EXPORT_FUNCTIONS: dict[str, Callable] = {
+    "html": generate_html_from_md,
+    "pdf": generate_pdf_from_html,
+    "docx": generate_docx_from_html,
+}
+
+# generations are unique over all sessions, so a forgotten session's prerender
+# never matches a later one
+_generation_counter = count(1)
+_generations: dict[str, int] = {}
+_timers: dict[str, Timer] = {}
+_lock = Lock()
+
+
+def _is_current(session_id: str, generation: int) -> bool:
+    with _lock:
+        return _generations.get(session_id) == generation
+
+
+def _prerender(session_id: str, md_str: str, generation: int):
+    """Renders all prerender formats in order, stopping once superseded."""
+
+    for file_ext in GUI_EXPORT_PRERENDER_FORMATS:
+        if not _is_current(session_id, generation):
+            logger.debug(f"[{session_id[:6]}] Prerender superseded")
+            return
+        try:
+            _EXPORT_FUNCTIONS[file_ext](session_id, md_str)
+        except Exception as e:
+            # downloads report their own errors, a failed prerender is only a miss
+            logger.warning(f"[{session_id[:6]}] Prerender {file_ext} failed: {e}")
+
+
+def _start_prerender(session_id: str, md_str: str, generation: int):
+    """Queues the prerender if still current and no user export is waiting."""
+
+    with _lock:
+        _timers.pop(session_id, None)
+    if not _is_current(session_id, generation):
+        return
+    if not is_export_queue_idle():
+        logger.info(f"[{session_id[:6]}] Export queue busy, skipping prerender")
+        return
+    try:
+        submit_export("prerender", _prerender, session_id, md_str, generation)
+    except ExportQueueFullError:
+        pass
+
+
+def schedule_prerender(session_id: str, md_str: str):
+    """
+    (Re)starts the debounce timer for prerendering `md_str`. Any earlier pending
+    or running prerender of the session is superseded.
+    """
+
+    if not session_id or not md_str or not GUI_EXPORT_PRERENDER_FORMATS:
+        return
+    with _lock:
+        generation = next(_generation_counter)
+        _generations[session_id] = generation
+        previous = _timers.pop(session_id, None)
+        if previous is not None:
+            previous.cancel()
+        timer = Timer(
+            GUI_EXPORT_PRERENDER_DEBOUNCE,
+            _start_prerender,
+            args=(session_id, md_str, generation),
+        )
+        timer.daemon = True
+        _timers[session_id] = timer
+    timer.start()
+
+
+def cancel_prerender(session_id: str):
+    """Supersedes any pending or running prerender of a session and forgets it."""
+
+    with _lock:
+        _generations.pop(session_id, None)
+        timer = _timers.pop(session_id, None)
+    if timer is not None:
+        timer.cancel()
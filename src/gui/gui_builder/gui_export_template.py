@@ -0,0 +1,128 @@
+"""
+Precompiled HTML export template. The template and its CSS are read once and
+the CSS is inlined into the template, so exports neither re-read the files nor
+pass the stylesheet to pandoc on the command line. The compiled template is
+rebuilt when either file's mtime changes.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from hashlib import sha256
+from html import escape
+from os import replace
+from pathlib import Path
+from re import compile as re_compile
+from threading import Lock
+from typing import TextIO
+
+from src.config import SYS_TEMPLATE_BUILD_PATH, SYS_TEMPLATE_CSS, SYS_TEMPLATE_HTML
+from src.utils.log import logger
+
+_TEMPLATE_VAR = re_compile(r"\$(\w+)\$")
+_CSS_VAR = "css_inlined_standalone"
+
+
+@dataclass(frozen=True)
+class HtmlExportTemplate:
+    """
+    An HTML template with the CSS inlined. `parts` alternates literal text and
+    variable names, `pandoc_template` is the same template as file for pandoc.
+    """
+
+    parts: tuple[str, ...]
+    pandoc_template: Path
+    mtimes: tuple[float, float]
+
+    def render(self, title: str, body: str) -> str:
+        """
+        Substitutes title and body. Unknown variables are left empty, like
+        pandoc does for unset metadata.
+        """
+
+        values = {"title": escape(title), "body": body}
+        return "".join(
+            part if i % 2 == 0 else values.get(part, "")
+            for i, part in enumerate(self.parts)
+        )
+
+    def write(self, file: TextIO, title: str, bodies: Iterable[str]):
+        """Writes the document to `file`, streaming the body from `bodies`."""
+
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                file.write(part)
+            elif part == "body":
+                file.writelines(bodies)
+            elif part == "title":
+                file.write(escape(title))
+
+
+_compiled: HtmlExportTemplate | None = None
+_compile_lock = Lock()
+
+
+def compile_template_parts(template: str, css: str) -> tuple[str, ...]:
+    """Splits `template` into literals and variable names, inlining `css`."""
+
+    parts = _TEMPLATE_VAR.split(template)
+    merged = [parts[0]]
+    for i in range(1, len(parts), 2):
+        if parts[i] == _CSS_VAR:
+            merged[-1] += css + parts[i + 1]
+        else:
+            merged.extend((parts[i], parts[i + 1]))
+    return tuple(merged)
+
+
+def _write_pandoc_template(template: str, css: str) -> Path:
+    """Writes the template with `css` inlined for pandoc, `$` escaped as `$$`."""
+
+    pandoc_template = template.replace(f"${_CSS_VAR}$", css.replace("$", "$$"))
+    digest = sha256(pandoc_template.encode("utf-8")).hexdigest()[:16]
+    template_path = Path(SYS_TEMPLATE_BUILD_PATH, f"template_{digest}.html.tpl")
+    if not template_path.exists():
+        template_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = template_path.with_name(f".{template_path.name}.tmp")
+        tmp_path.write_text(pandoc_template, encoding="utf-8")
+        replace(tmp_path, template_path)
+    return template_path
+
+
+def _get_mtimes() -> tuple[float, float]:
+    """Returns the mtimes of template and CSS. Raises FileNotFoundError if missing."""
+
+    try:
+        return (
+            Path(SYS_TEMPLATE_HTML).stat().st_mtime,
+            Path(SYS_TEMPLATE_CSS).stat().st_mtime,
+        )
+    except FileNotFoundError as e:
+        msg = f"Required file missing: {e.filename}"
+        logger.error(msg)
+        raise FileNotFoundError(msg) from e
+
+
+def get_html_export_template() -> HtmlExportTemplate:
+    """
+    Returns the compiled export template, compiling it on first use or after the
+    template or CSS changed. Raises FileNotFoundError if either file is missing.
+    """
+
+    global _compiled
+    mtimes = _get_mtimes()
+    compiled = _compiled
+    if compiled is not None and compiled.mtimes == mtimes:
+        return compiled
+
+    with _compile_lock:
+        if _compiled is not None and _compiled.mtimes == mtimes:
+            return _compiled
+        template = Path(SYS_TEMPLATE_HTML).read_text(encoding="utf-8")
+        css = Path(SYS_TEMPLATE_CSS).read_text(encoding="utf-8")
+        _compiled = HtmlExportTemplate(
+            parts=compile_template_parts(template, css),
+            pandoc_template=_write_pandoc_template(template, css),
+            mtimes=mtimes,
+        )
+        logger.info(f"Compiled HTML export template {_compiled.pandoc_template.name}")
+        return _compiled
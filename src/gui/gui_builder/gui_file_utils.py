@@ -1,10 +1,12 @@
 """
 Utility functions for file handling, including file validation,
-sanitization, upload, and CSV generation.
+sanitization, upload, and results and document exports.
 """
 
+from collections.abc import Callable, Container, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import run, PIPE, CalledProcessError
-from csv import Error, writer, Sniffer
+from csv import Error, Sniffer
 from html import escape
 from os.path import getsize
 from pathlib import Path
@@ -12,16 +14,41 @@ from pathvalidate import sanitize_filename
 import gradio as gr
 
 
+from src.batch.results_export import write_results
 from src.config import (
     GUI_MAX_FILE_SIZE_UPLOAD,
     GUI_UPLOAD_FILE_EXT,
+    GUI_UPLOAD_MAX_WORKERS,
     SYS_UPLOAD_PATH,
     SYS_DOWNLOAD_PATH,
     SYS_DOWNLOAD_PREFIX,
-    SYS_TEMPLATE_HTML,
-    SYS_TEMPLATE_CSS,
     SYS_TEMPLATE_DOCX,
 )
+from src.gui.gui_builder.gui_export_cache import (
+    get_cached_export,
+    get_export_cache_key,
+    get_output_lock,
+    store_export,
+)
+from src.gui.gui_builder.gui_export_chunks import (
+    can_merge_chunks,
+    is_chunked_export,
+    render_chunked,
+    write_html_chunked,
+)
+from src.gui.gui_builder.gui_export_template import (
+    HtmlExportTemplate,
+    get_html_export_template,
+)
+from src.gui.gui_builder.gui_md_render import (
+    can_render_in_process,
+    render_html_document,
+)
+from src.gui.gui_builder.gui_pdf_engines import (
+    detect_pdf_engine,
+    get_tool_version,
+    render_pdf,
+)
 from src.gui.i18n.gui_text_en import HTML_DEFAULT_TITLE
 from src.utils.log import logger
 
@@ -29,6 +56,18 @@ from src.utils.log import logger
 def load_css_file(file_path: str | Path) -> str:
     """Load CSS content from the given file path."""
 
+    return _load_text_file(file_path)
+
+
+def load_js_file(file_path: str | Path) -> str:
+    """Load JavaScript content from the given file path."""
+
+    return _load_text_file(file_path)
+
+
+def _load_text_file(file_path: str | Path) -> str:
+    """Load UTF-8 text content from the given file path."""
+
     if not isinstance(file_path, (str, Path)):
         msg = f"Must be str or pathlib.Path object: '{file_path}'"
         logger.error(msg)
@@ -146,21 +185,62 @@ def create_path(path: str | Path):
             logger.exception(f"Unexpected error while creating directory {path}: {e}")
 
 
+def _store_single_file(file_path: Path, dest_path: Path, session_id: str) -> str | None:
+    """Validate a single file and copy it to `dest_path`. Returns the saved path."""
+
+    file_name = file_path.name
+    if not is_valid_file(file_path):
+        logger.warning(f"Invalid file detected: {file_name}")
+        return None
+
+    try:
+        with file_path.open("rb") as src, dest_path.open("wb") as dst:
+            buffer_size = 8192  # 8 KB buffer
+            while chunk := src.read(buffer_size):
+                dst.write(chunk)
+        logger.info(f"Successfully saved file {file_name} to {session_id}")
+        return str(dest_path)
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_name}")
+    except PermissionError:
+        logger.error(f"Permission denied while accessing or writing to: {file_name}")
+    except Exception as e:
+        logger.exception(f"Unexpected error while saving file {file_name}: {e}")
+    return None
+
+
+def _get_unique_name(name: str, taken: Container[str]) -> str:
+    """Returns `name`, or `name` with the first free `_1`, `_2`, ... suffix."""
+
+    if name not in taken:
+        return name
+    stem, suffix = Path(name).stem, Path(name).suffix
+    n = 1
+    while f"{stem}_{n}{suffix}" in taken:
+        n += 1
+    return f"{stem}_{n}{suffix}"
+
+
 def upload_files(files: list[str] | str, session_id: str) -> list[str] | str | None:
-    """Upload files to a session-specific folder, validate them first, then sanitize and save."""
+    """
+    Upload files to a session-specific folder. Files are validated and saved in
+    parallel, then returned in upload order. Names taken by an earlier file of the
+    upload get a numeric suffix.
+    """
 
     if files is None:
         return None
     if isinstance(files, str):
         files = [files]
 
-    saved_paths = []
     upload_path = get_path_session_id(session_id)
     if isinstance(upload_path, str):
         logger.error(upload_path)
         return upload_path
     create_path(upload_path)
 
+    # sanitize names first, so two uploads never write the same destination
+    jobs: dict[str, Path] = {}
     for file in files:
         try:
             file_path = convert_file_path(file)
@@ -172,10 +252,6 @@ def upload_files(files: list[str] | str, session_id: str) -> list[str] | str | N
             continue
         file_name = Path(file_path).name
 
-        # validate and sanitize file name and path
-        if not is_valid_file(file_path):
-            logger.warning(f"Invalid file detected: {file_name}")
-            continue
         try:
             sanitized_name = sanitize_filename(file_name)
         except ValueError as e:
@@ -183,73 +259,59 @@ def upload_files(files: list[str] | str, session_id: str) -> list[str] | str | N
                 f"Security issue while sanitizing file name {file_name}: {e}"
             )
             continue
-
-        dest_path = upload_path / sanitized_name
-
-        # save file
-        try:
-            with file_path.open("rb") as src, dest_path.open("wb") as dst:
-                buffer_size = 8192  # 8 KB buffer
-                while chunk := src.read(buffer_size):
-                    dst.write(chunk)
-            saved_paths.append(str(dest_path))
-            logger.info(f"Successfully saved file {file_name} to {session_id}")
-
-        except FileNotFoundError:
-            logger.error(f"File not found: {file_name}")
-        except PermissionError:
-            logger.error(
-                f"Permission denied while accessing or writing to: {file_name}"
+        unique_name = _get_unique_name(sanitized_name, jobs)
+        if unique_name != sanitized_name:
+            logger.info(
+                f"Duplicate file name {sanitized_name}, saving as {unique_name}"
             )
-        except Exception as e:
-            logger.exception(f"Unexpected error while saving file {file_name}: {e}")
-
-    return saved_paths
-
+        jobs[unique_name] = file_path
 
-def generate_and_save_csv(
-    session_id: str, data: list[list[str]], file_name: str = "output.csv"
-) -> str:
-    """Generates CSV content from the data."""
+    if not jobs:
+        return []
 
-    download_dir = Path(SYS_DOWNLOAD_PATH, session_id)
-    download_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=min(len(jobs), GUI_UPLOAD_MAX_WORKERS)) as pool:
+        saved_paths = pool.map(
+            lambda job: _store_single_file(job[1], upload_path / job[0], session_id),
+            jobs.items(),
+        )
+        return [path for path in saved_paths if path]
 
-    logger.info(f"Generating CSV: {file_name}")
 
-    # TODO try-catch
-    # TODO use headers from input file as headers, if has_header ist toggled
-    with open(file_name, mode="w", newline="", encoding="utf-8") as file:
-        csvwriter = writer(file)
-        csvwriter.writerow(["Header", "Input Value", "Output Value"])
-        for row in data:
-            csvwriter.writerow(row)
+def get_text_group_records(
+    headers: list[str], text_inputs: list[str], text_outputs: list[str]
+) -> Iterator[dict]:
+    """Yields the text group results as records with RESULT_FIELDS."""
 
-    return "output.csv"
+    for row_no, (header, text_input, text_output) in enumerate(
+        zip(headers, text_inputs, text_outputs)
+    ):
+        yield {
+            "row": row_no,
+            "title": header,
+            "query": text_input,
+            "response": text_output,
+        }
 
 
-def preview_csv_all_action(
-    session_id: str,
-    text_inputs: list[str],
-    text_outputs: list[str],
-    headers: list[str],
-    has_headers_state: gr.State = gr.State(""),
-):
+def generate_and_save_results(
+    session_id: str, records: Iterable[dict], file_format: str = "csv"
+) -> Path | str:
     """
-    Collects input values and output values, formats them into CSV,
-    and triggers the download of the CSV file.
+    Streams result records into the session's download folder as `file_format`.
+    Returns the file path or an error message.
     """
-    data = []
-    logger.info(
-        f"download_all_action inputs: header{headers}, inputs={list(text_inputs)}, "
-        f"outputs={list(text_outputs)}, has_headers={has_headers_state}"
-    )
-    for text_input, output_text in zip(text_inputs, text_outputs):
-        header = headers if has_headers_state else []
-        data.append([header, text_input, output_text])
 
-    # TODO try-catch
-    return generate_and_save_csv(session_id, data)
+    output_path = _get_session_output_path(session_id, None, file_format)
+    if isinstance(output_path, str):
+        return output_path
+
+    logger.info(f"Generating results {file_format}: {output_path.name}")
+    try:
+        return write_results(records, output_path, file_format)
+    except Exception as e:
+        msg = f"Error while exporting results as {file_format}: {e}"
+        logger.exception(msg)
+        return msg
 
 
 def _extract_first_h1_from_markdown_raw(md_text: str) -> str:
@@ -265,17 +327,6 @@ def _extract_first_h1_from_markdown_raw(md_text: str) -> str:
     return HTML_DEFAULT_TITLE
 
 
-def _check_required_files_exist(file_path: str):
-    """
-    Checks if provided file exists. Raises FileNotFoundError if not found.
-    """
-
-    if not Path(file_path).exists():
-        msg = f"Required file missing: {file_path}"
-        logger.error(msg)
-        raise FileNotFoundError(msg)
-
-
 def _get_output_file_name(session_id_str: str, file_ext: str) -> str:
     """
     Generates a unique output file name based on session_id_str.
@@ -287,11 +338,21 @@ def _get_output_file_name(session_id_str: str, file_ext: str) -> str:
     return f"{SYS_DOWNLOAD_PREFIX}{session_id_str}.{file_ext}"
 
 
+def _require_pandoc():
+    """Raises RuntimeError if pandoc is not installed, as probed at startup."""
+
+    if get_tool_version("pandoc") is None:
+        msg = "Pandoc is not installed, this export needs it"
+        logger.error(msg)
+        raise RuntimeError(msg)
+
+
 def _save_html_from_md_pandoc(
-    output_path_gen: Path, title: str, css_inlined_standalone: str, md_str: str
+    output_path_gen: Path, template: HtmlExportTemplate, title: str, md_str: str
 ):
     """
     Generates and saves HTML generated from Markdown using Pandoc to the specified output path.
+    The CSS is already inlined in the compiled `template`.
     """
 
     pandoc_args = [
@@ -303,14 +364,12 @@ def _save_html_from_md_pandoc(
         "-o",
         str(output_path_gen),
         "--template",
-        str(SYS_TEMPLATE_HTML),
-        # "--css", str(SYS_TEMPLATE_CSS),
+        str(template.pandoc_template),
         "--metadata",
         f"title={title}",
-        "--metadata",
-        f"css_inlined_standalone={css_inlined_standalone}",
         "--standalone",
     ]
+    _require_pandoc()
     try:
         run(
             pandoc_args,
@@ -331,11 +390,55 @@ def _save_html_from_md_pandoc(
         raise Exception(msg) from e
 
 
+def _get_session_output_path(
+    session_id: str, output_path: Path | None, file_ext: str
+) -> Path | str:
+    """
+    Returns the path of the `file_ext` export inside the session's download folder,
+    creating the folder if needed. Returns an error message on invalid input.
+    """
+
+    if not output_path:
+        output_path = Path(SYS_DOWNLOAD_PATH)
+
+    session_id_str = str(session_id)
+    output_file_name = _get_output_file_name(session_id_str, file_ext)
+    output_path_gen = get_path_session_id(session_id_str, output_path)
+    if isinstance(output_path_gen, str):
+        msg = f"Invalid output path: {output_path_gen}"
+        logger.error(msg)
+        return msg
+    create_path(output_path_gen)
+    return output_path_gen / output_file_name
+
+
+def _save_html_from_md(
+    output_path_gen: Path, template: HtmlExportTemplate, title: str, md_str: str
+):
+    """
+    Generates and saves HTML from Markdown, rendered in-process where the input
+    allows it and with Pandoc otherwise. Very large documents render in chunks.
+    """
+
+    if is_chunked_export(md_str):
+        write_html_chunked(output_path_gen, template, title, md_str)
+        return
+
+    if not can_render_in_process(md_str):
+        logger.info("Markdown needs pandoc extensions, rendering with Pandoc")
+        _save_html_from_md_pandoc(output_path_gen, template, title, md_str)
+        return
+
+    html = render_html_document(template, title, md_str)
+    output_path_gen.write_text(html, encoding="utf-8")
+
+
 def generate_html_from_md(
     session_id: str, markdown: str | list[str], output_path: Path | None = None
 ) -> Path | str:
     """
-    Generates a HTML file from a list of Markdown strings using Pandoc.
+    Generates a HTML file from a list of Markdown strings.
+    Served from the export cache if the same document was rendered before.
     """
 
     if not session_id or not markdown:
@@ -347,31 +450,33 @@ def generate_html_from_md(
         logger.error(msg)
         raise ValueError(msg)
 
-    if not output_path:
-        output_path = Path(SYS_DOWNLOAD_PATH)
-
     # TODO re-raise
-    _check_required_files_exist(SYS_TEMPLATE_HTML)
-    _check_required_files_exist(SYS_TEMPLATE_CSS)
+    template = get_html_export_template()
 
-    session_id_str = str(session_id)
-    output_file_name = _get_output_file_name(session_id_str, "html")
-    output_path_gen = get_path_session_id(session_id_str, output_path)
+    output_path_gen = _get_session_output_path(session_id, output_path, "html")
     if isinstance(output_path_gen, str):
-        msg = f"Invalid output path: {output_path_gen}"
-        logger.error(msg)
-        return msg
-    create_path(output_path_gen)
-    output_path_gen = output_path_gen / output_file_name
+        return output_path_gen
 
-    # TODO try-catch Path read css and _save_html_from_md_pandoc()
     md_str = "".join(markdown) if isinstance(markdown, list) else markdown
-    css_inlined_standalone = Path(SYS_TEMPLATE_CSS).read_text(encoding="utf-8")
+    cache_key = get_export_cache_key(md_str, "html")
+    with get_output_lock(output_path_gen):
+        return _render_html_export(output_path_gen, cache_key, template, md_str)
+
+
+def _render_html_export(
+    output_path_gen: Path, cache_key: str, template: HtmlExportTemplate, md_str: str
+) -> Path | str:
+    """Serves the HTML export from the cache or renders and caches it."""
+
+    cached_path = get_cached_export(cache_key, "html", output_path_gen)
+    if cached_path is not None:
+        return cached_path
+
     title = _extract_first_h1_from_markdown_raw(md_str)
+    # may be a hard link into the export cache, never overwrite in place
+    output_path_gen.unlink(missing_ok=True)
     try:
-        _save_html_from_md_pandoc(
-            output_path_gen, title, css_inlined_standalone, md_str
-        )
+        _save_html_from_md(output_path_gen, template, title, md_str)
     except Exception as e:
         msg = f"Error generating HTML from Markdown: {e}"
         logger.exception(msg)
@@ -382,33 +487,23 @@ def generate_html_from_md(
         logger.error(msg)
         return msg
 
+    store_export(cache_key, "html", output_path_gen)
     return output_path_gen
 
 
-def generate_pdf_from_html(
-    session_id: str, markdown: str | list[str], output_path: Path | None = None
-) -> Path | str:
-    """Generates a PDF file from a Markdown string or list of strings."""
+def _run_pandoc_conversion(html_path: Path, target_path: Path, extra_args: list[str]):
+    """Converts the exported HTML at `html_path` to `target_path` with Pandoc."""
 
-    html_path = generate_html_from_md(session_id, markdown, output_path)
-    if isinstance(html_path, str):
-        msg = f"Invalid output path: {html_path}"
-        logger.error(msg)
-        return msg
-    pdf_path = html_path.with_suffix(".pdf")
-
-    # TODO check for installed latex engine and switch to installed
-    # TODO use reference latex instead of html css with pandoc, or wkhtmltopdf
     pandoc_args = [
         "pandoc",
         str(html_path),
         "-o",
-        str(pdf_path),
-        "--pdf-engine=pdflatex",
+        str(target_path),
+        *extra_args,
         "--metadata",
         f"title={HTML_DEFAULT_TITLE}",
     ]
-
+    _require_pandoc()
     try:
         run(
             pandoc_args,
@@ -423,53 +518,86 @@ def generate_pdf_from_html(
         logger.error(msg)
         raise RuntimeError(msg) from e
     except Exception as e:
-        msg = f"Error generating HTML from Markdown: {e}"
+        msg = f"Error converting {html_path.name} to {target_path.suffix}: {e}"
         logger.exception(msg)
         raise Exception(msg) from e
 
-    return pdf_path
 
+def _convert_html_export(
+    session_id: str,
+    markdown: str | list[str],
+    output_path: Path | None,
+    file_ext: str,
+    convert: Callable[[Path, Path], None],
+    cache_variant: str = "",
+) -> Path | str:
+    """
+    Converts the HTML export of `markdown` to `file_ext` with `convert`. The HTML
+    and the converted file are both taken from the export cache when available;
+    `cache_variant` separates outputs of different converters. Very large
+    documents are converted in chunks and merged, if a merger is installed.
+    """
+
+    target_path = _get_session_output_path(session_id, output_path, file_ext)
+    if isinstance(target_path, str):
+        return target_path
 
-def generate_docx_from_html(
+    md_str = "".join(markdown) if isinstance(markdown, list) else markdown
+    cache_key = get_export_cache_key(md_str, file_ext, cache_variant)
+    with get_output_lock(target_path):
+        cached_path = get_cached_export(cache_key, file_ext, target_path)
+        if cached_path is not None:
+            return cached_path
+
+        html_path = generate_html_from_md(session_id, md_str, output_path)
+        if isinstance(html_path, str):
+            msg = f"Invalid output path: {html_path}"
+            logger.error(msg)
+            return msg
+
+        # may be a hard link into the export cache, never overwrite in place
+        target_path.unlink(missing_ok=True)
+        if is_chunked_export(md_str) and can_merge_chunks(file_ext):
+            render_chunked(
+                target_path,
+                get_html_export_template(),
+                _extract_first_h1_from_markdown_raw(md_str),
+                md_str,
+                convert,
+            )
+        else:
+            convert(html_path, target_path)
+        store_export(cache_key, file_ext, target_path)
+        return target_path
+
+
+def generate_pdf_from_html(
     session_id: str, markdown: str | list[str], output_path: Path | None = None
 ) -> Path | str:
-    """Generates a DOCX file from a Markdown string or list of strings."""
+    """Generates a PDF file from a Markdown string or list of strings."""
 
-    html_path = generate_html_from_md(session_id, markdown, output_path)
-    if isinstance(html_path, str):
-        msg = f"Invalid output path: {html_path}"
-        logger.error(msg)
-        return msg
-    docx_path = html_path.with_suffix(".docx")
+    engine = detect_pdf_engine()
+    return _convert_html_export(
+        session_id,
+        markdown,
+        output_path,
+        "pdf",
+        lambda html_path, pdf_path: render_pdf(html_path, pdf_path, engine),
+        cache_variant=engine or "",
+    )
 
-    # TODO check for installed latex engine and switch to installed
-    pandoc_args = [
-        "pandoc",
-        str(html_path),
-        "-o",
-        str(docx_path),
-        "--pdf-engine=pdflatex",
-        f"--reference-doc={SYS_TEMPLATE_DOCX}",
-        "--metadata",
-        f"title={HTML_DEFAULT_TITLE}",
-    ]
 
-    try:
-        run(
-            pandoc_args,
-            stdout=PIPE,
-            stderr=PIPE,
-            check=True,
-        )
-    except CalledProcessError as e:
-        msg = (
-            f"Pandoc failed with args {pandoc_args} and code {e.returncode}: {e.stderr}"
-        )
-        logger.error(msg)
-        raise RuntimeError(msg) from e
-    except Exception as e:
-        msg = f"Error generating DOCX from Markdown: {e}"
-        logger.exception(msg)
-        raise Exception(msg) from e
+def generate_docx_from_html(
+    session_id: str, markdown: str | list[str], output_path: Path | None = None
+) -> Path | str:
+    """Generates a DOCX file from a Markdown string or list of strings."""
 
-    return docx_path
+    return _convert_html_export(
+        session_id,
+        markdown,
+        output_path,
+        "docx",
+        lambda html_path, docx_path: _run_pandoc_conversion(
+            html_path, docx_path, [f"--reference-doc={SYS_TEMPLATE_DOCX}"]
+        ),
+    )
@@ -3,36 +3,79 @@ Event handlers and utility functions for Gradio GUI components, including file u
 preview toggling, dynamic group management, and Azure AI text submission.
 """
 
+from collections.abc import Callable
+from functools import partial
+from json import dumps, loads
 from pathlib import Path
+
 import gradio as gr
 
-from src.chat.azure_client import query_azure_ai
-from src.chat.azure_config import set_chat_system_prompt
+from src.batch.results_export import export_job_results
+from src.chat.azure_config import (
+    generate_full_chat_system_prompt,
+    get_system_prompt_version,
+)
+from src.chat.job_broker import query_chat, query_chat_checked
 from src.config import (
     GUI_INFO_DURATION,
     GUI_MAX_DYN_GROUPS,
+    GUI_RESULTS_PAGE_SIZE,
 )
-from src.gui.gui_builder.gui_actions import generate_output, generate_file_preview
+from src.gui.gui_builder.gui_actions import (
+    generate_batch_progress,
+    generate_chunked_upload_preview,
+    generate_file_preview,
+    generate_preview_page,
+    generate_results_page,
+    get_preview_sort_choices,
+    start_batch_jobs,
+    store_uploaded_rows,
+    update_results_queries,
+    update_session_document,
+)
+from src.gui.gui_builder.gui_export_bundle import create_export_bundle
+from src.gui.gui_builder.gui_export_pool import run_export
+from src.gui.gui_builder.gui_export_prerender import schedule_prerender
 from src.gui.gui_builder.gui_file_utils import (
     upload_files,
     generate_html_from_md,
     generate_pdf_from_html,
     generate_docx_from_html,
+    generate_and_save_results,
+    get_text_group_records,
+)
+from src.gui.gui_builder.gui_report_document import (
+    apply_text_diff,
+    dump_delta,
+    find_session_document,
 )
+from src.gui.gui_builder.gui_results_grid import (
+    RESULTS_COL_ACTION,
+    RESULTS_COL_ROW,
+    get_session_results_grid,
+)
+from src.gui.gui_builder.gui_session_store import get_session_data
 from src.gui.i18n import gui_text_en as txt
 from src.utils.log import logger
 
 
-# TODO handle multiple file_input
 def handle_event_file_processing(
     file_input: str,
     session_id: str,
     has_headers: bool,
     last_uploaded_files: str,
 ) -> tuple[
-    dict[str, str] | None, list[str] | None, list[str] | None, int, str, str | list[str]
+    dict[str, str] | None,
+    list[str] | None,
+    list[str] | None,
+    int,
+    str,
+    str | list[str],
+    int,
+    dict,
+    str,
 ]:
-    """Processes file, generates preview, and sets group count."""
+    """Processes all files, generates a merged preview, and sets group count."""
     default_return = (
         {"data": [], "headers": [], "__type__": "update"},  # gr.DataFrame.update
         [],  # group_header_titles
@@ -40,21 +83,30 @@ def handle_event_file_processing(
         int(0),  # group_count
         str("Error: Invalid file, session ID or upload path"),  # output_box
         [],  # uploaded_files
+        1,  # preview_page
+        gr.update(),  # preview_sort_col
+        "",  # preview_page_info
     )
     if not file_input or not session_id:
         return default_return
     uploaded_files = upload_files(file_input, session_id)
     if not uploaded_files or isinstance(uploaded_files, str):
         return default_return
-    preview_dataframe, group_header_titles, input_values = generate_file_preview(
-        uploaded_files, session_id, has_headers
-    )
+    (
+        preview_dataframe,
+        group_header_titles,
+        input_values,
+        preview_page,
+        preview_page_info,
+    ) = generate_file_preview(uploaded_files, session_id, has_headers)
     headers_count = 0 if group_header_titles is None else len(group_header_titles)
     group_count = min(headers_count, GUI_MAX_DYN_GROUPS)
 
-    # TODO refactor to carry multiple files
-    uploaded_files_output_box = Path(uploaded_files[0]).name
-    last_uploaded_files = uploaded_files[0]  # full path, list for gr.State compat
+    uploaded_files_output_box = "\n".join(Path(f).name for f in uploaded_files)
+    last_uploaded_files = uploaded_files  # full paths
+    store_uploaded_rows(
+        session_id, group_header_titles, input_values, uploaded_files, has_headers
+    )
 
     return (
         preview_dataframe,
@@ -63,9 +115,241 @@ def handle_event_file_processing(
         group_count,
         uploaded_files_output_box,
         last_uploaded_files,
+        preview_page,
+        gr.update(choices=get_preview_sort_choices(session_id), value=-1),
+        preview_page_info,
+    )
+
+
+def handle_event_chunked_upload_complete(
+    file_name: str,
+    session_id: str,
+    has_headers: bool,
+) -> tuple[
+    dict[str, str] | None,
+    list[str] | None,
+    list[str] | None,
+    int,
+    str,
+    str | list[str],
+    int,
+    dict,
+    str,
+]:
+    """Generates preview and sets group count for a completed chunked upload."""
+    default_return = (
+        {"data": [], "headers": [], "__type__": "update"},  # gr.DataFrame.update
+        [],  # group_header_titles
+        [],  # input_values
+        0,  # group_count
+        "Error: Invalid file, session ID or upload path",  # output_box
+        [],  # uploaded_files
+        1,  # preview_page
+        gr.update(),  # preview_sort_col
+        "",  # preview_page_info
+    )
+    if not file_name or not session_id:
+        return default_return
+    try:
+        (
+            preview_dataframe,
+            group_header_titles,
+            input_values,
+            file_path,
+            preview_page,
+            preview_page_info,
+        ) = generate_chunked_upload_preview(file_name, session_id, has_headers)
+    except Exception as e:
+        logger.exception(f"Error while processing chunked upload {file_name}: {e}")
+        return default_return
+    if not file_path:
+        return default_return
+    store_uploaded_rows(
+        session_id, group_header_titles, input_values, [file_path], has_headers
+    )
+
+    return (
+        preview_dataframe,
+        group_header_titles,
+        input_values,
+        min(len(group_header_titles), GUI_MAX_DYN_GROUPS),
+        Path(file_path).name,
+        [file_path],
+        preview_page,
+        gr.update(choices=get_preview_sort_choices(session_id), value=-1),
+        preview_page_info,
+    )
+
+
+def handle_event_preview_page(
+    session_id: str,
+    page: float | None,
+    sort_by: int | None,
+    sort_order: str,
+    query: str,
+) -> tuple[dict, int, str]:
+    """Serves one page of the uploaded CSV preview, sorted and filtered."""
+
+    try:
+        return generate_preview_page(session_id, page, sort_by, sort_order, query)
+    except Exception as e:
+        msg = f"Error while generating preview page: {e}"
+        logger.exception(msg)
+        return gr.update(), int(page or 1), msg
+
+
+def handle_event_preview_page_step(
+    step: int,
+    session_id: str,
+    page: float | None,
+    sort_by: int | None,
+    sort_order: str,
+    query: str,
+) -> tuple[dict, int, str]:
+    """Moves the CSV preview `step` pages forward or backward."""
+
+    return handle_event_preview_page(
+        session_id, int(page or 1) + step, sort_by, sort_order, query
+    )
+
+
+def handle_event_results_page(
+    session_id: str, page: float | None
+) -> tuple[dict, int, str]:
+    """Serves one page of the results grid."""
+
+    try:
+        return generate_results_page(session_id, page)
+    except Exception as e:
+        msg = f"Error while generating results page: {e}"
+        logger.exception(msg)
+        return gr.update(), int(page or 1), msg
+
+
+def handle_event_results_page_step(
+    step: int, session_id: str, page: float | None
+) -> tuple[dict, int, str]:
+    """Moves the results grid `step` pages forward or backward."""
+
+    return handle_event_results_page(session_id, int(page or 1) + step)
+
+
+def handle_event_results_edit(session_id: str, page_rows: list[list]):
+    """Stores queries edited in the visible results page."""
+
+    changed = update_results_queries(session_id, page_rows)
+    if changed:
+        logger.info(f"[{session_id[:6]}] Updated {changed} results grid queries")
+
+
+def _get_session_query_fn(
+    session_id: str,
+) -> Callable[[str], tuple[bool, str | None]]:
+    """Returns `query_chat_checked` bound to the session's system prompt."""
+
+    return partial(
+        query_chat_checked, system_prompt=get_session_data(session_id).system_prompt
     )
 
 
+def handle_event_results_select(
+    session_id: str, page: float | None, evt: gr.SelectData
+) -> tuple[dict, int, str]:
+    """Submits the row whose submit cell was clicked, then refreshes the page."""
+
+    grid = get_session_results_grid(session_id)
+    if grid is None or evt.index[1] != RESULTS_COL_ACTION:
+        return gr.update(), gr.update(), gr.update()
+    grid.submit_rows(
+        [int(evt.row_value[RESULTS_COL_ROW]) - 1], _get_session_query_fn(session_id)
+    )
+    return handle_event_results_page(session_id, page)
+
+
+def handle_event_results_submit_page(
+    session_id: str, page: float | None
+) -> tuple[dict, int, str]:
+    """Submits all rows of the visible results page, then refreshes it."""
+
+    grid = get_session_results_grid(session_id)
+    if grid is None:
+        return gr.update(), gr.update(), gr.update()
+    start = (int(page or 1) - 1) * GUI_RESULTS_PAGE_SIZE
+    grid.submit_rows(
+        list(range(start, start + GUI_RESULTS_PAGE_SIZE)),
+        _get_session_query_fn(session_id),
+    )
+    return handle_event_results_page(session_id, page)
+
+
+async def handle_event_export_results_grid(
+    session_id: str, file_format: str
+) -> str | None:
+    """Exports the finished rows of the results grid as `file_format`."""
+
+    grid = get_session_results_grid(session_id)
+    if grid is None:
+        return None
+    try:
+        output_path = await run_export(
+            file_format,
+            generate_and_save_results,
+            session_id,
+            grid.iter_records(),
+            file_format,
+        )
+    except Exception as e:
+        msg = f"Error while exporting results grid as {file_format}: {e}"
+        logger.exception(msg)
+        gr.Warning(msg, duration=GUI_INFO_DURATION)
+        return None
+    if isinstance(output_path, str):
+        gr.Warning(output_path, duration=GUI_INFO_DURATION)
+        return None
+    return str(output_path)
+
+
+def handle_event_start_batch(
+    session_id: str,
+    has_headers: bool,
+    last_uploaded_files: str | list[str],
+) -> tuple[dict, list[str], dict, str]:
+    """Starts batch jobs for the uploaded files and activates the progress timer."""
+    job_ids = start_batch_jobs(session_id, has_headers, last_uploaded_files)
+    if not job_ids:
+        gr.Warning(txt.GUI_TXT_BATCH_NOT_STARTED, duration=GUI_INFO_DURATION)
+        return gr.update(), [], gr.Timer(active=False), ""
+    progress, _, _ = generate_batch_progress(job_ids)
+    return gr.update(visible=True), job_ids, gr.Timer(active=True), progress
+
+
+def handle_event_batch_progress(job_ids: list[str]) -> tuple[str, list[str], dict]:
+    """Refreshes batch progress and stops the timer once no job is running."""
+    progress, output_paths, running = generate_batch_progress(job_ids)
+    return progress, output_paths, gr.Timer(active=running)
+
+
+async def handle_event_export_batch_results(
+    job_ids: list[str], file_format: str
+) -> list[str]:
+    """Exports the results of the batch jobs as `file_format` on the export pool."""
+
+    exported = []
+    for job_id in job_ids:
+        try:
+            output_path = await run_export(
+                file_format, export_job_results, job_id, file_format
+            )
+        except Exception as e:
+            msg = f"Error while exporting batch results as {file_format}: {e}"
+            logger.exception(msg)
+            gr.Warning(msg, duration=GUI_INFO_DURATION)
+            continue
+        if output_path is not None:
+            exported.append(str(output_path))
+    return exported
+
+
 def toggle_preview(is_visible: bool) -> tuple[dict[str, bool], dict[str, bool], bool]:
     """Toggle the visibility of the preview gallery."""
     is_visible = not is_visible
@@ -82,22 +366,38 @@ def toggle_preview(is_visible: bool) -> tuple[dict[str, bool], dict[str, bool],
 
 
 def toggle_edit_system_prompt_output(
-    edit_system_prompt_visible: bool,
-) -> tuple[dict[str, bool], dict[str, str], bool]:
-    """Toggle the visibility of the generated output section."""
+    edit_system_prompt_visible: bool, system_prompt: str
+) -> tuple[dict[str, bool | str], dict[str, str], bool]:
+    """
+    Toggle the visibility of the system prompt editor. The default prompt is
+    filled in on first open instead of while building the UI.
+    """
 
     is_visible = not edit_system_prompt_visible
     value = txt.GUI_BTN_EDIT_SYS_PROMPT if is_visible else txt.GUI_BTN_EDIT_SYS_PROMPT
     return (
-        gr.update(visible=is_visible),
+        gr.update(
+            visible=is_visible,
+            value=system_prompt or generate_full_chat_system_prompt(),
+        ),
         gr.update(value=value),
         is_visible,
     )
 
 
-def update_system_prompt(new_system_prompt: str):
-    """Udpates the system prompt in environemnt."""
-    set_chat_system_prompt(new_system_prompt)
+def update_system_prompt(session_id: str, new_system_prompt: str):
+    """
+    Commits the edited system prompt of the session, used by its queries from now
+    on. Unchanged prompts, by hash, are skipped.
+    """
+
+    data = get_session_data(session_id)
+    version = get_system_prompt_version(new_system_prompt)
+    if version == data.system_prompt_version:
+        return
+    data.system_prompt = new_system_prompt
+    data.system_prompt_version = version
+    logger.info(f"[{session_id[:6]}] Using system prompt version {version}")
 
 
 def toggle_generated_output(
@@ -119,23 +419,63 @@ def toggle_generated_output(
     )
 
 
+def _get_delta_version(report_delta: str | None) -> int:
+    """Returns the document version the client last applied, -1 if none."""
+
+    try:
+        return int(loads(report_delta)["version"]) if report_delta else -1
+    except (ValueError, KeyError, TypeError):
+        return -1
+
+
 def handle_generate_output(
-    headers: list[str],
-    text_inputs: list[str],
-    text_outputs: list[str],
-    last_uploaded_files: list[str],
-) -> str:
+    session_id: str, n_rows: int, report_delta: str | None = None
+) -> tuple[str | dict, str | dict]:
     """
-    Handles the click event for the generate output button by
-    processing all text inputs and outputs.
+    Handles the click event for the generate output button by updating the
+    session's document from the stored values of the first `n_rows` text groups.
+    Returns the Markdown for the editor, previewed client-side, and the section
+    lengths for the client, or no updates if the client already shows the
+    current document.
     """
 
     try:
-        return generate_output(headers, text_inputs, text_outputs, last_uploaded_files)
+        document, changed = update_session_document(session_id, int(n_rows))
     except Exception as e:
         msg = f"Error while generating output: {e}"
         logger.exception(msg)
-        return msg
+        return msg, gr.update()
+
+    if not changed and document.version == _get_delta_version(report_delta):
+        return gr.update(), gr.update()
+    # the full document is sent, so the client re-splits it into sections and
+    # diffs later edits against it
+    get_session_data(session_id).editor_md = document.markdown
+    delta = dump_delta(document.get_delta(-1))
+    return document.markdown, delta
+
+
+def handle_update_report_row(
+    session_id: str, row: int, report_delta: str | None
+) -> str | dict:
+    """
+    Updates the section of one text group after its output changed. Returns the
+    delta of sections the client has not applied yet, or no update.
+    """
+
+    document = find_session_document(session_id)
+    if document is None:
+        return gr.update()
+    headers, text_inputs, text_outputs = get_session_data(session_id).get_rows(row + 1)
+    if not document.set_row(row, headers[row], text_inputs[row], text_outputs[row]):
+        return gr.update()
+    return dump_delta(document.get_delta(_get_delta_version(report_delta)))
+
+
+def handle_store_text_input(session_id: str, row: int, text: str):
+    """Stores the edited query of one text group."""
+
+    get_session_data(session_id).set_value(row, "inputs", text)
 
 
 def toggle_use_headers(has_headers: bool) -> bool:
@@ -161,62 +501,69 @@ def remove_text_group(current_group_count: int) -> int:
     return max(1, current_group_count - 1)
 
 
-def toggle_collapse(state: dict[str, bool], group_id: str) -> dict[str, bool]:
-    """Toggle collapse state for a text group."""
-    new_state = dict(state)
-    new_state[group_id] = not new_state.get(group_id, False)
-
-    return new_state
-
-
-def set_toggle_btn_value(state: dict[str, bool], group_id: str) -> dict[str, str]:
-    """Return updated button label based on the collapse state of the given group."""
-    is_collapsed = state.get(group_id, False)
-    new_label = (
-        txt.GUI_BTN_TGL_COLLAPSE_LBL if not is_collapsed else txt.GUI_BTN_TGL_EXPAND_LBL
-    )
-
-    return gr.update(value=new_label)
-
-
-def handle_text_submission(text: str) -> str | None:
+def handle_text_submission(text: str, system_prompt: str | None = None) -> str | None:
     """Send text to Azure AI and return its response."""
     try:
-        return query_azure_ai(text)
+        return query_chat(text, system_prompt)
     except Exception as e:
         msg = f"Error while querying Azure AI: {e}"
         logger.exception(msg)
         return msg
 
 
-def flatten_inputs_and_generate_output(
-    *texts: str,
-) -> tuple[str, str]:
+def handle_text_group_submission(session_id: str, row: int) -> str | None:
+    """Sends the stored query of one text group and stores its response."""
+
+    data = get_session_data(session_id)
+    _, text_inputs, _ = data.get_rows(row + 1)
+    response = handle_text_submission(text_inputs[row], data.system_prompt)
+    data.set_value(row, "outputs", response or "")
+    return response
+
+
+def handle_submit_all(session_id: str, n_rows: int) -> list[str | None]:
+    """Sends the stored queries of the first `n_rows` text groups."""
+
+    return [handle_text_group_submission(session_id, row) for row in range(n_rows)]
+
+
+def handle_prepare_export_bundle(session_id: str, md_str: str, n_rows: int) -> str:
     """
-    Flattens the input texts and generates output based on
-    the provided headers, input texts, and output texts.
+    Stores a snapshot of the document and the stored text group results for the
+    "download all" zip and returns its download token, or "" if nothing to export.
     """
 
-    len_headers = int(texts[0])
-    len_inputs = int(texts[1])
-    len_outputs = int(texts[2])
-    offset_headers = 3
-    offset_headers_len = len_headers + offset_headers
-    offset_inputs_len = offset_headers_len + len_inputs
-    offset_outputs_len = offset_inputs_len + len_outputs
-    headers = list(texts[offset_headers:offset_headers_len])
-    input_text = list(texts[offset_headers_len:offset_inputs_len])
-    output_text = list(texts[offset_inputs_len:offset_outputs_len])
-    last_uploaded_files = list(texts[offset_outputs_len:])
-
-    # FIXME SoC into separate button, e.g. preview Doc
-    generated_output = handle_generate_output(
-        headers, input_text, output_text, last_uploaded_files
+    if not session_id or not md_str:
+        gr.Warning(txt.GUI_TXT_BUNDLE_EMPTY, duration=GUI_INFO_DURATION)
+        return ""
+    headers, text_inputs, text_outputs = get_session_data(session_id).get_rows(
+        int(n_rows)
     )
-    return generated_output, generated_output
+    records = get_text_group_records(headers, text_inputs, text_outputs)
+    return create_export_bundle(session_id, md_str, list(records))
 
 
-def handle_generate_html_from_md(
+def handle_apply_report_diff(session_id: str, diff_json: str) -> str:
+    """
+    Applies a debounced editor diff to the session's copy of the document and
+    schedules background rendering of the downloads. Returns the acknowledgement
+    for the client, asking for the full text if the copies diverged.
+    """
+
+    data = get_session_data(session_id)
+    try:
+        data.editor_md = apply_text_diff(data.editor_md, loads(diff_json))
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"[{session_id[:6]}] Resyncing editor: {e}")
+        return dumps({"resync": True})
+    try:
+        schedule_prerender(session_id, data.editor_md)
+    except Exception as e:
+        logger.exception(f"Error while scheduling export prerender: {e}")
+    return dumps({"synced": len(data.editor_md.encode("utf-16-le")) // 2})
+
+
+async def handle_generate_html_from_md(
     session_id: str, md_list: list[str], output_path: Path | None = None
 ) -> str:
     """
@@ -231,7 +578,9 @@ def handle_generate_html_from_md(
     )
 
     try:
-        html_path = generate_html_from_md(session_id, md_list, output_path)
+        html_path = await run_export(
+            "html", generate_html_from_md, session_id, md_list, output_path
+        )
     except Exception as e:
         msg = f"Error while generating HTML from Mardown: {e}"
         logger.exception(msg)
@@ -245,7 +594,7 @@ def handle_generate_html_from_md(
     return str(html_path)
 
 
-def handle_generate_pdf_from_html(
+async def handle_generate_pdf_from_html(
     session_id: str, md_list: list[str], output_path: Path | None = None
 ) -> str:
     """
@@ -253,7 +602,9 @@ def handle_generate_pdf_from_html(
     """
 
     try:
-        pdf_path = generate_pdf_from_html(session_id, md_list, output_path)
+        pdf_path = await run_export(
+            "pdf", generate_pdf_from_html, session_id, md_list, output_path
+        )
     except Exception as e:
         msg = f"Error while generating PDF from Mardown: {e}"
         logger.exception(msg)
@@ -267,7 +618,7 @@ def handle_generate_pdf_from_html(
     return str(pdf_path)
 
 
-def handle_generate_docx_from_html(
+async def handle_generate_docx_from_html(
     session_id: str, md_list: list[str], output_path: Path | None = None
 ) -> str:
     """
@@ -275,7 +626,9 @@ def handle_generate_docx_from_html(
     """
 
     try:
-        docx_path = generate_docx_from_html(session_id, md_list, output_path)
+        docx_path = await run_export(
+            "docx", generate_docx_from_html, session_id, md_list, output_path
+        )
     except Exception as e:
         msg = f"Error while generating PDF from Mardown: {e}"
         logger.exception(msg)
@@ -0,0 +1,63 @@
+"""
+In-process Markdown to HTML rendering for exports, filling the compiled HTML
+export template without starting a subprocess. Covers the constructs assembled by
+`generate_output` and plain edits of it; anything else is left to pandoc.
+"""
+
+from re import MULTILINE, compile as re_compile, sub
+
+from src.gui.gui_builder.gui_export_template import HtmlExportTemplate
+
+# constructs rendered differently or not at all without pandoc's extensions:
+# tables, fenced code, math, footnotes, raw HTML, lazily indented lists, setext
+_UNSUPPORTED_MD = re_compile(
+    r"^\s*\||```|~~~|\$|\[\^|^\s*<|^ {1,3}(?:[-*+]|\d+[.)])\s|^(?:=+|-+)\s*$",
+    MULTILINE,
+)
+
+
+def can_render_in_process(md_str: str) -> bool:
+    """Returns True if `md_str` only uses constructs rendered like pandoc does."""
+
+    return _UNSUPPORTED_MD.search(md_str) is None
+
+
+def _pandoc_identifier_factory(id_marker: str | None = None):
+    """
+    Returns a toc slugify function producing pandoc's auto identifiers. With
+    `id_marker`, every identifier is left as base, marker and local count, for
+    numbering across independently rendered chunks later.
+    """
+
+    seen: dict[str, int] = {}
+
+    def slugify(value: str, separator: str) -> str:
+        identifier = sub(r"[^\w\s.-]", "", value.lower()).strip()
+        identifier = sub(r"\s+", separator, identifier)
+        identifier = sub(r"^[\W\d_]+", "", identifier) or "section"
+        count = seen.get(identifier, 0)
+        seen[identifier] = count + 1
+        if id_marker is not None:
+            return f"{identifier}{id_marker}{count}"
+        return identifier if count == 0 else f"{identifier}-{count}"
+
+    return slugify
+
+
+def render_md_body(md_str: str, id_marker: str | None = None) -> str:
+    """Renders Markdown to an HTML body fragment equivalent to pandoc's html5."""
+
+    from markdown import Markdown  # deferred to the first export
+
+    renderer = Markdown(
+        extensions=["toc", "sane_lists", "smarty"],
+        extension_configs={"toc": {"slugify": _pandoc_identifier_factory(id_marker)}},
+        output_format="html",
+    )
+    return renderer.convert(md_str)
+
+
+def render_html_document(template: HtmlExportTemplate, title: str, md_str: str) -> str:
+    """Renders `md_str` into the compiled export `template`."""
+
+    return template.render(title, render_md_body(md_str))
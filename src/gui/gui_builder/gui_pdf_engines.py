@@ -0,0 +1,231 @@
+"""
+PDF engine selection and rendering for exports. The first available engine of
+GUI_EXPORT_PDF_ENGINES is detected once and cached. HTML engines render the
+exported HTML with its CSS directly. With pdflatex the preamble generated by
+pandoc is precompiled into a format file once, so each PDF only typesets its
+body instead of loading all packages again. Tool versions are probed once too,
+by the startup warm-up, so exports fail fast if a tool is missing.
+"""
+
+from functools import cache
+from hashlib import sha256
+from importlib.util import find_spec
+from os import replace
+from pathlib import Path
+from shutil import which
+from subprocess import CalledProcessError, TimeoutExpired, run
+from tempfile import TemporaryDirectory
+from threading import Lock
+
+from src.config import (
+    GUI_EXPORT_PDF_ENGINE,
+    GUI_EXPORT_PDF_ENGINES,
+    SYS_PDF_FORMAT_PATH,
+)
+from src.gui.i18n.gui_text_en import HTML_DEFAULT_TITLE
+from src.utils.log import logger
+
+_TOOL_VERSION_TIMEOUT = 10  # seconds for `<tool> --version`, e.g. a cold TeX tree
+
+_format_lock = Lock()
+
+
+@cache
+def get_tool_version(tool: str) -> str | None:
+    """
+    Returns the first line of `tool --version`, None if the tool is not installed
+    or does not run. Probed once per process.
+    """
+
+    if which(tool) is None:
+        logger.warning(f"'{tool}' is not installed")
+        return None
+    try:
+        result = run(
+            [tool, "--version"],
+            capture_output=True,
+            timeout=_TOOL_VERSION_TIMEOUT,
+            check=False,
+        )
+    except (OSError, TimeoutExpired) as e:
+        msg = f"Error while probing '{tool}': {e}"
+        logger.error(msg)
+        return None
+    output = (result.stdout or result.stderr).decode("utf-8", errors="replace")
+    version = output.strip().splitlines()[0] if output.strip() else tool
+    logger.info(f"Found {version}")
+    return version
+
+
+def _is_engine_available(engine: str) -> bool:
+    """Returns True if `engine` can be used in this environment."""
+
+    if engine == "weasyprint":
+        return find_spec("weasyprint") is not None or which("weasyprint") is not None
+    if engine in ("tectonic", "pdflatex"):
+        return which("pandoc") is not None and which(engine) is not None
+    return which(engine) is not None
+
+
+@cache
+def detect_pdf_engine() -> str | None:
+    """
+    Returns the PDF engine to use: GUI_EXPORT_PDF_ENGINE if set and available,
+    else the first available of GUI_EXPORT_PDF_ENGINES. Detected once per process.
+    """
+
+    candidates = list(GUI_EXPORT_PDF_ENGINES)
+    if GUI_EXPORT_PDF_ENGINE:
+        candidates.insert(0, GUI_EXPORT_PDF_ENGINE)
+    for engine in candidates:
+        if _is_engine_available(engine):
+            logger.info(f"Using PDF engine '{engine}'")
+            return engine
+    logger.warning(f"No PDF engine available, tried {candidates}")
+    return None
+
+
+@cache
+def _has_mylatexformat() -> bool:
+    """Returns True if the mylatexformat package for dumping preambles is installed."""
+
+    if which("kpsewhich") is None:
+        return False
+    result = run(["kpsewhich", "mylatexformat.ltx"], capture_output=True, check=False)
+    return result.returncode == 0 and bool(result.stdout.strip())
+
+
+def _run_checked(args: list[str], **kwargs) -> bytes:
+    """Runs `args` and returns stdout. Raises RuntimeError if the command fails."""
+
+    try:
+        return run(args, capture_output=True, check=True, **kwargs).stdout
+    except CalledProcessError as e:
+        msg = f"{args[0]} failed with args {args} and code {e.returncode}: {e.stderr}"
+        logger.error(msg)
+        raise RuntimeError(msg) from e
+
+
+def _render_weasyprint(html_path: Path, pdf_path: Path):
+    if find_spec("weasyprint") is not None:
+        from weasyprint import HTML  # optional dependency, imported on demand
+
+        HTML(filename=str(html_path)).write_pdf(str(pdf_path))
+    else:
+        _run_checked(["weasyprint", str(html_path), str(pdf_path)])
+
+
+def _render_wkhtmltopdf(html_path: Path, pdf_path: Path):
+    _run_checked(["wkhtmltopdf", "--quiet", str(html_path), str(pdf_path)])
+
+
+def _render_pandoc_engine(html_path: Path, pdf_path: Path, engine: str):
+    _run_checked(
+        [
+            "pandoc",
+            str(html_path),
+            "-o",
+            str(pdf_path),
+            f"--pdf-engine={engine}",
+            "--metadata",
+            f"title={HTML_DEFAULT_TITLE}",
+        ]
+    )
+
+
+def _get_latex_format(preamble: str) -> str:
+    """
+    Returns the name of the format file holding `preamble`, dumping it with
+    mylatexformat on first use. Formats live in SYS_PDF_FORMAT_PATH.
+    """
+
+    format_dir = Path(SYS_PDF_FORMAT_PATH)
+    format_name = f"preamble_{sha256(preamble.encode('utf-8')).hexdigest()[:16]}"
+    if (format_dir / f"{format_name}.fmt").exists():
+        return format_name
+
+    with _format_lock:
+        if (format_dir / f"{format_name}.fmt").exists():
+            return format_name
+        format_dir.mkdir(parents=True, exist_ok=True)
+        with TemporaryDirectory(dir=format_dir) as tmp_dir:
+            Path(tmp_dir, "preamble.tex").write_text(
+                f"{preamble}\\begin{{document}}\n\\end{{document}}\n",
+                encoding="utf-8",
+            )
+            _run_checked(
+                [
+                    "pdflatex",
+                    "-ini",
+                    "-interaction=nonstopmode",
+                    f"-jobname={format_name}",
+                    "&pdflatex",
+                    "mylatexformat.ltx",
+                    "preamble.tex",
+                ],
+                cwd=tmp_dir,
+            )
+            replace(
+                Path(tmp_dir, f"{format_name}.fmt"), format_dir / f"{format_name}.fmt"
+            )
+        logger.info(f"Precompiled LaTeX preamble into {format_name}.fmt")
+    return format_name
+
+
+def _render_pdflatex_precompiled(html_path: Path, pdf_path: Path):
+    """Typesets the pandoc LaTeX of `html_path` against a precompiled preamble."""
+
+    tex = _run_checked(
+        [
+            "pandoc",
+            str(html_path),
+            "-t",
+            "latex",
+            "--standalone",
+            "--metadata",
+            f"title={HTML_DEFAULT_TITLE}",
+        ]
+    ).decode("utf-8")
+    preamble, begin_document, body = tex.partition("\\begin{document}")
+    if not begin_document:
+        msg = "Pandoc LaTeX output has no \\begin{document}"
+        logger.error(msg)
+        raise RuntimeError(msg)
+
+    format_name = _get_latex_format(preamble)
+    with TemporaryDirectory(dir=SYS_PDF_FORMAT_PATH) as tmp_dir:
+        Path(tmp_dir, "doc.tex").write_text(begin_document + body, encoding="utf-8")
+        _run_checked(
+            [
+                "pdflatex",
+                "-interaction=nonstopmode",
+                "-halt-on-error",
+                f"-fmt={format_name}",
+                f"-output-directory={tmp_dir}",
+                str(Path(tmp_dir, "doc.tex")),
+            ],
+            cwd=SYS_PDF_FORMAT_PATH,
+        )
+        replace(Path(tmp_dir, "doc.pdf"), pdf_path)
+
+
+def render_pdf(html_path: Path, pdf_path: Path, engine: str | None = None):
+    """
+    Renders the exported HTML at `html_path` to `pdf_path` with `engine`, or the
+    detected engine. Raises RuntimeError if no engine is available or it fails.
+    """
+
+    engine = engine or detect_pdf_engine()
+    if engine is None:
+        msg = f"No PDF engine available, install one of {GUI_EXPORT_PDF_ENGINES}"
+        logger.error(msg)
+        raise RuntimeError(msg)
+
+    if engine == "weasyprint":
+        _render_weasyprint(html_path, pdf_path)
+    elif engine == "wkhtmltopdf":
+        _render_wkhtmltopdf(html_path, pdf_path)
+    elif engine == "pdflatex" and _has_mylatexformat():
+        _render_pdflatex_precompiled(html_path, pdf_path)
+    else:
+        _render_pandoc_engine(html_path, pdf_path, engine)
@@ -0,0 +1,204 @@
+"""
+Section-addressed model of the generated document. The title, every text group
+and the disclaimer are separate sections; a row's section is only re-rendered
+when its header, input or output changed, and the combined Markdown is joined
+lazily. Sections changed since a version can be fetched as a delta, so the
+client only receives what changed.
+"""
+
+from dataclasses import dataclass
+from json import dumps
+from threading import Lock
+
+from src.gui.i18n import gui_text_en as txt
+
+
+def render_title_section(file_name: str) -> str:
+    return f"# {file_name}\n\n"
+
+
+def render_row_section(
+    row_no: int, header: str, text_input: str, text_output: str
+) -> str:
+    """Renders the section of the text group with one-based number `row_no`."""
+
+    return f"## {row_no}. {header}\n\n{text_input}: {text_output}\n\n"
+
+
+def render_footer_section() -> str:
+    return f"\n_{txt.GUI_TXT_DOC_DISCLAIMER}_"
+
+
+@dataclass
+class _Section:
+    key: tuple
+    markdown: str
+    version: int
+
+
+class ReportDocument:
+    """
+    The generated document as sections: title, one per text group, footer.
+    Section indexes are stable, row `i` (zero-based) is section `i + 1`.
+    """
+
+    def __init__(self):
+        self._sections: list[_Section] = []
+        self._version = 0
+        self._structure_version = 0
+        self._markdown: str | None = None
+        self._lock = Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def row_count(self) -> int:
+        return max(0, len(self._sections) - 2)
+
+    def _set_section(self, index: int, key: tuple, render) -> bool:
+        """Renders section `index` unless its key is unchanged. Returns if changed."""
+
+        if index < len(self._sections) and self._sections[index].key == key:
+            return False
+        self._version += 1
+        section = _Section(key, render(), self._version)
+        if index < len(self._sections):
+            self._sections[index] = section
+        else:
+            self._sections.append(section)
+        self._markdown = None
+        return True
+
+    def set_rows(
+        self,
+        file_name: str,
+        headers: list[str],
+        text_inputs: list[str],
+        text_outputs: list[str],
+    ) -> int:
+        """
+        Updates the whole document, re-rendering only changed sections. Returns
+        the number of sections rendered.
+        """
+
+        rows = list(zip(headers, text_inputs, text_outputs))
+        with self._lock:
+            if len(self._sections) != len(rows) + 2:
+                # keep title and common rows, the footer moves to the new end
+                self._sections = self._sections[: 1 + min(self.row_count, len(rows))]
+                self._structure_version = self._version + 1
+            changed = int(
+                self._set_section(
+                    0, ("title", file_name), lambda: render_title_section(file_name)
+                )
+            )
+            for i, row in enumerate(rows):
+                changed += self._set_section(
+                    i + 1,
+                    ("row", *row),
+                    lambda i=i, row=row: render_row_section(i + 1, *row),
+                )
+            changed += self._set_section(
+                len(rows) + 1, ("footer",), render_footer_section
+            )
+            return changed
+
+    def set_row(self, row: int, header: str, text_input: str, text_output: str) -> bool:
+        """Updates the section of zero-based `row` if it exists. Returns if changed."""
+
+        with self._lock:
+            if not 0 <= row < self.row_count:
+                return False
+            key = ("row", header, text_input, text_output)
+            return self._set_section(
+                row + 1,
+                key,
+                lambda: render_row_section(row + 1, header, text_input, text_output),
+            )
+
+    @property
+    def markdown(self) -> str:
+        """The combined Markdown, joined only after sections changed."""
+
+        with self._lock:
+            if self._markdown is None:
+                self._markdown = "".join(s.markdown for s in self._sections)
+            return self._markdown
+
+    def get_delta(self, since_version: int) -> dict:
+        """
+        Returns the sections changed after `since_version` as {"version", "count",
+        "sections": {index: markdown}}, plus "reset" with all section lengths if
+        the structure changed since then.
+        """
+
+        with self._lock:
+            delta = {"version": self._version, "count": len(self._sections)}
+            if since_version < self._structure_version:
+                # lengths in UTF-16 code units, as the client slices strings
+                delta["reset"] = [
+                    len(s.markdown.encode("utf-16-le")) // 2 for s in self._sections
+                ]
+            else:
+                delta["sections"] = {
+                    i: s.markdown
+                    for i, s in enumerate(self._sections)
+                    if s.version > since_version
+                }
+            return delta
+
+
+def dump_delta(delta: dict) -> str:
+    return dumps(delta, ensure_ascii=False)
+
+
+def apply_text_diff(text: str, diff: dict) -> str:
+    """
+    Applies an editor diff {"start", "end", "text", "length"} to `text`, replacing
+    code units start to end. Offsets are UTF-16 code units, as the client slices
+    strings; "full" replaces the whole text. Raises ValueError if `text` is not
+    the "length" long base the diff was made against.
+    """
+
+    if diff.get("full"):
+        return str(diff["text"])
+    units = text.encode("utf-16-le")
+    start, end = int(diff["start"]), int(diff["end"])
+    if (
+        len(units) // 2 != int(diff["length"])
+        or not 0 <= start <= end <= diff["length"]
+    ):
+        raise ValueError("Editor diff does not match the stored document")
+    new_units = units[: 2 * start] + str(diff["text"]).encode("utf-16-le")
+    return (new_units + units[2 * end :]).decode("utf-16-le")
+
+
+# region session registry
+
+_SESSION_DOCUMENTS: dict[str, ReportDocument] = {}
+_registry_lock = Lock()
+
+
+def get_session_document(session_id: str) -> ReportDocument:
+    """Returns the session's document, creating an empty one on first use."""
+
+    with _registry_lock:
+        return _SESSION_DOCUMENTS.setdefault(session_id, ReportDocument())
+
+
+def find_session_document(session_id: str) -> ReportDocument | None:
+    """Returns the session's document if one was generated."""
+
+    return _SESSION_DOCUMENTS.get(session_id)
+
+
+def drop_session_document(session_id: str):
+    """Forgets the document of a closed session."""
+
+    with _registry_lock:
+        _SESSION_DOCUMENTS.pop(session_id, None)
+
+
+# endregion session registry
@@ -0,0 +1,199 @@
+"""
+Paginated results grid over all rows of the session's uploaded dataset. Headers
+and queries are read page by page from the CSV row index, only edited queries,
+responses and statuses are kept per row, so the page holds one page of rows
+whatever the size of the upload.
+"""
+
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from threading import Lock
+
+from src.config import GUI_RESULTS_PAGE_SIZE, GUI_RESULTS_SUBMIT_WORKERS
+from src.gui.gui_builder.gui_csv_index import CsvDatasetIndex, get_session_row_index
+from src.gui.gui_builder.gui_file_utils import sanitize_csv_data
+from src.gui.i18n import gui_text_en as txt
+from src.utils.log import logger
+
+RESULTS_STATUS_RUNNING = "running"
+RESULTS_STATUS_DONE = "done"
+RESULTS_STATUS_ERROR = "error"
+
+# grid columns, only the query column is editable
+RESULTS_COL_ROW, RESULTS_COL_HEADER, RESULTS_COL_QUERY = 0, 1, 2
+RESULTS_COL_RESPONSE, RESULTS_COL_STATUS, RESULTS_COL_ACTION = 3, 4, 5
+
+_STATUS_LABELS = {
+    RESULTS_STATUS_RUNNING: txt.GUI_TXT_RESULTS_STATUS_RUNNING,
+    RESULTS_STATUS_DONE: txt.GUI_TXT_RESULTS_STATUS_DONE,
+    RESULTS_STATUS_ERROR: txt.GUI_TXT_RESULTS_STATUS_ERROR,
+}
+
+
+class ResultsGrid:
+    """
+    Rows of a dataset as (header, query, response, status), first and second
+    column of each CSV row like the prefilled text groups. Rows are zero-based
+    and in file order.
+    """
+
+    def __init__(self, dataset: CsvDatasetIndex):
+        self.dataset = dataset
+        self._col_offset = 0 if dataset.origin_label is None else 1
+        self._queries: dict[int, str] = {}
+        self._responses: dict[int, str] = {}
+        self._statuses: dict[int, str] = {}
+        self._lock = Lock()
+
+    @property
+    def row_count(self) -> int:
+        return self.dataset.row_count
+
+    def _split_row(self, row: list[str]) -> tuple[str, str]:
+        """Returns sanitized (header, query) of a dataset row."""
+
+        values = sanitize_csv_data(row[self._col_offset : self._col_offset + 2])
+        values += [""] * (2 - len(values))
+        return values[0], values[1]
+
+    def get_query(self, row: int) -> str:
+        """Returns the query of `row`, edited or as uploaded."""
+
+        with self._lock:
+            if row in self._queries:
+                return self._queries[row]
+        rows, _ = self.dataset.read_page(row, 1)
+        return self._split_row(rows[0])[1] if rows else ""
+
+    def set_query(self, row: int, query: str) -> bool:
+        """Stores an edited query. Returns False if it is unchanged."""
+
+        if self.get_query(row) == query:
+            return False
+        with self._lock:
+            self._queries[row] = query
+        return True
+
+    def set_result(self, row: int, response: str | None, status: str):
+        """Stores the response and status of `row`."""
+
+        with self._lock:
+            if response is not None:
+                self._responses[row] = response
+            self._statuses[row] = status
+
+    def read_page(self, page: int, page_size: int) -> list[list[str | int]]:
+        """Returns the grid rows of the given zero-based page."""
+
+        start = page * page_size
+        rows, _ = self.dataset.read_page(page, page_size)
+        page_rows: list[list[str | int]] = []
+        with self._lock:
+            for row, values in enumerate(rows, start):
+                header, query = self._split_row(values)
+                status = self._statuses.get(row, "")
+                page_rows.append(
+                    [
+                        row + 1,
+                        header,
+                        self._queries.get(row, query),
+                        self._responses.get(row, ""),
+                        _STATUS_LABELS.get(status, status),
+                        txt.GUI_BTN_RESULTS_SUBMIT_ROW_LBL,
+                    ]
+                )
+        return page_rows
+
+    def submit_rows(
+        self, rows: list[int], query_fn: Callable[[str], tuple[bool, str | None]]
+    ):
+        """
+        Queries `rows` in parallel with `query_fn`, which returns whether the query
+        was answered and its response or error, and stores their results.
+        """
+
+        rows = [row for row in rows if 0 <= row < self.row_count]
+        for row in rows:
+            self.set_result(row, None, RESULTS_STATUS_RUNNING)
+
+        def submit(row: int):
+            try:
+                answered, response = query_fn(self.get_query(row))
+            except Exception as e:
+                msg = f"Error while querying Azure AI: {e}"
+                logger.exception(msg)
+                self.set_result(row, msg, RESULTS_STATUS_ERROR)
+                return
+            status = RESULTS_STATUS_DONE if answered else RESULTS_STATUS_ERROR
+            self.set_result(row, response or "", status)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(len(rows), GUI_RESULTS_SUBMIT_WORKERS))
+        ) as pool:
+            list(pool.map(submit, rows))
+
+    def iter_records(self) -> Iterator[dict]:
+        """
+        Yields the result records of all finished rows in row order, with the
+        error of a failed query like the records of batch jobs.
+        """
+
+        with self._lock:
+            finished = sorted(
+                (row, status, self._responses.get(row, ""), self._queries.get(row))
+                for row, status in self._statuses.items()
+                if status != RESULTS_STATUS_RUNNING
+            )
+        for row, status, response, edited_query in finished:
+            rows, _ = self.dataset.read_page(row, 1)
+            title, query = self._split_row(rows[0]) if rows else ("", "")
+            failed = status == RESULTS_STATUS_ERROR
+            yield {
+                "row": row,
+                "title": title,
+                "query": query if edited_query is None else edited_query,
+                "response": None if failed else response,
+                "error": response if failed else None,
+            }
+
+
+def get_results_page_count(grid: ResultsGrid | None) -> int:
+    """Returns the number of grid pages, at least one."""
+
+    if grid is None:
+        return 1
+    return max(1, ceil(grid.row_count / GUI_RESULTS_PAGE_SIZE))
+
+
+# region session registry
+
+_SESSION_GRIDS: dict[str, ResultsGrid] = {}
+_grids_lock = Lock()
+
+
+def get_session_results_grid(session_id: str) -> ResultsGrid | None:
+    """
+    Returns the results grid over the session's dataset, or None without upload.
+    A new upload replaces the dataset and so starts a new grid.
+    """
+
+    dataset = get_session_row_index(session_id)
+    with _grids_lock:
+        if dataset is None:
+            _SESSION_GRIDS.pop(session_id, None)
+            return None
+        grid = _SESSION_GRIDS.get(session_id)
+        if grid is None or grid.dataset is not dataset:
+            grid = _SESSION_GRIDS[session_id] = ResultsGrid(dataset)
+        return grid
+
+
+def drop_session_results_grid(session_id: str):
+    """Forgets the session's results grid."""
+
+    with _grids_lock:
+        _SESSION_GRIDS.pop(session_id, None)
+
+
+# endregion session registry
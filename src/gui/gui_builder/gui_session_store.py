@@ -0,0 +1,162 @@
+"""
+Server-side store of the text group values of each session. Handlers receive the
+session id and the changed values only, instead of every header, query and
+response of the page. The store holds at most GUI_SESSION_STORE_MAX_SESSIONS
+sessions in memory, least recently used ones are spilled to disk if enabled,
+and sessions idle for GUI_SESSION_STORE_TTL seconds are dropped.
+"""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from threading import Lock
+from time import time
+
+from src.config import (
+    GUI_SESSION_STORE_MAX_SESSIONS,
+    GUI_SESSION_STORE_SPILL,
+    GUI_SESSION_STORE_TTL,
+    SYS_SAMPLE_CSV_PATH,
+    SYS_SESSION_SPILL_PATH,
+)
+from src.gui.i18n import gui_text_en as txt
+from src.utils.log import logger
+
+
+@dataclass
+class SessionData:
+    """Text group values and upload metadata of one session, rows zero-based."""
+
+    headers: list[str] = field(default_factory=list)
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    # like last_uploaded_files_state, the sample names the document until an upload
+    uploaded_files: list[str] = field(default_factory=lambda: [SYS_SAMPLE_CSV_PATH])
+    has_headers: bool = True
+    # Markdown editor text as last synced by the client, see apply_text_diff
+    editor_md: str = ""
+    # edited system prompt and its hash version, None for the default prompt
+    system_prompt: str | None = None
+    system_prompt_version: str = ""
+
+    def set_rows(self, headers: list[str], inputs: list[str]):
+        """
+        Replaces all rows with uploaded values. Responses are kept for rows whose
+        header and query are unchanged, as their text groups are kept on render.
+        """
+
+        old_rows = list(zip(self.headers, self.inputs, self.outputs))
+        self.headers = list(headers)
+        self.inputs = list(inputs)
+        self.outputs = [
+            old_rows[i][2] if i < len(old_rows) and old_rows[i][:2] == row else ""
+            for i, row in enumerate(zip(self.headers, self.inputs))
+        ]
+
+    def set_value(self, row: int, column: str, value: str):
+        """Sets one header, input or output value, growing the rows as needed."""
+
+        values: list[str] = getattr(self, column)
+        if row >= len(values):
+            values.extend([""] * (row + 1 - len(values)))
+        values[row] = value
+
+    def get_rows(self, n_rows: int) -> tuple[list[str], list[str], list[str]]:
+        """Returns headers, inputs and outputs of the first `n_rows` text groups."""
+
+        def padded(values: list[str], default: str) -> list[str]:
+            return [values[i] if i < len(values) else default for i in range(n_rows)]
+
+        return (
+            padded(self.headers, txt.GUI_GRP_DYN_HEAD),
+            padded(self.inputs, ""),
+            padded(self.outputs, ""),
+        )
+
+
+_sessions: OrderedDict[str, tuple[float, SessionData]] = OrderedDict()
+_store_lock = Lock()
+
+
+def _get_spill_path(session_id: str) -> Path:
+    return Path(SYS_SESSION_SPILL_PATH, f"{session_id}.json")
+
+
+def _spill(session_id: str, data: SessionData):
+    """Writes an evicted session to disk, if spilling is enabled."""
+
+    if not GUI_SESSION_STORE_SPILL:
+        return
+    spill_path = _get_spill_path(session_id)
+    tmp_path = spill_path.with_name(f".{spill_path.name}.tmp")
+    try:
+        spill_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(dumps(asdict(data)), encoding="utf-8")
+        replace(tmp_path, spill_path)
+    except OSError as e:
+        logger.warning(f"[{session_id[:6]}] Could not spill session data: {e}")
+
+
+def _load_spilled(session_id: str) -> SessionData | None:
+    """Reads and removes a spilled session, None if missing or expired."""
+
+    spill_path = _get_spill_path(session_id)
+    try:
+        if time() - spill_path.stat().st_mtime > GUI_SESSION_STORE_TTL:
+            spill_path.unlink(missing_ok=True)
+            return None
+        data = SessionData(**loads(spill_path.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"[{session_id[:6]}] Could not load spilled session: {e}")
+        return None
+    spill_path.unlink(missing_ok=True)
+    return data
+
+
+def _evict(now: float):
+    """Drops expired sessions and spills the least recently used over the cap."""
+
+    for session_id, (last_used, _) in list(_sessions.items()):
+        if now - last_used <= GUI_SESSION_STORE_TTL:
+            break
+        del _sessions[session_id]
+    while len(_sessions) > GUI_SESSION_STORE_MAX_SESSIONS:
+        session_id, (_, data) = _sessions.popitem(last=False)
+        _spill(session_id, data)
+
+
+def get_session_data(session_id: str) -> SessionData:
+    """
+    Returns the session's data, restoring it from disk if it was spilled or
+    creating it on first use, and marks the session as recently used.
+    """
+
+    now = time()
+    with _store_lock:
+        entry = _sessions.pop(session_id, None)
+        data = entry[1] if entry else _load_spilled(session_id) or SessionData()
+        _sessions[session_id] = (now, data)
+        _evict(now)
+    return data
+
+
+def drop_session_data(session_id: str):
+    """Forgets the session's data in memory and on disk."""
+
+    with _store_lock:
+        _sessions.pop(session_id, None)
+    _get_spill_path(session_id).unlink(missing_ok=True)
+
+
+def get_session_store_stats() -> dict:
+    """Returns the number of sessions held in memory and spilled to disk."""
+
+    spill_dir = Path(SYS_SESSION_SPILL_PATH)
+    with _store_lock:
+        in_memory = len(_sessions)
+    spilled = len(list(spill_dir.glob("*.json"))) if spill_dir.exists() else 0
+    return {"in_memory": in_memory, "spilled": spilled}
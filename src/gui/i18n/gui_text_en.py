@@ -20,6 +20,7 @@ GUI_GRP_UPLOAD_SEC_HEAD_OUTPUTS = "Outputs"
 GUI_BTN_ADD_GRP_LBL = "Add Text Group"
 GUI_BTN_DEL_GRP_LBL = "Remove Text Group"
 GUI_BTN_UPLOAD_LBL = "Upload CSV"
+GUI_BTN_CHUNKED_UPLOAD_LBL = "Upload large CSV"
 GUI_BTN_LOAD_SAMPLE_LBL = "Load Sample"
 GUI_BTN_UPL_CSV_TOGGLE_HEAD_LBL = "Toggle headers"
 GUI_BTN_UPL_PREV_CSV_ON_LBL = "Show Preview"
@@ -29,12 +30,47 @@ GUI_BTN_OUTPUT_PREVIEW_OFF_LBL = "Hide Generated Output"
 GUI_BTN_DOWNLOAD_HTML = "Download HTML"
 GUI_BTN_DOWNLOAD_PDF = "Download PDF"
 GUI_BTN_DOWNLOAD_DOCX = "Download DOCX"
+GUI_BTN_DOWNLOAD_ALL = "Download all (zip)"
 GUI_BTN_EDIT_SYS_PROMPT = "Edit System Prompt"
 GUI_BTN_SUBMIT_LBL = "Submit"
 GUI_BTN_SUBMIT_ALL_LBL = "Submit all"
+GUI_BTN_RUN_BATCH_LBL = "Process all rows"
+GUI_BTN_BATCH_EXPORT_LBL = "Export results"
 GUI_BTN_TGL_COLLAPSE_LBL = "[-] Collapse"
 GUI_BTN_TGL_EXPAND_LBL = "[+] Expand"
 GUI_TXT_CSV_UPLOAD_PREVIEW = "File Preview"
+GUI_BTN_PREVIEW_PREV_LBL = "< Prev"
+GUI_BTN_PREVIEW_NEXT_LBL = "Next >"
+GUI_TXT_PREVIEW_PAGE_LBL = "Page"
+GUI_TXT_PREVIEW_SORT_LBL = "Sort by"
+GUI_TXT_PREVIEW_ORDER_LBL = "Order"
+GUI_TXT_PREVIEW_ORDER_ASC = "Ascending"
+GUI_TXT_PREVIEW_ORDER_DESC = "Descending"
+GUI_TXT_PREVIEW_SORT_NONE = "(file order)"
+GUI_TXT_PREVIEW_ORIGIN_COL = "File"
+GUI_TXT_PREVIEW_FILTER_LBL = "Filter"
+GUI_TXT_PREVIEW_FILTER_PLACEHOLDER = "Type and press Enter to filter rows..."
+GUI_TXT_PREVIEW_PAGE_INFO = "Rows {start}-{end} of {total}, page {page} of {pages}"
+GUI_TXT_RESULTS_HEAD = "Results"
+GUI_TXT_RESULTS_GRID_LBL = "All rows, click Submit to query a row"
+GUI_TXT_RESULTS_HEADERS = ["Row", "Title", "Query", "Response", "Status", ""]
+GUI_TXT_RESULTS_STATUS_RUNNING = "running"
+GUI_TXT_RESULTS_STATUS_DONE = "done"
+GUI_TXT_RESULTS_STATUS_ERROR = "error"
+GUI_BTN_RESULTS_SUBMIT_ROW_LBL = "Submit"
+GUI_BTN_RESULTS_SUBMIT_PAGE_LBL = "Submit page"
+GUI_BTN_RESULTS_EXPORT_LBL = "Export results"
+GUI_TXT_RESULTS_EXPORT_FORMAT_LBL = "Results format"
+GUI_TXT_RESULTS_EXPORT_FILE_LBL = "Exported results"
+GUI_TXT_BATCH_HEAD = "Batch progress"
+GUI_TXT_BATCH_OUTPUT_LBL = "Batch results"
+GUI_TXT_BATCH_PROGRESS = (
+    "{name}: {done}/{total} rows ({status}), {rate:.1f} rows/s, ETA {eta}"
+)
+GUI_TXT_BATCH_EXPORT_FORMAT_LBL = "Results format"
+GUI_TXT_BATCH_EXPORT_FILES_LBL = "Exported results"
+GUI_TXT_BATCH_NOT_STARTED = "No batch job could be started for the uploaded files."
+GUI_TXT_BUNDLE_EMPTY = "Generate the output first, there is nothing to download yet."
 GUI_TXT_UPLOAD_LBL = "Uploaded File Paths"
 GUI_TXT_MARKDOWN_PREVIEW_LBL = "Markdown Preview"
 GUI_TXT_MARKDOWN_EDITOR_LBL = "Markdown Editor"
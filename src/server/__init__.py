@@ -0,0 +1,3 @@
+"""
+HTTP server around the Gradio app, mounting additional API routes next to the UI.
+"""
@@ -0,0 +1,283 @@
+"""
+Multi-process deployment: SERVER_WORKERS app workers, each a uvicorn process
+serving `create_app()` on a local port, behind a sticky-session router on
+SERVER_PORT. A browser stays on the worker of its first request through the
+SERVER_CLUSTER_COOKIE cookie, so the Gradio queue and in-memory session state
+stay on one worker. Uploads, downloads, batch jobs, export bundles and session
+activity are in shared local stores, so a session moved to another worker after
+a failure keeps its files and any worker serves its exports. The router answers
+the health probes itself and is ready once any worker is.
+"""
+
+from asyncio import gather
+from os import environ
+from subprocess import Popen, TimeoutExpired
+from sys import executable
+from threading import Event, Thread
+from time import monotonic
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import httpx
+from starlette.background import BackgroundTask
+import uvicorn
+
+from src.config import (
+    PROJECT_NAME,
+    SERVER_CLUSTER_COOKIE,
+    SERVER_HEALTH_ROUTE,
+    SERVER_NAME,
+    SERVER_PORT,
+    SERVER_READY_ROUTE,
+    SERVER_WARMUP_TIMEOUT,
+    SERVER_WORKER_HOST,
+    SERVER_WORKER_PORT_START,
+    SERVER_WORKER_RETRY_AFTER,
+    SERVER_WORKERS,
+)
+from src.utils.log import logger
+
+# headers of one connection, not forwarded between client, router and worker
+_HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+_PROXY_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+_ROUTER_STATS_PATH = "/cluster/stats"
+
+
+class WorkerPool:
+    """Addresses of the app workers, their open requests and failures."""
+
+    def __init__(self, urls: list[str]):
+        self.urls = urls
+        self._active = [0] * len(urls)
+        self._down_until = [0.0] * len(urls)
+        self._next = 0
+
+    def is_up(self, index: int) -> bool:
+        return monotonic() >= self._down_until[index]
+
+    def mark_down(self, index: int):
+        """Routes no new sessions to a failed worker for a while."""
+
+        self._down_until[index] = monotonic() + SERVER_WORKER_RETRY_AFTER
+
+    def pick(self, sticky: int | None, tried: list[int]) -> int | None:
+        """
+        Returns the sticky worker if it is up, otherwise the worker with the
+        fewest open requests, in turn on ties. None if all were tried.
+        """
+
+        if sticky is not None and sticky not in tried and self.is_up(sticky):
+            return sticky
+        candidates = [i for i in range(len(self.urls)) if i not in tried]
+        up = [i for i in candidates if self.is_up(i)]
+        if not (up or candidates):
+            return None
+        n_workers = len(self.urls)
+        index = min(
+            up or candidates,
+            key=lambda i: (self._active[i], (i - self._next) % n_workers),
+        )
+        self._next = (index + 1) % n_workers
+        return index
+
+    def acquire(self, index: int):
+        self._active[index] += 1
+
+    def release(self, index: int):
+        self._active[index] -= 1
+
+    def get_stats(self) -> list[dict]:
+        return [
+            {"url": url, "up": self.is_up(i), "open_requests": self._active[i]}
+            for i, url in enumerate(self.urls)
+        ]
+
+
+def _parse_worker_cookie(value: str | None, n_workers: int) -> int | None:
+    """Returns the worker index of the sticky cookie, None if missing or invalid."""
+
+    if value is None or not value.isdigit() or int(value) >= n_workers:
+        return None
+    return int(value)
+
+
+def _get_forward_headers(request: Request) -> list[tuple[str, str]]:
+    """Returns the request headers for the worker. Host is kept for Gradio URLs."""
+
+    headers = [
+        (key, value)
+        for key, value in request.headers.items()
+        if key.lower() not in _HOP_BY_HOP_HEADERS and key.lower() != "content-length"
+    ]
+    client_host = request.client.host if request.client else ""
+    headers.append(("x-forwarded-for", client_host))
+    headers.append(("x-forwarded-proto", request.url.scheme))
+    return headers
+
+
+def create_router_app(
+    worker_urls: list[str], transport: httpx.AsyncBaseTransport | None = None
+) -> FastAPI:
+    """
+    Create the router app proxying every request, including Gradio's streamed
+    queue events, to the sticky worker of the client.
+    """
+
+    workers = WorkerPool(worker_urls)
+    # streamed responses, e.g. queue events and bundles, have no read timeout
+    client = httpx.AsyncClient(
+        transport=transport, timeout=httpx.Timeout(None, connect=5.0)
+    )
+    router_app = FastAPI(title=f"{PROJECT_NAME} router", on_shutdown=[client.aclose])
+    router_app.state.workers = workers
+
+    @router_app.get(_ROUTER_STATS_PATH)
+    def get_router_stats() -> JSONResponse:
+        """Returns the workers, whether they take new sessions and open requests."""
+
+        return JSONResponse({"workers": workers.get_stats()})
+
+    @router_app.get(SERVER_HEALTH_ROUTE)
+    def get_router_health() -> JSONResponse:
+        """Returns ok while the router serves requests."""
+
+        return JSONResponse({"status": "ok"})
+
+    @router_app.get(SERVER_READY_ROUTE)
+    async def get_router_ready() -> JSONResponse:
+        """Returns the readiness of every worker, with HTTP 503 if none is ready."""
+
+        async def is_ready(url: str) -> bool:
+            try:
+                response = await client.get(
+                    f"{url}{SERVER_READY_ROUTE}", timeout=SERVER_WARMUP_TIMEOUT
+                )
+            except httpx.HTTPError:
+                return False
+            return response.status_code == 200
+
+        ready = await gather(*(is_ready(url) for url in worker_urls))
+        report = {
+            "ready": any(ready),
+            "workers": [
+                {"url": url, "ready": worker_ready}
+                for url, worker_ready in zip(worker_urls, ready)
+            ],
+        }
+        return JSONResponse(report, status_code=200 if any(ready) else 503)
+
+    @router_app.api_route("/{path:path}", methods=_PROXY_METHODS)
+    async def proxy(request: Request, path: str) -> Response:
+        sticky = _parse_worker_cookie(
+            request.cookies.get(SERVER_CLUSTER_COOKIE), len(worker_urls)
+        )
+        # bodies are small, uploads come in chunks, and can be sent again
+        body = await request.body()
+        tried: list[int] = []
+        while (index := workers.pick(sticky, tried)) is not None:
+            url = httpx.URL(
+                f"{worker_urls[index]}{request.url.path}",
+                query=request.url.query.encode("utf-8"),
+            )
+            upstream_request = client.build_request(
+                request.method, url, headers=_get_forward_headers(request), content=body
+            )
+            workers.acquire(index)
+            try:
+                upstream = await client.send(upstream_request, stream=True)
+            except httpx.ConnectError as e:
+                # nothing reached the worker, so any request can be retried
+                workers.release(index)
+                workers.mark_down(index)
+                tried.append(index)
+                logger.warning(f"App worker {index} not reachable: {e}")
+                continue
+            except httpx.HTTPError as e:
+                workers.release(index)
+                msg = f"Error while proxying to app worker {index}: {e}"
+                logger.error(msg)
+                return Response(msg, status_code=502)
+
+            async def close(upstream=upstream, index=index):
+                await upstream.aclose()
+                workers.release(index)
+
+            response = StreamingResponse(
+                upstream.aiter_raw(),
+                status_code=upstream.status_code,
+                background=BackgroundTask(close),
+            )
+            response.raw_headers = [
+                (key, value)
+                for key, value in upstream.headers.raw
+                if key.decode("latin-1").lower() not in _HOP_BY_HOP_HEADERS
+            ]
+            if index != sticky:
+                response.set_cookie(
+                    SERVER_CLUSTER_COOKIE, str(index), httponly=True, samesite="lax"
+                )
+            return response
+
+        msg = "No app worker available"
+        logger.error(msg)
+        return Response(msg, status_code=502)
+
+    return router_app
+
+
+def _spawn_worker(index: int, port: int) -> Popen:
+    """Starts one app worker process on the local `port`."""
+
+    env = {**environ, "SERVER_WORKER_INDEX": str(index)}
+    command = [executable, "-m", "uvicorn", "src.app:create_app", "--factory"]
+    command += ["--host", SERVER_WORKER_HOST, "--port", str(port)]
+    logger.info(f"Starting app worker {index} on {SERVER_WORKER_HOST}:{port}")
+    return Popen(command, env=env)
+
+
+def _supervise(workers: list[Popen], ports: list[int], stop: Event):
+    """Restarts workers that exited until `stop` is set."""
+
+    while not stop.wait(1.0):
+        for index, process in enumerate(workers):
+            if process.poll() is not None:
+                logger.warning(
+                    f"App worker {index} exited with {process.returncode}, restarting"
+                )
+                workers[index] = _spawn_worker(index, ports[index])
+
+
+def run_cluster(n_workers: int = SERVER_WORKERS):
+    """Runs `n_workers` app workers and the sticky-session router until stopped."""
+
+    ports = [SERVER_WORKER_PORT_START + i for i in range(n_workers)]
+    workers = [_spawn_worker(index, port) for index, port in enumerate(ports)]
+    stop = Event()
+    Thread(
+        target=_supervise,
+        args=(workers, ports, stop),
+        name="worker-supervisor",
+        daemon=True,
+    ).start()
+    worker_urls = [f"http://{SERVER_WORKER_HOST}:{port}" for port in ports]
+    try:
+        logger.info(f"Routing {SERVER_NAME}:{SERVER_PORT} to {n_workers} app workers")
+        uvicorn.run(create_router_app(worker_urls), host=SERVER_NAME, port=SERVER_PORT)
+    finally:
+        stop.set()
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            try:
+                process.wait(timeout=10)
+            except TimeoutExpired:
+                process.kill()
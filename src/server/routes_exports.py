@@ -0,0 +1,36 @@
+"""
+API routes for document exports mounted next to the Gradio app.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from src.config import SERVER_EXPORTS_ROUTE
+from src.gui.gui_builder.gui_export_bundle import (
+    iter_export_bundle_zip,
+    pop_export_bundle,
+)
+from src.gui.gui_builder.gui_export_pool import get_export_stats
+
+router = APIRouter(prefix=SERVER_EXPORTS_ROUTE, tags=["exports"])
+
+
+@router.get("/stats")
+def get_exports_stats() -> dict:
+    """Returns export queue depth and per-format durations."""
+
+    return get_export_stats()
+
+
+@router.get("/bundle/{token}")
+def get_export_bundle(token: str) -> StreamingResponse:
+    """Streams all export formats and the results CSV of a bundle as zip."""
+
+    bundle = pop_export_bundle(token)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired bundle")
+    return StreamingResponse(
+        iter_export_bundle_zip(bundle),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{bundle.file_name}"'},
+    )
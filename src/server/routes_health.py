@@ -0,0 +1,27 @@
+"""
+API routes for the platform's health probes, mounted next to the Gradio app:
+liveness of the process and readiness after the startup warm-up.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.config import SERVER_HEALTH_ROUTE, SERVER_READY_ROUTE
+from src.server.warmup import get_readiness
+
+router = APIRouter(tags=["health"])
+
+
+@router.get(SERVER_HEALTH_ROUTE)
+def get_health() -> dict:
+    """Returns ok while the process serves requests."""
+
+    return {"status": "ok"}
+
+
+@router.get(SERVER_READY_ROUTE)
+def get_ready() -> JSONResponse:
+    """Returns the warm-up checks, with HTTP 503 until the required ones passed."""
+
+    ready, report = get_readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
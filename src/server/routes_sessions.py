@@ -0,0 +1,18 @@
+"""
+API routes reporting the session lifecycle, mounted next to the Gradio app.
+"""
+
+from fastapi import APIRouter
+
+from src.config import SERVER_SESSIONS_ROUTE
+from src.gui.gui_builder.gui_session_store import get_session_store_stats
+from src.server.session_lifecycle import get_session_stats
+
+router = APIRouter(prefix=SERVER_SESSIONS_ROUTE, tags=["sessions"])
+
+
+@router.get("/stats")
+def get_sessions_stats() -> dict:
+    """Returns live sessions, freed bytes and the session store occupancy."""
+
+    return {**get_session_stats(), "store": get_session_store_stats()}
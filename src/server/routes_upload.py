@@ -0,0 +1,56 @@
+"""
+API routes for chunked, resumable uploads mounted next to the Gradio app.
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from src.config import GUI_UPLOAD_CHUNK_SIZE, SERVER_CHUNKED_UPLOAD_ROUTE
+from src.server.upload_chunks import get_upload_status, write_upload_chunk
+from src.utils.log import logger
+
+router = APIRouter(prefix=SERVER_CHUNKED_UPLOAD_ROUTE, tags=["upload"])
+
+
+@router.get("/{session_id}/{file_name}")
+def get_chunked_upload_status(session_id: str, file_name: str) -> dict:
+    """Returns the resume offset of an upload."""
+
+    try:
+        return get_upload_status(session_id, file_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.put("/{session_id}/{file_name}")
+async def put_upload_chunk(
+    session_id: str, file_name: str, offset: int, total: int, request: Request
+) -> JSONResponse:
+    """
+    Writes one chunk at `offset` of a file of `total` bytes. Answers 409 with the
+    expected offset if the chunk does not continue the upload.
+    """
+
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > GUI_UPLOAD_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > GUI_UPLOAD_CHUNK_SIZE:
+            raise HTTPException(status_code=413, detail="Chunk too large")
+
+    try:
+        accepted, status = await run_in_threadpool(
+            write_upload_chunk, session_id, file_name, offset, total, bytes(data)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        msg = f"Unexpected error while writing upload chunk: {e}"
+        logger.exception(msg)
+        raise HTTPException(status_code=500, detail=msg) from e
+
+    return JSONResponse(status, status_code=200 if accepted else 409)
@@ -0,0 +1,24 @@
+"""
+FastAPI server that mounts the Gradio Blocks app together with additional API
+routes, e.g. chunked uploads, export and session stats and health probes.
+"""
+
+from fastapi import FastAPI
+import gradio as gr
+
+from src.config import PROJECT_NAME
+from src.server.routes_exports import router as exports_router
+from src.server.routes_health import router as health_router
+from src.server.routes_sessions import router as sessions_router
+from src.server.routes_upload import router as upload_router
+
+
+def create_server_app(blocks: gr.Blocks) -> FastAPI:
+    """Create the FastAPI app serving the API routes and the Gradio UI at '/'."""
+
+    server_app = FastAPI(title=PROJECT_NAME)
+    server_app.include_router(upload_router)
+    server_app.include_router(exports_router)
+    server_app.include_router(sessions_router)
+    server_app.include_router(health_router)
+    return gr.mount_gradio_app(server_app, blocks, path="", pwa=True)
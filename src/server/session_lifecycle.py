@@ -0,0 +1,340 @@
+"""
+Session lifecycle: tracks activity of GUI sessions and removes their upload and
+download folders and in-memory state once they end. Sessions end when Gradio
+deletes the session state on unload, or after SYS_SESSION_TTL seconds without
+activity, checked by a background sweep. The sweep also enforces per-session and
+global disk quotas, evicting the least recently used files and sessions first.
+Activity is also kept as marker files in SYS_SESSION_ACTIVITY_PATH, so the sweep
+of one app worker sees the sessions of all workers. Every worker refreshes the
+markers of its connected sessions on each sweep interval, so open pages never
+expire. Sessions of open pages only lose downloads, which can be rendered
+again, and are never ended for quota. Partial uploads are never evicted.
+"""
+
+from dataclasses import dataclass
+from os import walk
+from pathlib import Path
+from shutil import rmtree
+from threading import Event, Lock, Thread
+from time import time
+
+from src.batch.job_store import JOB_STATUS_RUNNING, get_job, list_jobs
+from src.config import (
+    SYS_DOWNLOAD_PATH,
+    SYS_SESSION_ACTIVITY_PATH,
+    SYS_SESSION_MAX_BYTES,
+    SYS_SESSION_SWEEP_INTERVAL,
+    SYS_SESSION_TTL,
+    SYS_SESSIONS_MAX_BYTES,
+    SYS_UPLOAD_PATH,
+)
+from src.gui.gui_builder.gui_csv_index import set_session_row_index
+from src.gui.gui_builder.gui_export_cache import drop_session_output_locks
+from src.gui.gui_builder.gui_export_prerender import cancel_prerender
+from src.gui.gui_builder.gui_report_document import drop_session_document
+from src.gui.gui_builder.gui_results_grid import drop_session_results_grid
+from src.gui.gui_builder.gui_session_store import drop_session_data
+from src.server.upload_chunks import drop_session_uploads
+from src.utils.log import logger
+
+# session folders in order of eviction, exports can be rendered again
+_SESSION_ROOTS = (SYS_DOWNLOAD_PATH, SYS_UPLOAD_PATH)
+# suffix of chunked uploads still arriving, see upload_chunks
+_PARTIAL_UPLOAD_SUFFIX = ".part"
+
+
+@dataclass
+class _SessionUsage:
+    """Files and last activity of one session on disk."""
+
+    files: list[tuple[float, int, Path]]
+    last_active: float
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.files)
+
+
+_last_seen: dict[str, float] = {}
+_connected: set[str] = set()
+_stats = {"sweeps": 0, "freed_bytes": 0, "ended_sessions": 0, "last_sweep": None}
+_lock = Lock()
+_sweeper_stop = Event()
+_sweeper: Thread | None = None
+
+
+def _get_activity_path(session_id: str) -> Path:
+    return Path(SYS_SESSION_ACTIVITY_PATH, session_id)
+
+
+def touch_session(session_id: str):
+    """Marks a session as active now, for this and all other workers."""
+
+    if not session_id:
+        return
+    with _lock:
+        _last_seen[session_id] = time()
+    activity_path = _get_activity_path(session_id)
+    try:
+        activity_path.parent.mkdir(parents=True, exist_ok=True)
+        activity_path.touch()
+    except OSError as e:
+        logger.warning(f"[{session_id[:6]}] Could not mark session activity: {e}")
+
+
+def _get_shared_last_seen(session_id: str) -> float:
+    """Returns the last activity of a session on any worker, 0 if unknown."""
+
+    try:
+        shared = _get_activity_path(session_id).stat().st_mtime
+    except OSError:
+        shared = 0.0
+    return max(_last_seen.get(session_id, 0.0), shared)
+
+
+def register_session(session_id: str) -> str:
+    """Marks the session of a page load as connected. Returns the session id."""
+
+    touch_session(session_id)
+    with _lock:
+        _connected.add(session_id)
+    return session_id
+
+
+def refresh_connected_sessions() -> int:
+    """
+    Marks the sessions connected to this worker as active, so the sweep of any
+    worker keeps them. Returns their count.
+    """
+
+    with _lock:
+        connected = list(_connected)
+    for session_id in connected:
+        touch_session(session_id)
+    return len(connected)
+
+
+def close_session(session_id: str):
+    """Ends a session whose page was closed or reloaded."""
+
+    with _lock:
+        _connected.discard(session_id)
+    try:
+        end_session(session_id)
+    except Exception as e:
+        logger.exception(f"[{str(session_id)[:6]}] Error while ending session: {e}")
+
+
+def _get_busy_sessions() -> set[str]:
+    """Returns sessions whose batch jobs still write into their download folder."""
+
+    jobs = (get_job(job_id) for job_id in list_jobs(JOB_STATUS_RUNNING))
+    return {job["session_id"] for job in jobs if job is not None}
+
+
+def _scan_session(session_id: str) -> _SessionUsage:
+    """
+    Lists the files of a session in order of eviction, downloads before uploads
+    and oldest first, with the last activity of the session.
+    """
+
+    files = []
+    for root in _SESSION_ROOTS:
+        root_files = []
+        for dir_path, _, file_names in walk(Path(root, session_id)):
+            for file_name in file_names:
+                path = Path(dir_path, file_name)
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                root_files.append((stat.st_mtime, stat.st_size, path))
+        files += sorted(root_files)
+    last_active = max(
+        [_get_shared_last_seen(session_id)] + [mtime for mtime, _, _ in files]
+    )
+    return _SessionUsage(files, last_active)
+
+
+def _list_session_ids() -> set[str]:
+    """Returns all sessions with a folder or recent activity."""
+
+    session_ids = set(_last_seen)
+    activity_root = Path(SYS_SESSION_ACTIVITY_PATH)
+    if activity_root.exists():
+        session_ids.update(entry.name for entry in activity_root.iterdir())
+    for root in _SESSION_ROOTS:
+        root_path = Path(root)
+        if root_path.exists():
+            session_ids.update(
+                entry.name
+                for entry in root_path.iterdir()
+                if entry.is_dir() and not entry.name.startswith(".")
+            )
+    return session_ids
+
+
+def end_session(session_id: str) -> int:
+    """
+    Removes the session's folders and in-memory state. Sessions with running
+    batch jobs keep their folders until a later sweep. Returns the bytes freed.
+    """
+
+    cancel_prerender(session_id)
+    drop_session_output_locks(session_id)
+    set_session_row_index(session_id, None)
+    drop_session_document(session_id)
+    drop_session_results_grid(session_id)
+    drop_session_data(session_id)
+    drop_session_uploads(session_id)
+    if session_id in _get_busy_sessions():
+        logger.info(f"[{session_id[:6]}] Batch job running, keeping session files")
+        return 0
+
+    freed = _scan_session(session_id).size
+    for root in _SESSION_ROOTS:
+        rmtree(Path(root, session_id), ignore_errors=True)
+    _get_activity_path(session_id).unlink(missing_ok=True)
+    with _lock:
+        _last_seen.pop(session_id, None)
+        _stats["freed_bytes"] += freed
+        _stats["ended_sessions"] += 1
+    logger.info(f"[{session_id[:6]}] Session ended, freed {freed} bytes")
+    return freed
+
+
+def _is_live(session_id: str, connected: set[str], now: float) -> bool:
+    """
+    Returns whether a session has an open page, on this worker or on another one
+    that refreshed its activity marker within the last sweep intervals.
+    """
+
+    recent = now - _get_shared_last_seen(session_id) < 2 * SYS_SESSION_SWEEP_INTERVAL
+    return session_id in connected or recent
+
+
+def _trim_session(
+    session_id: str, usage: _SessionUsage, max_bytes: int, live: bool = False
+) -> int:
+    """
+    Removes the oldest files of a session until it fits `max_bytes`. Partial
+    uploads are kept, and with `live` all uploads, so only downloads are removed.
+    """
+
+    download_root = Path(_SESSION_ROOTS[0], session_id)
+    freed, size = 0, usage.size
+    for entry in list(usage.files):
+        _, file_size, path = entry
+        if size <= max_bytes:
+            break
+        if path.name.endswith(_PARTIAL_UPLOAD_SUFFIX):
+            continue
+        if live and not path.is_relative_to(download_root):
+            continue
+        path.unlink(missing_ok=True)
+        usage.files.remove(entry)
+        size -= file_size
+        freed += file_size
+    if freed:
+        logger.info(f"[{session_id[:6]}] Over quota, evicted {freed} bytes")
+    return freed
+
+
+def sweep_sessions(now: float | None = None) -> dict:
+    """
+    Ends sessions idle for SYS_SESSION_TTL, trims sessions over SYS_SESSION_MAX_BYTES
+    and ends least recently used sessions while all exceed SYS_SESSIONS_MAX_BYTES.
+    Sessions with running batch jobs are skipped, live sessions never idle, are
+    only trimmed of downloads and are never ended for quota. Returns what the
+    sweep freed.
+    """
+
+    now = time() if now is None else now
+    busy = _get_busy_sessions()
+    with _lock:
+        connected = set(_connected)
+    freed, trimmed, ended, evicted = 0, 0, 0, 0
+    usages: dict[str, _SessionUsage] = {}
+    live: set[str] = set()
+    for session_id in _list_session_ids() - busy:
+        usage = _scan_session(session_id)
+        if _is_live(session_id, connected, now):
+            live.add(session_id)
+        elif now - usage.last_active > SYS_SESSION_TTL:
+            freed += end_session(session_id)
+            ended += 1
+            continue
+        trimmed += _trim_session(
+            session_id, usage, SYS_SESSION_MAX_BYTES, session_id in live
+        )
+        usages[session_id] = usage
+
+    total = sum(usage.size for usage in usages.values())
+    for session_id, usage in sorted(usages.items(), key=lambda u: u[1].last_active):
+        if total <= SYS_SESSIONS_MAX_BYTES:
+            break
+        if session_id in live:
+            continue
+        total -= usage.size
+        freed += end_session(session_id)
+        evicted += 1
+
+    result = {
+        "freed_bytes": freed + trimmed,
+        "ended_sessions": ended + evicted,
+        "live_sessions": len(usages) - evicted + len(busy),
+        "bytes_on_disk": max(0, total),
+    }
+    with _lock:
+        _stats["sweeps"] += 1
+        _stats["freed_bytes"] += trimmed  # ended sessions counted themselves
+        _stats["last_sweep"] = {"at": now, **result}
+    if freed or trimmed:
+        logger.info(
+            f"Session sweep freed {freed + trimmed} bytes, "
+            f"ended {ended} idle and {evicted} over quota sessions"
+        )
+    return result
+
+
+def get_session_stats() -> dict:
+    """Returns connected and tracked sessions and what sweeps freed so far."""
+
+    with _lock:
+        return {
+            "connected_sessions": len(_connected),
+            "tracked_sessions": len(_last_seen),
+            **_stats,
+        }
+
+
+def _run_sweeper(sweep: bool):
+    while not _sweeper_stop.wait(SYS_SESSION_SWEEP_INTERVAL):
+        try:
+            refresh_connected_sessions()
+            if sweep:
+                sweep_sessions()
+        except Exception as e:
+            logger.exception(f"Session sweep failed: {e}")
+
+
+def start_session_sweeper(sweep: bool = True):
+    """
+    Starts the background thread once per process. It refreshes the activity of
+    connected sessions and, with `sweep`, sweeps the sessions of all workers.
+    """
+
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    _sweeper_stop.clear()
+    _sweeper = Thread(
+        target=_run_sweeper, args=(sweep,), name="session-sweeper", daemon=True
+    )
+    _sweeper.start()
+
+
+def stop_session_sweeper():
+    """Stops the background sweep thread."""
+
+    _sweeper_stop.set()
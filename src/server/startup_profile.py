@@ -0,0 +1,99 @@
+"""
+Startup time profile of the app, printed by `python -m src.app --profile-startup`:
+import time per package, measured in a fresh interpreter with `-X importtime`,
+the timed phases of `create_app`, the first request to the built app and the
+warm-up checks running in the background meanwhile.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from subprocess import run
+from sys import executable
+from time import perf_counter
+
+from src.utils.log import logger
+
+_IMPORT_TIME_PREFIX = "import time:"
+
+_phases: dict[str, float] = {}
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Times a startup phase of the app, kept for the startup profile."""
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = perf_counter() - start
+        logger.debug(f"Startup phase '{name}' took {_phases[name]:.3f}s")
+
+
+def get_startup_phases() -> dict[str, float]:
+    """Returns the seconds per startup phase timed so far, in order."""
+
+    return dict(_phases)
+
+
+def _get_import_group(module: str) -> str:
+    """Returns the package an import is accounted to, app modules per subpackage."""
+
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+
+
+def parse_import_times(importtime_output: str) -> dict[str, float]:
+    """Sums the self times of `-X importtime` output per package, in seconds."""
+
+    totals: dict[str, float] = defaultdict(float)
+    for line in importtime_output.splitlines():
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+        self_us, _, module = line[len(_IMPORT_TIME_PREFIX) :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        totals[_get_import_group(module.strip())] += int(self_us) / 1e6
+    return dict(totals)
+
+
+def profile_imports(module: str = "src.app") -> dict[str, float]:
+    """Imports `module` in a fresh interpreter, returns import seconds per package."""
+
+    result = run(
+        [executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        msg = f"Importing {module} failed with exit code {result.returncode}"
+        logger.error(msg)
+    return parse_import_times(result.stderr)
+
+
+def format_startup_profile(
+    imports: dict[str, float],
+    phases: dict[str, float],
+    warmup: dict[str, float] | None = None,
+    top: int = 15,
+) -> str:
+    """
+    Returns the profile as text: slowest imports, phases and their totals, and
+    the warm-up checks, which are not on the way to the first response.
+    """
+
+    import_total = sum(imports.values())
+    phase_total = sum(phases.values())
+    lines = [f"Imports {import_total:8.3f}s"]
+    for package, seconds in sorted(imports.items(), key=lambda kv: -kv[1])[:top]:
+        lines.append(f"  {package:<32} {seconds:8.3f}s")
+    lines.append(f"Startup {phase_total:8.3f}s")
+    for name, seconds in phases.items():
+        lines.append(f"  {name:<32} {seconds:8.3f}s")
+    lines.append(f"Time to first response {import_total + phase_total:8.3f}s")
+    if warmup:
+        lines.append(f"Warm-up (background) {sum(warmup.values()):8.3f}s")
+        for name, seconds in warmup.items():
+            lines.append(f"  {name:<32} {seconds:8.3f}s")
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+Chunked, resumable uploads streamed straight into the session's upload area.
+The first chunk is validated for header and dialect, and rows are indexed while
+later chunks are still arriving, so large files never land in memory at once.
+"""
+
+from csv import Error, Sniffer
+from dataclasses import dataclass, field
+from pathlib import Path
+from re import fullmatch
+from threading import Lock
+
+from pathvalidate import sanitize_filename
+
+from src.config import (
+    GUI_MAX_FILE_SIZE_CHUNKED_UPLOAD,
+    GUI_UPLOAD_CHUNK_SIZE,
+    GUI_UPLOAD_MAX_ROWS,
+    SYS_SESSION_MAX_BYTES,
+)
+from src.gui.gui_builder.gui_csv_index import (
+    CsvDatasetIndex,
+    CsvIndexBuilder,
+    CsvRowIndex,
+    set_session_row_index,
+)
+from src.gui.gui_builder.gui_file_utils import create_path, get_path_session_id
+from src.utils.log import logger
+
+
+@dataclass
+class ChunkedUpload:
+    """State of one in-flight chunked upload."""
+
+    part_path: Path
+    final_path: Path
+    total_size: int
+    builder: CsvIndexBuilder
+    received: int = 0
+    lock: Lock = field(default_factory=Lock)
+
+
+_ACTIVE_UPLOADS: dict[tuple[str, str], ChunkedUpload] = {}
+_ACTIVE_UPLOADS_LOCK = Lock()
+
+
+def _resolve_paths(session_id: str, file_name: str) -> tuple[Path, Path]:
+    """
+    Validates session id and file name and returns the (part, final) paths inside
+    the session's upload folder. Raises ValueError on invalid input.
+    """
+
+    if not isinstance(session_id, str) or not fullmatch(r"[0-9a-f]{16,64}", session_id):
+        msg = "Invalid session_id"
+        logger.warning(msg)
+        raise ValueError(msg)
+
+    sanitized_name = sanitize_filename(file_name)
+    if not sanitized_name.endswith(".csv"):
+        msg = f"Only CSV files can be uploaded in chunks: {file_name}"
+        logger.warning(msg)
+        raise ValueError(msg)
+
+    upload_path = get_path_session_id(session_id)
+    if isinstance(upload_path, str):
+        raise ValueError(upload_path)
+    create_path(upload_path)
+    final_path = Path(upload_path) / sanitized_name
+    return final_path.with_name(f"{sanitized_name}.part"), final_path
+
+
+def _validate_first_chunk(data: bytes) -> bool:
+    """
+    Validates encoding, header and dialect of the first chunk. Returns whether the
+    file appears to have a header row. Raises ValueError if invalid.
+    """
+
+    head = data[:4096]
+    try:
+        sample = head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # tolerate a multi-byte character cut at the sample boundary only
+        if e.reason != "unexpected end of data":
+            msg = f"Invalid encoding, expected UTF-8: {e}"
+            logger.error(msg)
+            raise ValueError(msg) from e
+        sample = head[: e.start].decode("utf-8")
+    try:
+        dialect = Sniffer().sniff(sample, delimiters=",;\t|")
+        has_header = Sniffer().has_header(sample)
+    except Error as e:
+        msg = f"Invalid CSV structure: {e}"
+        logger.error(msg)
+        raise ValueError(msg) from e
+    if dialect.delimiter != "," or dialect.quotechar != '"':
+        msg = f"Unsupported CSV dialect, delimiter '{dialect.delimiter}'"
+        logger.error(msg)
+        raise ValueError(msg)
+    return has_header
+
+
+def _get_or_resume_upload(
+    session_id: str, file_name: str, total_size: int | None = None
+) -> ChunkedUpload | None:
+    """
+    Returns the in-flight upload, resuming from a `.part` file left by an
+    interrupted upload or a restarted server, if there is one.
+    """
+
+    part_path, final_path = _resolve_paths(session_id, file_name)
+    with _ACTIVE_UPLOADS_LOCK:
+        upload = _ACTIVE_UPLOADS.get((session_id, final_path.name))
+        if upload is not None or not part_path.exists() or total_size is None:
+            return upload
+
+        # re-scan what already arrived, so indexing continues where it stopped
+        with part_path.open("rb") as f:
+            has_header = _validate_first_chunk(f.read(4096))
+            builder = CsvIndexBuilder(has_header, prefill_limit=GUI_UPLOAD_MAX_ROWS)
+            f.seek(0)
+            while chunk := f.read(GUI_UPLOAD_CHUNK_SIZE):
+                builder.feed(chunk)
+        upload = ChunkedUpload(
+            part_path, final_path, total_size, builder, part_path.stat().st_size
+        )
+        _ACTIVE_UPLOADS[(session_id, final_path.name)] = upload
+        logger.info(f"Resuming upload {final_path.name} at {upload.received} bytes")
+        return upload
+
+
+def get_upload_status(session_id: str, file_name: str) -> dict[str, int | bool]:
+    """Returns the bytes received so far and whether the upload is complete."""
+
+    part_path, final_path = _resolve_paths(session_id, file_name)
+    upload = _ACTIVE_UPLOADS.get((session_id, final_path.name))
+    if upload is not None:
+        return {"received": upload.received, "complete": False}
+    if part_path.exists():
+        return {"received": part_path.stat().st_size, "complete": False}
+    return {"received": 0, "complete": final_path.exists()}
+
+
+def _check_session_quota(part_path: Path, final_path: Path, total_size: int):
+    """
+    Raises ValueError if the upload would take the session's other uploads over
+    SYS_SESSION_MAX_BYTES, which the session sweep does not trim while it is open.
+    """
+
+    used = sum(
+        path.stat().st_size
+        for path in final_path.parent.iterdir()
+        if path.is_file() and path not in (part_path, final_path)
+    )
+    if used + total_size > SYS_SESSION_MAX_BYTES:
+        msg = f"Upload of {total_size} bytes exceeds the session quota"
+        logger.warning(msg)
+        raise ValueError(msg)
+
+
+def write_upload_chunk(
+    session_id: str, file_name: str, offset: int, total_size: int, data: bytes
+) -> tuple[bool, dict[str, int | bool]]:
+    """
+    Appends `data` at `offset` to the session's partial upload and feeds it to the
+    row indexer. Returns (accepted, status). A chunk is rejected, not raised, if
+    `offset` does not match the bytes received so far, so the client can resume.
+    On the last chunk the file is moved in place and registered for preview.
+    Raises ValueError for invalid uploads.
+    """
+
+    if total_size <= 0 or total_size > GUI_MAX_FILE_SIZE_CHUNKED_UPLOAD:
+        msg = f"File size {total_size} outside of allowed range"
+        logger.warning(msg)
+        raise ValueError(msg)
+    if len(data) > GUI_UPLOAD_CHUNK_SIZE or offset + len(data) > total_size:
+        msg = f"Chunk of {len(data)} bytes at {offset} exceeds limits"
+        logger.warning(msg)
+        raise ValueError(msg)
+
+    if offset == 0:
+        has_header = _validate_first_chunk(data)
+        part_path, final_path = _resolve_paths(session_id, file_name)
+        _check_session_quota(part_path, final_path, total_size)
+        with _ACTIVE_UPLOADS_LOCK:
+            upload = ChunkedUpload(
+                part_path,
+                final_path,
+                total_size,
+                CsvIndexBuilder(has_header, prefill_limit=GUI_UPLOAD_MAX_ROWS),
+            )
+            _ACTIVE_UPLOADS[(session_id, final_path.name)] = upload
+        part_path.write_bytes(b"")
+    else:
+        upload = _get_or_resume_upload(session_id, file_name, total_size)
+        if upload is None:
+            return False, {"received": 0, "complete": False}
+
+    with upload.lock:
+        if offset != upload.received or total_size != upload.total_size:
+            return False, {"received": upload.received, "complete": False}
+
+        with upload.part_path.open("r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        upload.received += len(data)
+        try:
+            upload.builder.feed(data)
+        except UnicodeDecodeError as e:
+            _discard_upload(session_id, upload)
+            msg = f"Invalid encoding, expected UTF-8: {e}"
+            logger.error(msg)
+            raise ValueError(msg) from e
+
+        if upload.received < upload.total_size:
+            return True, {"received": upload.received, "complete": False}
+
+        _complete_upload(session_id, upload)
+        return True, {"received": upload.received, "complete": True}
+
+
+def _complete_upload(session_id: str, upload: ChunkedUpload):
+    """
+    Moves the finished upload in place and registers its row index. Raises
+    ValueError if the last line is not valid UTF-8.
+    """
+
+    try:
+        upload.builder.finish()
+    except UnicodeDecodeError as e:
+        _discard_upload(session_id, upload)
+        msg = f"Invalid encoding, expected UTF-8: {e}"
+        logger.error(msg)
+        raise ValueError(msg) from e
+    upload.part_path.replace(upload.final_path)
+    with _ACTIVE_UPLOADS_LOCK:
+        _ACTIVE_UPLOADS.pop((session_id, upload.final_path.name), None)
+    row_index = CsvRowIndex.from_builder(upload.final_path, upload.builder)
+    set_session_row_index(session_id, CsvDatasetIndex([row_index]))
+    logger.info(
+        f"Completed chunked upload of {upload.final_path.name} "
+        f"({upload.received} bytes) for {session_id[:6]}"
+    )
+
+
+def _discard_upload(session_id: str, upload: ChunkedUpload):
+    """Forgets an invalid upload and removes its partial file."""
+
+    with _ACTIVE_UPLOADS_LOCK:
+        _ACTIVE_UPLOADS.pop((session_id, upload.final_path.name), None)
+    upload.part_path.unlink(missing_ok=True)
+
+
+def drop_session_uploads(session_id: str):
+    """Forgets all in-flight uploads of an ended session."""
+
+    with _ACTIVE_UPLOADS_LOCK:
+        for key in [key for key in _ACTIVE_UPLOADS if key[0] == session_id]:
+            del _ACTIVE_UPLOADS[key]
@@ -0,0 +1,149 @@
+"""
+Startup warm-up and readiness. Once the app is built, a background thread
+compiles the export template, renders a first document, builds the default system
+prompt, probes the export tools and connects the shared Azure client, or opens the
+chat broker with FT_CHAT_WORKER_TIER. Results are cached where they are used.
+SERVER_READY_ROUTE reports ready once every required check passed, so the platform
+routes traffic only to warm instances; failed required checks are retried.
+"""
+
+from collections.abc import Callable
+from functools import partial
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+
+from src.chat.azure_client import warm_azure_client
+from src.chat.azure_config import (
+    generate_full_chat_system_prompt,
+    get_system_prompt_version,
+)
+from src.chat.job_broker import get_broker_stats
+from src.config import (
+    CHAT_DRY_RUN_NO_LOAD_ENV,
+    FT_CHAT_WORKER_TIER,
+    SERVER_WARMUP_RETRY_INTERVAL,
+    SERVER_WARMUP_TIMEOUT,
+)
+from src.gui.gui_builder.gui_export_template import get_html_export_template
+from src.gui.gui_builder.gui_md_render import render_html_document
+from src.gui.gui_builder.gui_pdf_engines import detect_pdf_engine, get_tool_version
+from src.gui.i18n.gui_text_en import HTML_DEFAULT_TITLE
+from src.utils.log import logger
+
+_checks: dict[str, dict] = {}
+_checks_lock = Lock()
+_warmed = Event()  # set after the first round of checks
+
+
+def _check_export_template() -> str:
+    template = get_html_export_template()
+    render_html_document(template, HTML_DEFAULT_TITLE, f"# {HTML_DEFAULT_TITLE}\n")
+    return template.pandoc_template.name
+
+
+def _check_system_prompt() -> str:
+    return get_system_prompt_version(generate_full_chat_system_prompt())
+
+
+def _check_tool(tool: str) -> str:
+    version = get_tool_version(tool)
+    if version is None:
+        raise RuntimeError(f"'{tool}' is not installed")
+    return version
+
+
+def _check_pdf_engine() -> str:
+    engine = detect_pdf_engine()
+    if engine is None:
+        raise RuntimeError("No PDF engine available")
+    return get_tool_version(engine) or engine
+
+
+def _check_chat() -> str:
+    if CHAT_DRY_RUN_NO_LOAD_ENV:
+        return "dry run"
+    if FT_CHAT_WORKER_TIER:
+        return f"chat broker tasks {get_broker_stats()}"
+    status = warm_azure_client(SERVER_WARMUP_TIMEOUT)
+    if status in (401, 403):
+        raise PermissionError(f"Azure endpoint refused the key with HTTP {status}")
+    return f"Azure endpoint answered HTTP {status}"
+
+
+# name, probe returning a detail or raising, and whether readiness needs it
+_CHECKS: list[tuple[str, Callable[[], str], bool]] = [
+    ("export_template", _check_export_template, True),
+    ("system_prompt", _check_system_prompt, True),
+    ("pandoc", partial(_check_tool, "pandoc"), False),
+    ("pdf_engine", _check_pdf_engine, False),
+    ("chat", _check_chat, True),
+]
+
+
+def _run_check(name: str, probe: Callable[[], str], required: bool) -> bool:
+    """Runs and records one check, returns False if a required check failed."""
+
+    start = perf_counter()
+    try:
+        detail, ok = probe(), True
+    except Exception as e:
+        detail, ok = f"{type(e).__name__}: {e}", False
+        logger.warning(f"Warm-up check '{name}' failed: {detail}")
+    with _checks_lock:
+        _checks[name] = {
+            "ok": ok,
+            "required": required,
+            "detail": detail,
+            "seconds": round(perf_counter() - start, 3),
+        }
+    return ok or not required
+
+
+def run_warmup(max_rounds: int | None = None):
+    """
+    Runs all checks, then the failed required ones every
+    SERVER_WARMUP_RETRY_INTERVAL seconds until they pass or `max_rounds` ran.
+    """
+
+    pending = list(_CHECKS)
+    rounds = 0
+    while True:
+        pending = [check for check in pending if not _run_check(*check)]
+        _warmed.set()
+        rounds += 1
+        if not pending:
+            logger.info("Warm-up done, ready to serve")
+            return
+        names = [name for name, _, _ in pending]
+        if max_rounds is not None and rounds >= max_rounds:
+            logger.error(f"Not ready, required checks {names} failed")
+            return
+        logger.warning(
+            f"Not ready, retrying {names} in {SERVER_WARMUP_RETRY_INTERVAL:.0f}s"
+        )
+        sleep(SERVER_WARMUP_RETRY_INTERVAL)
+
+
+def start_warmup() -> Thread:
+    """Starts the warm-up in a background thread, the app serves meanwhile."""
+
+    thread = Thread(target=run_warmup, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for_warmup(timeout: float | None = None) -> bool:
+    """Waits for the first round of checks, returns False on timeout."""
+
+    return _warmed.wait(timeout)
+
+
+def get_readiness() -> tuple[bool, dict]:
+    """Returns whether the app is ready and the result of every check."""
+
+    with _checks_lock:
+        checks = {name: dict(check) for name, check in _checks.items()}
+    ready = _warmed.is_set() and all(
+        check["ok"] for check in checks.values() if check["required"]
+    )
+    return ready, {"ready": ready, "checks": checks}
@@ -56,7 +56,7 @@ def test_parse_json_response(response, expected):
         ("Invalid prompt", "Unexpected error occurred while querying Azure AI: ..."),
     ],
 )
-@patch("src.chat.azure_client.AzureOpenAI")
+@patch("openai.AzureOpenAI")
 def test_query_azure_ai(mock_azure_client, prompt, expected):
     # Mocking Azure OpenAI client response
     mock_response = {"choices": [{"message": {"content": "Sunny"}}]}
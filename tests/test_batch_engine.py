@@ -0,0 +1,209 @@
+"""
+Unit tests for the checkpointed batch engine.
+"""
+
+from json import loads
+from threading import Lock
+
+import pytest
+
+from src.batch import engine, job_store
+from src.batch.job_store import (
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_STOPPED,
+    create_job,
+    get_job,
+    record_row_result,
+)
+
+SESSION_ID = "0123456789abcdef"
+ROWS = 120
+
+
+@pytest.fixture
+def queried(tmp_path, monkeypatch):
+    """Isolates the job store and download folder and records model queries."""
+    monkeypatch.setattr(job_store, "BATCH_DB_FILE", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(job_store, "_connection", None)
+    monkeypatch.setattr(engine, "SYS_DOWNLOAD_PATH", str(tmp_path / "downloads"))
+    queries = []
+    lock = Lock()
+
+    def fake_query(prompt, system_prompt=None, task_id=None):
+        with lock:
+            queries.append(prompt)
+        return True, f"answer to {prompt}"
+
+    monkeypatch.setattr(engine, "query_chat_checked", fake_query)
+    return queries
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Creates a CSV with a header row and ROWS data rows."""
+    path = tmp_path / "eval.csv"
+    path.write_text(
+        "Title,Query\n" + "".join(f"Case {i},Query {i}\n" for i in range(ROWS))
+    )
+    return path
+
+
+def _wait(job_id):
+    engine._RUNS[job_id].thread.join(timeout=10)
+
+
+def test_batch_job_processes_all_rows(queried, csv_file):
+    """Test that every row is queried once and written to the output file."""
+    job_id = engine.start_batch_job(SESSION_ID, csv_file, True)
+    _wait(job_id)
+
+    progress = engine.get_batch_progress(job_id)
+    assert progress["status"] == JOB_STATUS_DONE
+    assert progress["done"] == progress["total"] == ROWS
+    assert sorted(queried) == sorted(f"Query {i}" for i in range(ROWS))
+    with open(progress["output_path"], encoding="utf-8") as f:
+        records = [loads(line) for line in f]
+    assert sorted(record["row"] for record in records) == list(range(ROWS))
+    assert records[0]["response"] == f"answer to {records[0]['query']}"
+
+
+def test_batch_job_resumes_missing_rows(queried, csv_file, monkeypatch):
+    """Test that a resumed job only queries rows without a checkpoint."""
+    with monkeypatch.context() as m:
+        m.setattr(engine, "_launch", lambda job_id: None)
+        m.setattr(engine, "BATCH_JOB_LEASE", -1)  # its worker died
+        job_id = engine.start_batch_job(SESSION_ID, csv_file, True)
+    for row_no in range(100):
+        record_row_result(job_id, row_no, engine._process_row(row_no, "t", "q")[1])
+    queried.clear()
+
+    assert engine.resume_unfinished_jobs() == [job_id]
+    _wait(job_id)
+
+    assert sorted(queried) == sorted(f"Query {i}" for i in range(100, ROWS))
+    assert get_job(job_id)["done_rows"] == ROWS
+    with open(get_job(job_id)["output_path"], encoding="utf-8") as f:
+        assert len(f.readlines()) == ROWS
+
+
+def test_batch_job_keeps_its_system_prompt(queried, csv_file, monkeypatch):
+    """Test that all rows are queried with the prompt the job was started with."""
+    system_prompts = set()
+    monkeypatch.setattr(
+        engine,
+        "query_chat_checked",
+        lambda prompt, system_prompt=None, task_id=None: (
+            True,
+            system_prompts.add(system_prompt),
+        ),
+    )
+    job_id = engine.start_batch_job(SESSION_ID, csv_file, True, "Answer briefly.")
+    _wait(job_id)
+
+    assert get_job(job_id)["system_prompt"] == "Answer briefly."
+    assert system_prompts == {"Answer briefly."}
+
+
+def test_failed_rows_are_retried_on_resume(queried, csv_file, monkeypatch):
+    """Test that rows whose query failed are written with their error and retried."""
+    with monkeypatch.context() as m:
+        m.setattr(
+            engine,
+            "query_chat_checked",
+            lambda prompt, system_prompt=None, task_id=None: (
+                (False, "Error: timeout")
+                if prompt.endswith("7")
+                else (True, f"answer to {prompt}")
+            ),
+        )
+        job_id = engine.start_batch_job(SESSION_ID, csv_file, True)
+        _wait(job_id)
+
+    progress = engine.get_batch_progress(job_id)
+    assert progress["status"] == JOB_STATUS_FAILED
+    assert progress["done"] == ROWS - 12
+    with open(progress["output_path"], encoding="utf-8") as f:
+        failed = [loads(line) for line in f if '"error": null' not in line]
+    assert len(failed) == 12
+    assert failed[0]["response"] is None
+    assert failed[0]["error"] == "Error: timeout"
+
+    assert engine.resume_unfinished_jobs() == [job_id]
+    _wait(job_id)
+
+    assert sorted(queried) == sorted(f"Query {i}" for i in range(ROWS) if i % 10 == 7)
+    assert engine.get_batch_progress(job_id)["status"] == JOB_STATUS_DONE
+    with open(progress["output_path"], encoding="utf-8") as f:
+        records = [loads(line) for line in f]
+    assert len(records) == ROWS
+    assert all(record["error"] is None for record in records)
+
+
+def test_only_jobs_with_expired_leases_are_resumed(queried, csv_file, tmp_path):
+    """Test that jobs of live workers are left alone, those of dead ones resumed."""
+    live_output = tmp_path / "live.jsonl"
+    live_output.write_text("row in progress\n")
+    create_job("live", SESSION_ID, csv_file, live_output, True, ROWS, None, "a:1", 60)
+    create_job(
+        "dead",
+        SESSION_ID,
+        csv_file,
+        tmp_path / "dead.jsonl",
+        True,
+        ROWS,
+        None,
+        "b:2",
+        -1,
+    )
+
+    assert engine.resume_unfinished_jobs(retry_failed=False) == ["dead"]
+    _wait("dead")
+
+    assert get_job("dead")["status"] == JOB_STATUS_DONE
+    assert get_job("dead")["owner"] is None
+    assert get_job("live")["owner"] == "a:1"
+    assert live_output.read_text() == "row in progress\n"
+
+
+def test_stopped_job_is_not_resumed_by_sweeps(queried, csv_file, monkeypatch):
+    """Test that a stopped job stays stopped until it is resumed explicitly."""
+
+    def stopping_query(prompt, system_prompt=None, task_id=None):
+        engine.stop_batch_job(task_id.split(":")[0])
+        return True, f"answer to {prompt}"
+
+    with monkeypatch.context() as m:
+        m.setattr(engine, "query_chat_checked", stopping_query)
+        job_id = engine.start_batch_job(SESSION_ID, csv_file, True)
+        _wait(job_id)
+
+    assert get_job(job_id)["status"] == JOB_STATUS_STOPPED
+    assert get_job(job_id)["done_rows"] < ROWS
+    assert engine.resume_unfinished_jobs() == []
+
+    assert engine.resume_batch_job(job_id)
+    _wait(job_id)
+    assert get_job(job_id)["status"] == JOB_STATUS_DONE
+    assert get_job(job_id)["done_rows"] == ROWS
+
+
+def test_lost_lease_stops_writing(queried, csv_file, monkeypatch):
+    """Test that rows finishing after the lease was lost are not written."""
+
+    def slow_query(prompt, system_prompt=None, task_id=None):
+        engine._RUNS[task_id.split(":")[0]].lease_lost.wait(5)
+        return True, f"answer to {prompt}"
+
+    monkeypatch.setattr(engine, "query_chat_checked", slow_query)
+    monkeypatch.setattr(engine, "BATCH_JOB_HEARTBEAT_INTERVAL", 0.01)
+    monkeypatch.setattr(engine, "renew_job_lease", lambda *args: False)
+    job_id = engine.start_batch_job(SESSION_ID, csv_file, True)
+    _wait(job_id)
+
+    job = get_job(job_id)
+    assert job["status"] == JOB_STATUS_RUNNING
+    assert job["done_rows"] == 0
+    with open(job["output_path"], encoding="utf-8") as f:
+        assert f.read() == ""
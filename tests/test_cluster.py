@@ -0,0 +1,61 @@
+"""
+Unit tests for the sticky-session router in front of the app workers.
+"""
+
+from fastapi.testclient import TestClient
+import httpx
+
+from src.config import SERVER_CLUSTER_COOKIE, SERVER_HEALTH_ROUTE, SERVER_READY_ROUTE
+from src.server.cluster import create_router_app
+
+WORKER_URLS = ["http://worker-0:8001", "http://worker-1:8002"]
+
+
+def _serve(down: set[str]) -> httpx.MockTransport:
+    """Answers with the worker's host, failing to connect to `down` hosts."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host in down:
+            raise httpx.ConnectError("refused", request=request)
+        body = f"{request.url.host} {request.url.path}?{request.url.query.decode()}"
+        return httpx.Response(200, stream=httpx.ByteStream(body.encode()))
+
+    return httpx.MockTransport(handler)
+
+
+def test_clients_stick_to_their_worker():
+    """Test that a client keeps its worker and new clients are spread."""
+    router_app = create_router_app(WORKER_URLS, transport=_serve(set()))
+    first, second = TestClient(router_app), TestClient(router_app)
+
+    assert first.get("/a", params={"q": "1"}).text == "worker-0 /a?q=1"
+    assert second.get("/a").text.startswith("worker-1")
+    assert first.get("/b").text.startswith("worker-0")
+    assert first.cookies[SERVER_CLUSTER_COOKIE] == "0"
+
+
+def test_unreachable_worker_fails_over():
+    """Test that requests move to another worker if the sticky one is down."""
+    down: set[str] = set()
+    router_app = create_router_app(WORKER_URLS, transport=_serve(down))
+    client = TestClient(router_app)
+    assert client.post("/upload", content=b"data").text.startswith("worker-0")
+
+    down.add("worker-0")
+    assert client.post("/upload", content=b"data").text.startswith("worker-1")
+    assert client.cookies[SERVER_CLUSTER_COOKIE] == "1"
+    workers = client.get("/cluster/stats").json()["workers"]
+    assert [worker["up"] for worker in workers] == [False, True]
+
+
+def test_router_is_ready_once_any_worker_is():
+    """Test that the router asks every worker and is ready if one of them is."""
+    down = {"worker-0"}
+    client = TestClient(create_router_app(WORKER_URLS, transport=_serve(down)))
+    response = client.get(SERVER_READY_ROUTE)
+    assert response.status_code == 200
+    assert [worker["ready"] for worker in response.json()["workers"]] == [False, True]
+
+    down.add("worker-1")
+    assert client.get(SERVER_READY_ROUTE).status_code == 503
+    assert client.get(SERVER_HEALTH_ROUTE).status_code == 200
@@ -0,0 +1,148 @@
+"""
+Unit tests for the sparse row-offset CSV index backing the paged preview.
+"""
+
+from csv import reader
+from io import StringIO
+
+import pytest
+
+from src.gui.gui_builder.gui_csv_index import (
+    CsvDatasetIndex,
+    CsvIndexBuilder,
+    CsvRowIndex,
+)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Writes a CSV with a header, a quoted multi-line cell and 1000 rows."""
+    lines = ['"Title","Query"']
+    lines.append('"Row 0","multi\nline"')
+    lines += [f'"Row {i}","{1000 - i}"' for i in range(1, 1000)]
+    path = tmp_path / "sample.csv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_build_counts_rows_and_headers(csv_file):
+    """Test that build indexes all data rows and returns prefill rows."""
+    index = CsvRowIndex(csv_file, has_headers=True, stride=16)
+    prefill = index.build(prefill_limit=3)
+    assert index.headers == ["Title", "Query"]
+    assert index.row_count == 1000
+    assert index.max_columns == 2
+    assert prefill == [["Row 0", "multi\nline"], ["Row 1", "999"], ["Row 2", "998"]]
+    index.close()
+
+
+@pytest.mark.parametrize("page, expected_first", [(0, "Row 0"), (3, "Row 150")])
+def test_read_page(csv_file, page, expected_first):
+    """Test that pages are served from the nearest checkpoint."""
+    index = CsvDatasetIndex([CsvRowIndex(csv_file, has_headers=True, stride=16)])
+    index.parts[0].build()
+    rows, total = index.read_page(page, 50)
+    assert total == 1000
+    assert len(rows) == 50
+    assert rows[0][0] == expected_first
+    index.close()
+
+
+def test_read_last_partial_page(csv_file):
+    """Test that the last page returns only the remaining rows."""
+    index = CsvDatasetIndex([CsvRowIndex(csv_file, has_headers=True, stride=16)])
+    index.parts[0].build()
+    rows, total = index.read_page(33, 30)
+    assert total == 1000
+    assert [row[0] for row in rows] == [
+        "Row 990",
+        *[f"Row {i}" for i in range(991, 1000)],
+    ]
+    index.close()
+
+
+def test_filter_and_sort(csv_file):
+    """Test that filtered and sorted views page over matching rows only."""
+    index = CsvDatasetIndex([CsvRowIndex(csv_file, has_headers=True, stride=16)])
+    index.parts[0].build()
+    rows, total = index.read_page(0, 5, sort_col=1, ascending=True, query="row 99")
+    assert total == 11
+    assert [row[1] for row in rows] == ["1", "2", "3", "4", "5"]
+    index.close()
+
+
+def test_empty_file(tmp_path):
+    """Test that an empty file yields no rows."""
+    path = tmp_path / "empty.csv"
+    path.write_text("", encoding="utf-8")
+    index = CsvDatasetIndex([CsvRowIndex(path, has_headers=True)])
+    assert index.parts[0].build() == []
+    assert index.read_page(0, 10) == ([], 0)
+    index.close()
+
+
+def test_merged_files_with_origin(csv_file, tmp_path):
+    """Test that several files page as one dataset with a file-of-origin column."""
+    other = tmp_path / "other.csv"
+    other.write_text('"Title","Query"\n"Extra 1","a"\n"Extra 2","b"\n', "utf-8")
+    parts = [
+        CsvRowIndex(path, has_headers=True, stride=16) for path in (csv_file, other)
+    ]
+    for part in parts:
+        part.build()
+    index = CsvDatasetIndex(parts, origin_label="File")
+    assert index.headers == ["File", "Title", "Query"]
+    rows, total = index.read_page(142, 7)
+    assert total == 1002
+    assert rows[0] == ["sample.csv", "Row 994", "6"]
+    assert rows[-1] == ["other.csv", "Extra 1", "a"]
+    rows, total = index.read_page(0, 10, sort_col=0, ascending=False, query="extra")
+    assert (total, rows[0][0]) == (2, "other.csv")
+    index.close()
+
+
+def test_incremental_builder_matches_full_scan(csv_file):
+    """Test that feeding arbitrary chunks yields the same index as a full scan."""
+    full = CsvRowIndex(csv_file, has_headers=True, stride=16)
+    full.build(prefill_limit=5)
+    builder = CsvIndexBuilder(has_headers=True, stride=16, prefill_limit=5)
+    data = csv_file.read_bytes()
+    for start in range(0, len(data), 7):
+        builder.feed(data[start : start + 7])
+    builder.finish()
+    streamed = CsvRowIndex.from_builder(csv_file, builder)
+    assert streamed.row_count == full.row_count
+    assert streamed.prefill_rows == full.prefill_rows
+    assert streamed._checkpoints == full._checkpoints
+    assert streamed.read_rows(500, 3) == full.read_rows(500, 3)
+    full.close()
+    streamed.close()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        'Product,Note\nTV,55" screen\nRadio,FM\nLamp,"warm, dim"\nDesk,oak\n',
+        (
+            'Product,Note\n"Sofa, grey","3 ""seats""\nfabric"\nTV,55" screen\r\n'
+            '"Chair",a "b" c\nBed,"king\r\nsize"\n'
+        ),
+    ],
+)
+def test_index_follows_csv_quoting(tmp_path, text):
+    """Test that stray quotes, quoted commas and newlines index as csv.reader reads."""
+    path = tmp_path / "quotes.csv"
+    path.write_bytes(text.encode("utf-8"))
+    expected = list(reader(StringIO(text, newline="")))[1:]
+    index = CsvRowIndex(path, has_headers=True, stride=1)
+    index.build()
+    assert index.row_count == len(expected) == 4
+    assert index.read_rows(0, 10) == expected
+    assert [index.read_rows(row, 1)[0] for row in range(4)] == expected
+    builder = CsvIndexBuilder(has_headers=True, stride=1, prefill_limit=4)
+    for char in text.encode("utf-8"):
+        builder.feed(bytes([char]))
+    builder.finish()
+    assert builder.prefill_rows == expected
+    assert builder.checkpoints == index._checkpoints
+    index.close()
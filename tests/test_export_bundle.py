@@ -0,0 +1,80 @@
+"""
+Unit tests for the streamed "download all" export bundle.
+"""
+
+from io import BytesIO
+from zipfile import ZipFile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+import src.gui.gui_builder.gui_export_bundle as export_bundle
+from src.gui.gui_builder.gui_export_bundle import create_export_bundle
+from src.server.routes_exports import router
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Serves the export routes with fake renderers writing into `tmp_path`."""
+
+    def fake_export(file_ext):
+        def export(session_id, md_str):
+            output_path = tmp_path / f"Output_{session_id[:6]}.{file_ext}"
+            output_path.write_text(f"{file_ext}:{md_str}", encoding="utf-8")
+            return output_path
+
+        return export
+
+    def failing_export(session_id, md_str):
+        raise RuntimeError("No PDF engine available")
+
+    monkeypatch.setattr(
+        export_bundle,
+        "_EXPORT_FUNCTIONS",
+        {
+            "html": fake_export("html"),
+            "pdf": failing_export,
+            "docx": fake_export("docx"),
+        },
+    )
+    monkeypatch.setattr(export_bundle, "SYS_EXPORT_BUNDLE_PATH", str(tmp_path))
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_bundle_streams_all_formats_and_results(client):
+    """Test that the zip holds results, rendered formats and failed ones as errors."""
+    token = create_export_bundle(
+        "abcdef123",
+        "# Doc\n",
+        [{"row": 0, "title": "Case", "query": "Query", "response": "Answer"}],
+    )
+
+    response = client.get(f"/exports/bundle/{token}")
+
+    assert response.status_code == 200
+    assert 'filename="Output_abcdef.zip"' in response.headers["content-disposition"]
+    with ZipFile(BytesIO(response.content)) as zip_file:
+        names = zip_file.namelist()
+        assert names[0] == "Output_abcdef.csv"
+        assert set(names) == {
+            "Output_abcdef.csv",
+            "Output_abcdef.html",
+            "Output_abcdef.docx",
+            "errors.txt",
+        }
+        assert zip_file.read("Output_abcdef.csv").decode().splitlines() == [
+            "row,title,query,response",
+            "0,Case,Query,Answer",
+        ]
+        assert zip_file.read("Output_abcdef.html") == b"html:# Doc\n"
+        assert b"No PDF engine available" in zip_file.read("errors.txt")
+
+
+def test_bundle_token_is_single_use(client):
+    """Test that a token downloads once and unknown tokens are rejected."""
+    token = create_export_bundle("abcdef123", "# Doc\n", [])
+    assert client.get(f"/exports/bundle/{token}").status_code == 200
+    assert client.get(f"/exports/bundle/{token}").status_code == 404
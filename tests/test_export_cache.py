@@ -0,0 +1,87 @@
+"""
+Unit tests for the export cache shared by the HTML, PDF and DOCX downloads.
+"""
+
+from os import utime
+from pathlib import Path
+
+import pytest
+
+import src.gui.gui_builder.gui_export_cache as export_cache
+from src.gui.gui_builder.gui_export_cache import (
+    drop_session_output_locks,
+    evict_export_cache,
+    get_output_lock,
+)
+import src.gui.gui_builder.gui_file_utils as file_utils
+from src.gui.gui_builder.gui_file_utils import (
+    generate_html_from_md,
+    generate_pdf_from_html,
+)
+
+MARKDOWN = "# Report\n\n## 1. Case\n\nQuery: Response\n"
+
+
+@pytest.fixture
+def renders(tmp_path, monkeypatch):
+    """Isolates the cache and counts renders instead of running pandoc."""
+    monkeypatch.setattr(export_cache, "SYS_EXPORT_CACHE_PATH", str(tmp_path / "cache"))
+    calls = []
+
+    def fake_html(output_path_gen, template, title, md_str):
+        calls.append("html")
+        Path(output_path_gen).write_text(f"<h1>{title}</h1>", encoding="utf-8")
+
+    def fake_pdf(html_path, pdf_path, engine=None):
+        calls.append(pdf_path.suffix)
+        pdf_path.write_bytes(b"%PDF")
+
+    monkeypatch.setattr(file_utils, "_save_html_from_md", fake_html)
+    monkeypatch.setattr(file_utils, "render_pdf", fake_pdf)
+    return calls
+
+
+def test_repeat_exports_are_served_from_cache(renders, tmp_path):
+    """Test that HTML is rendered once and reused by PDF and repeat clicks."""
+    html_path = generate_html_from_md("abc123", MARKDOWN, tmp_path)
+    pdf_path = generate_pdf_from_html("abc123", MARKDOWN, tmp_path)
+    assert generate_pdf_from_html("def456", MARKDOWN, tmp_path).read_bytes() == b"%PDF"
+    assert generate_html_from_md("abc123", MARKDOWN, tmp_path) == html_path
+
+    assert renders == ["html", ".pdf"]
+    assert html_path.read_text(encoding="utf-8") == "<h1>Report</h1>"
+    assert pdf_path.parent == tmp_path / "abc123"
+
+
+def test_changed_markdown_is_rendered_again(renders, tmp_path):
+    """Test that a different document misses the cache and keeps the old entry."""
+    generate_html_from_md("abc123", MARKDOWN, tmp_path)
+    generate_html_from_md("abc123", MARKDOWN + "more\n", tmp_path)
+    generate_html_from_md("def456", MARKDOWN, tmp_path)
+    assert renders == ["html", "html"]
+
+
+def test_evict_expired_and_oldest_entries(tmp_path, monkeypatch):
+    """Test that expired entries go first, then the oldest until the cache fits."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(export_cache, "SYS_EXPORT_CACHE_PATH", str(cache_dir))
+    for age, name in [(100, "expired"), (30, "old"), (20, "mid"), (10, "new")]:
+        entry = cache_dir / f"{name}.html"
+        entry.write_bytes(b"x" * 10)
+        utime(entry, (entry.stat().st_atime, entry.stat().st_mtime - age))
+
+    evict_export_cache(max_bytes=20, ttl=60)
+    assert sorted(entry.name for entry in cache_dir.iterdir()) == [
+        "mid.html",
+        "new.html",
+    ]
+
+
+def test_ended_session_drops_its_output_locks(tmp_path):
+    """Test that the export file locks of a session are forgotten once it ends."""
+    ended = get_output_lock(tmp_path / "ended" / "Output.html")
+    kept = get_output_lock(tmp_path / "kept" / "Output.html")
+    drop_session_output_locks("ended")
+    assert get_output_lock(tmp_path / "ended" / "Output.html") is not ended
+    assert get_output_lock(tmp_path / "kept" / "Output.html") is kept
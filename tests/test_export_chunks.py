@@ -0,0 +1,80 @@
+"""
+Unit tests for chunked rendering of very large exports.
+"""
+
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from src.gui.gui_builder.gui_actions import generate_output
+import src.gui.gui_builder.gui_export_chunks as export_chunks
+from src.gui.gui_builder.gui_export_chunks import (
+    iter_chunk_bodies,
+    render_chunked,
+    split_md_chunks,
+)
+from src.gui.gui_builder.gui_export_template import get_html_export_template
+from src.gui.gui_builder.gui_md_render import render_html_document
+
+ROWS = 7
+MARKDOWN = generate_output(
+    ["Case"] * ROWS,
+    [f"Query {i}" for i in range(ROWS)],
+    [f"*Answer* {i}" for i in range(ROWS)],
+    "data.csv",
+)
+
+
+def test_split_keeps_title_and_footer_with_chunks():
+    """Test that chunks hold at most n sections and join back to the document."""
+    chunks = split_md_chunks(MARKDOWN, 3)
+    assert len(chunks) == 3
+    assert chunks[0].startswith("# data.csv") and chunks[0].count("\n## ") == 3
+    assert chunks[-1].endswith("_")
+    assert "".join(chunks) == MARKDOWN
+
+
+def test_chunked_html_matches_single_render():
+    """Test that parallel chunks produce the same document, ids numbered globally."""
+    template = get_html_export_template()
+    output = StringIO()
+    template.write(output, "data.csv", iter_chunk_bodies(split_md_chunks(MARKDOWN, 2)))
+    assert output.getvalue() == render_html_document(template, "data.csv", MARKDOWN)
+    assert 'id="case-6"' in output.getvalue()
+
+
+def test_render_chunked_converts_chunks_and_merges(tmp_path, monkeypatch):
+    """Test that every chunk is converted and merged in document order."""
+    monkeypatch.setattr(export_chunks, "GUI_EXPORT_CHUNK_SECTIONS", 3)
+    merged = []
+
+    def convert(html_path: Path, pdf_path: Path):
+        pdf_path.write_text(html_path.read_text(encoding="utf-8"), encoding="utf-8")
+
+    def merge(pdf_paths: list[Path], output_path: Path):
+        merged.extend(path.name for path in pdf_paths)
+        output_path.write_text(
+            "".join(p.read_text(encoding="utf-8") for p in pdf_paths), encoding="utf-8"
+        )
+
+    monkeypatch.setitem(export_chunks._MERGE_FUNCTIONS, "pdf", merge)
+    pdf_path = tmp_path / "out.pdf"
+    render_chunked(pdf_path, get_html_export_template(), "data.csv", MARKDOWN, convert)
+
+    assert merged == ["chunk_00000.pdf", "chunk_00001.pdf", "chunk_00002.pdf"]
+    assert pdf_path.read_text(encoding="utf-8").count("<title>data.csv</title>") == 3
+    assert list(tmp_path.iterdir()) == [pdf_path]
+
+
+def test_failed_chunk_raises(tmp_path, monkeypatch):
+    """Test that a failing chunk conversion fails the export."""
+    monkeypatch.setattr(export_chunks, "GUI_EXPORT_CHUNK_SECTIONS", 3)
+
+    def convert(html_path: Path, pdf_path: Path):
+        raise RuntimeError("engine failed")
+
+    with pytest.raises(RuntimeError, match="engine failed"):
+        render_chunked(
+            tmp_path / "out.pdf", get_html_export_template(), "t", MARKDOWN, convert
+        )
@@ -0,0 +1,64 @@
+"""
+Unit tests for the dedicated export pool.
+"""
+
+from asyncio import create_task, gather, run, sleep
+from pathlib import Path
+from threading import Event
+
+import pytest
+
+import src.gui.gui_builder.gui_export_pool as export_pool
+from src.gui.gui_builder.gui_export_pool import (
+    ExportQueueFullError,
+    get_export_stats,
+    run_export,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    """Gives every test its own pool and statistics."""
+    monkeypatch.setattr(export_pool, "_executor", None)
+    monkeypatch.setattr(export_pool, "_queued", 0)
+    monkeypatch.setattr(export_pool, "_running", 0)
+    monkeypatch.setattr(export_pool, "_durations", {})
+
+
+def test_run_export_records_durations_and_failures():
+    """Test that results are returned and durations are counted per format."""
+
+    async def scenario():
+        return await gather(
+            run_export("html", Path, "out.html"),
+            run_export("pdf", str, "Error generating PDF"),
+        )
+
+    assert run(scenario()) == [Path("out.html"), "Error generating PDF"]
+    stats = get_export_stats()
+    assert stats["queued"] == stats["running"] == 0
+    assert stats["formats"]["html"]["count"] == 1
+    assert stats["formats"]["html"]["failures"] == 0
+    # export functions report errors as strings
+    assert stats["formats"]["pdf"]["failures"] == 1
+
+
+def test_run_export_rejects_when_queue_full(monkeypatch):
+    """Test that exports beyond the queue cap are rejected instead of queued."""
+    monkeypatch.setattr(export_pool, "GUI_EXPORT_MAX_WORKERS", 1)
+    monkeypatch.setattr(export_pool, "GUI_EXPORT_MAX_QUEUED", 1)
+    release = Event()
+
+    async def scenario():
+        running = create_task(run_export("pdf", release.wait))
+        await sleep(0.05)
+        queued = create_task(run_export("pdf", release.wait))
+        await sleep(0.05)
+        assert get_export_stats()["running"] == 1
+        assert get_export_stats()["queued"] == 1
+        with pytest.raises(ExportQueueFullError):
+            await run_export("pdf", release.wait)
+        release.set()
+        return await gather(running, queued)
+
+    assert run(scenario()) == [True, True]
@@ -0,0 +1,70 @@
+"""
+Unit tests for debounced background prerendering of downloads.
+"""
+
+from threading import Event
+from time import sleep
+
+import pytest
+
+import src.gui.gui_builder.gui_export_prerender as prerender
+from src.gui.gui_builder.gui_export_prerender import (
+    cancel_prerender,
+    schedule_prerender,
+)
+
+SESSION_ID = "abc123"
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Replaces the export functions and shortens the debounce."""
+    calls = []
+    monkeypatch.setattr(prerender, "GUI_EXPORT_PRERENDER_DEBOUNCE", 0.05)
+    monkeypatch.setattr(
+        prerender,
+        "_EXPORT_FUNCTIONS",
+        {
+            file_ext: lambda session_id, md_str, file_ext=file_ext: calls.append(
+                (file_ext, md_str)
+            )
+            for file_ext in ("html", "pdf", "docx")
+        },
+    )
+    return calls
+
+
+def test_only_settled_markdown_is_prerendered(rendered):
+    """Test that rapid edits are debounced into one render of the last version."""
+    for md_str in ("# A", "# AB", "# ABC"):
+        schedule_prerender(SESSION_ID, md_str)
+    sleep(0.3)
+    assert rendered == [("html", "# ABC"), ("pdf", "# ABC"), ("docx", "# ABC")]
+
+
+def test_cancel_prerender_drops_pending_render(rendered):
+    """Test that a cancelled session does not render after the debounce."""
+    schedule_prerender(SESSION_ID, "# A")
+    cancel_prerender(SESSION_ID)
+    sleep(0.2)
+    assert rendered == []
+    assert SESSION_ID not in prerender._generations
+
+
+def test_newer_markdown_supersedes_running_prerender(rendered, monkeypatch):
+    """Test that a running prerender stops before its next format."""
+    started, release = Event(), Event()
+
+    def slow_html(session_id, md_str):
+        started.set()
+        release.wait(1)
+        rendered.append(("html", md_str))
+
+    monkeypatch.setitem(prerender._EXPORT_FUNCTIONS, "html", slow_html)
+    schedule_prerender(SESSION_ID, "# A")
+    assert started.wait(1)
+    schedule_prerender(SESSION_ID, "# B")
+    release.set()
+    sleep(0.3)
+    assert ("pdf", "# A") not in rendered
+    assert rendered[-2:] == [("pdf", "# B"), ("docx", "# B")]
@@ -0,0 +1,66 @@
+"""
+Unit tests for the precompiled HTML export template.
+"""
+
+from os import utime
+
+import pytest
+
+import src.gui.gui_builder.gui_export_template as export_template
+from src.gui.gui_builder.gui_export_template import (
+    compile_template_parts,
+    get_html_export_template,
+)
+
+
+@pytest.fixture
+def template_files(tmp_path, monkeypatch):
+    """Points the export template at temporary template and CSS files."""
+    html_path = tmp_path / "template.html.tpl"
+    css_path = tmp_path / "template.html.css"
+    html_path.write_text(
+        "<title>$title$</title><style>$css_inlined_standalone$</style>$css$$body$",
+        encoding="utf-8",
+    )
+    css_path.write_text("p{}", encoding="utf-8")
+    monkeypatch.setattr(export_template, "SYS_TEMPLATE_HTML", str(html_path))
+    monkeypatch.setattr(export_template, "SYS_TEMPLATE_CSS", str(css_path))
+    monkeypatch.setattr(export_template, "SYS_TEMPLATE_BUILD_PATH", str(tmp_path))
+    monkeypatch.setattr(export_template, "_compiled", None)
+    return html_path, css_path
+
+
+def test_compiled_template_renders_once_substituted():
+    """Test that CSS is inlined, title escaped and unknown variables emptied."""
+    parts = compile_template_parts("<style>$css_inlined_standalone$</style>$x$", "$a$")
+    template = export_template.HtmlExportTemplate(parts, None, (0, 0))
+    assert template.render("A & B", "") == "<style>$a$</style>"
+    assert (
+        export_template.HtmlExportTemplate(
+            compile_template_parts("<title>$title$</title>$body$", ""), None, (0, 0)
+        ).render("A & B", "<p>$body$</p>")
+        == "<title>A &amp; B</title><p>$body$</p>"
+    )
+
+
+def test_template_is_compiled_once_until_files_change(template_files):
+    """Test that the compiled template is reused and rebuilt on mtime change."""
+    _, css_path = template_files
+    template = get_html_export_template()
+    assert get_html_export_template() is template
+    assert template.render("T", "<p/>") == "<title>T</title><style>p{}</style><p/>"
+    assert "<style>p{}</style>" in template.pandoc_template.read_text(encoding="utf-8")
+
+    css_path.write_text("a{content:'$'}", encoding="utf-8")
+    utime(css_path, (1, 1))
+    changed = get_html_export_template()
+    assert changed is not template
+    assert "<style>a{content:'$'}</style>" in changed.render("T", "")
+    assert "a{content:'$$'}" in changed.pandoc_template.read_text(encoding="utf-8")
+
+
+def test_missing_template_raises(template_files):
+    """Test that a missing template file is reported."""
+    template_files[0].unlink()
+    with pytest.raises(FileNotFoundError):
+        get_html_export_template()
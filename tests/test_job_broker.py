@@ -0,0 +1,116 @@
+"""
+Unit tests for the chat broker queue and the chat worker tier.
+"""
+
+from threading import Event, Thread
+
+import pytest
+
+from src.chat import job_broker, worker
+from src.chat.job_broker import (
+    TASK_STATUS_DONE,
+    TASK_STATUS_FAILED,
+    TASK_STATUS_RUNNING,
+    await_task,
+    await_task_result,
+    claim_task,
+    complete_task,
+    enqueue_query,
+    get_task,
+)
+
+
+@pytest.fixture(autouse=True)
+def broker(monkeypatch, tmp_path):
+    """Isolates the broker database."""
+    monkeypatch.setattr(job_broker, "CHAT_BROKER_DB_FILE", str(tmp_path / "b.sqlite3"))
+    monkeypatch.setattr(job_broker, "_connection", None)
+    monkeypatch.setattr(job_broker, "CHAT_BROKER_POLL_INTERVAL", 0.01)
+
+
+def test_tasks_are_claimed_once_in_order():
+    """Test that queued tasks are leased oldest first and to one worker only."""
+    first = enqueue_query("first", "Be brief.")
+    enqueue_query("second")
+    task = claim_task("worker-a")
+    assert task == {"task_id": first, "prompt": "first", "system_prompt": "Be brief."}
+    assert claim_task("worker-b")["prompt"] == "second"
+    assert claim_task("worker-c") is None
+
+    complete_task(first, "worker-b", "stolen", failed=False)
+    assert get_task(first)["status"] == TASK_STATUS_RUNNING
+    complete_task(first, "worker-a", "Answer", failed=False)
+    assert await_task_result(first) == "Answer"
+    assert get_task(first) is None
+
+
+def test_expired_leases_are_retried_then_failed(monkeypatch):
+    """Test that tasks of dead workers are retried until out of attempts."""
+    monkeypatch.setattr(job_broker, "CHAT_BROKER_LEASE", -1)
+    monkeypatch.setattr(job_broker, "CHAT_BROKER_MAX_ATTEMPTS", 2)
+    task_id = enqueue_query("lost")
+    assert claim_task("dead-1")["task_id"] == task_id
+    assert claim_task("dead-2")["task_id"] == task_id
+    assert claim_task("alive") is None
+    assert get_task(task_id)["status"] == TASK_STATUS_FAILED
+
+
+def test_requeued_task_keeps_its_result():
+    """Test that queueing a known task id, as a resumed batch job does, is a no-op."""
+    task_id = enqueue_query("row", task_id="job:7")
+    claim_task("worker")
+    complete_task(task_id, "worker", "Answer", failed=False)
+    assert enqueue_query("row", task_id="job:7") == "job:7"
+    assert get_task("job:7")["status"] == TASK_STATUS_DONE
+    assert await_task_result("job:7") == "Answer"
+
+
+def test_timed_out_task_is_not_claimed():
+    """Test that a task nobody waits for anymore is failed instead of queried."""
+    task_id = enqueue_query("late")
+    answered, msg = await_task(task_id, timeout=0)
+    assert not answered
+    task = get_task(task_id)
+    assert task["status"] == TASK_STATUS_FAILED
+    assert task["result"] == msg
+    assert claim_task("worker") is None
+
+
+def test_query_chat_is_answered_by_worker(monkeypatch):
+    """Test that with the worker tier a query goes through the queue."""
+    monkeypatch.setattr(job_broker, "FT_CHAT_WORKER_TIER", True)
+    monkeypatch.setattr(
+        worker,
+        "query_azure_ai_json",
+        lambda prompt, chat_config, client, system_prompt: (
+            True,
+            f"{system_prompt}:{prompt}",
+        ),
+    )
+    monkeypatch.setattr(worker, "parse_json_response", lambda response: response)
+    stop = Event()
+    thread = Thread(target=worker.run_worker, args=(stop, 2))
+    thread.start()
+    try:
+        assert job_broker.query_chat("Hi", "Sys") == "Sys:Hi"
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+
+def test_failed_query_is_reported(monkeypatch):
+    """Test that a query the worker could not answer is reported as failed."""
+    monkeypatch.setattr(job_broker, "FT_CHAT_WORKER_TIER", True)
+    monkeypatch.setattr(
+        worker,
+        "query_azure_ai_json",
+        lambda prompt, chat_config, client, system_prompt: (False, "Error: refused"),
+    )
+    stop = Event()
+    thread = Thread(target=worker.run_worker, args=(stop, 1))
+    thread.start()
+    try:
+        assert job_broker.query_chat_checked("Hi") == (False, "Error: refused")
+    finally:
+        stop.set()
+        thread.join(timeout=5)
@@ -0,0 +1,55 @@
+"""
+Unit tests for the in-process Markdown to HTML export renderer.
+"""
+
+import pytest
+
+from src.gui.gui_builder.gui_export_template import get_html_export_template
+from src.gui.gui_builder.gui_md_render import (
+    can_render_in_process,
+    render_html_document,
+    render_md_body,
+)
+
+
+def test_render_generated_output_like_pandoc():
+    """Test headings get pandoc identifiers and inline markup matches html5."""
+    md_str = (
+        "# data.csv\n\n## 1. Case\n\nQuery: *Response*\n\n"
+        "## 2. Case\n\nQuery: **Response**\n\n\n_MYCORP @2025 No Warranty._"
+    )
+    assert render_md_body(md_str) == (
+        '<h1 id="data.csv">data.csv</h1>\n'
+        '<h2 id="case">1. Case</h2>\n'
+        "<p>Query: <em>Response</em></p>\n"
+        '<h2 id="case-1">2. Case</h2>\n'
+        "<p>Query: <strong>Response</strong></p>\n"
+        "<p><em>MYCORP @2025 No Warranty.</em></p>"
+    )
+
+
+@pytest.mark.parametrize(
+    "md_str, expected",
+    [
+        ("# Title\n\nText with `code` and [link](https://example.com)\n", True),
+        ("- one\n- two\n", True),
+        ("| a | b |\n|---|---|\n", False),
+        ("```python\nx = 1\n```\n", False),
+        ("Cost $x^2$\n", False),
+        ("Note[^1]\n\n[^1]: footnote\n", False),
+        ("<div>raw</div>\n", False),
+        ("- one\n  - nested\n", False),
+        ("Title\n=====\n", False),
+    ],
+)
+def test_can_render_in_process(md_str, expected):
+    """Test that input needing pandoc extensions is routed to pandoc."""
+    assert can_render_in_process(md_str) is expected
+
+
+def test_render_html_document_uses_template():
+    """Test that the shipped template is filled with title, CSS and body."""
+    html = render_html_document(get_html_export_template(), "Report", "# Report\n")
+    assert "<title>Report</title>" in html
+    assert "<style>" in html and "</style>" in html
+    assert '<body><h1 id="report">Report</h1></body>' in html
@@ -0,0 +1,88 @@
+"""
+Unit tests for PDF engine detection and dispatch.
+"""
+
+from pathlib import Path
+
+import pytest
+
+import src.gui.gui_builder.gui_pdf_engines as pdf_engines
+from src.gui.gui_builder.gui_pdf_engines import detect_pdf_engine, render_pdf
+
+
+@pytest.fixture(autouse=True)
+def clear_detection():
+    """Forgets the cached engine before and after each test."""
+    detect_pdf_engine.cache_clear()
+    pdf_engines._has_mylatexformat.cache_clear()
+    yield
+    detect_pdf_engine.cache_clear()
+    pdf_engines._has_mylatexformat.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "available, forced, expected",
+    [
+        ({"tectonic", "pdflatex"}, "", "tectonic"),
+        ({"wkhtmltopdf", "pdflatex"}, "pdflatex", "pdflatex"),
+        ({"pdflatex"}, "weasyprint", "pdflatex"),
+        (set(), "", None),
+    ],
+)
+def test_detect_pdf_engine(monkeypatch, available, forced, expected):
+    """Test that a forced engine wins if available, else the configured order."""
+    monkeypatch.setattr(pdf_engines, "_is_engine_available", available.__contains__)
+    monkeypatch.setattr(pdf_engines, "GUI_EXPORT_PDF_ENGINE", forced)
+    assert detect_pdf_engine() == expected
+
+
+def test_detected_engine_is_cached(monkeypatch):
+    """Test that availability is only probed on the first call."""
+    probes = []
+    monkeypatch.setattr(
+        pdf_engines, "_is_engine_available", lambda engine: probes.append(engine)
+    )
+    detect_pdf_engine()
+    detect_pdf_engine()
+    assert probes == pdf_engines.GUI_EXPORT_PDF_ENGINES
+
+
+@pytest.mark.parametrize(
+    "engine, has_format, expected",
+    [
+        ("weasyprint", False, "weasyprint"),
+        ("wkhtmltopdf", False, "wkhtmltopdf"),
+        ("pdflatex", True, "precompiled"),
+        ("pdflatex", False, "pandoc:pdflatex"),
+        ("tectonic", True, "pandoc:tectonic"),
+    ],
+)
+def test_render_pdf_dispatch(monkeypatch, engine, has_format, expected):
+    """Test that LaTeX uses the precompiled preamble only if it can be dumped."""
+    used = []
+    monkeypatch.setattr(pdf_engines, "_has_mylatexformat", lambda: has_format)
+    monkeypatch.setattr(
+        pdf_engines, "_render_weasyprint", lambda *args: used.append("weasyprint")
+    )
+    monkeypatch.setattr(
+        pdf_engines, "_render_wkhtmltopdf", lambda *args: used.append("wkhtmltopdf")
+    )
+    monkeypatch.setattr(
+        pdf_engines,
+        "_render_pdflatex_precompiled",
+        lambda *args: used.append("precompiled"),
+    )
+    monkeypatch.setattr(
+        pdf_engines,
+        "_render_pandoc_engine",
+        lambda html, pdf, name: used.append(f"pandoc:{name}"),
+    )
+    render_pdf(Path("in.html"), Path("out.pdf"), engine)
+    assert used == [expected]
+
+
+def test_render_pdf_without_engine_raises(monkeypatch):
+    """Test that a missing engine is reported instead of calling pandoc."""
+    monkeypatch.setattr(pdf_engines, "_is_engine_available", lambda engine: False)
+    with pytest.raises(RuntimeError):
+        render_pdf(Path("in.html"), Path("out.pdf"))
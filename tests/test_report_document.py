@@ -0,0 +1,99 @@
+"""
+Unit tests for the section-addressed generated document.
+"""
+
+from json import dumps, loads
+
+import pytest
+
+from src.gui.gui_builder.gui_actions import generate_output, store_uploaded_rows
+from src.gui.gui_builder.gui_handle_events import (
+    handle_apply_report_diff,
+    handle_generate_output,
+    handle_update_report_row,
+)
+from src.gui.gui_builder.gui_report_document import ReportDocument, apply_text_diff
+from src.gui.gui_builder.gui_session_store import drop_session_data, get_session_data
+
+HEADERS = ["Case 1", "Case 2", "Case 3"]
+INPUTS = ["Query 1", "Query 2", "Query 3"]
+OUTPUTS = ["Answer 1", "Answer 2", "Answer 3"]
+
+
+def test_only_changed_sections_are_rendered():
+    """Test that unchanged rows are not re-rendered and the document is unchanged."""
+    document = ReportDocument()
+    assert document.set_rows("data.csv", HEADERS, INPUTS, OUTPUTS) == 5
+    assert document.markdown == generate_output(HEADERS, INPUTS, OUTPUTS, "data.csv")
+
+    assert document.set_rows("data.csv", HEADERS, INPUTS, OUTPUTS) == 0
+    changed_outputs = ["Answer 1", "New answer", "Answer 3"]
+    assert document.set_rows("data.csv", HEADERS, INPUTS, changed_outputs) == 1
+    assert document.markdown == generate_output(
+        HEADERS, INPUTS, changed_outputs, "data.csv"
+    )
+
+
+def test_delta_holds_changed_sections_or_reset():
+    """Test that deltas carry only changed sections, and a reset after resizing."""
+    document = ReportDocument()
+    document.set_rows("data.csv", HEADERS, INPUTS, OUTPUTS)
+    version = document.version
+
+    assert document.set_row(2, "Case 3", "Query 3", "Changed")
+    delta = document.get_delta(version)
+    assert delta["sections"] == {3: "## 3. Case 3\n\nQuery 3: Changed\n\n"}
+    assert document.get_delta(document.version)["sections"] == {}
+    assert not document.set_row(5, "Case 6", "Query 6", "Out of range")
+
+    document.set_rows("data.csv", HEADERS[:2], INPUTS[:2], OUTPUTS[:2])
+    delta = document.get_delta(version)
+    assert delta["count"] == 4
+    assert sum(delta["reset"]) == len(document.markdown)
+
+
+def test_handlers_skip_unchanged_documents():
+    """Test that a repeated click sends nothing and row changes send one section."""
+    session_id = "report-session"
+    store_uploaded_rows(session_id, HEADERS, INPUTS, ["data.csv"], True)
+    for row, output in enumerate(OUTPUTS):
+        get_session_data(session_id).set_value(row, "outputs", output)
+
+    md_str, delta_json = handle_generate_output(session_id, 3, None)
+    assert md_str.startswith("# data.csv")
+    assert md_str == generate_output(HEADERS, INPUTS, OUTPUTS, "data.csv")
+    assert (
+        handle_generate_output(session_id, 3, delta_json)
+        == ({"__type__": "update"},) * 2
+    )
+
+    get_session_data(session_id).set_value(0, "outputs", "Streamed")
+    row_delta = loads(handle_update_report_row(session_id, 0, delta_json))
+    assert list(row_delta["sections"]) == ["1"]
+    drop_session_data(session_id)
+
+
+def test_editor_diffs_apply_in_utf16_offsets():
+    """Test that client diffs replace UTF-16 ranges and check their base."""
+    text = "# Titel 🙂\n\nAntwort"
+    # the emoji takes two code units in the browser
+    diff = {"start": 11, "end": 12, "text": "\n## ", "length": 19}
+    assert apply_text_diff(text, diff) == "# Titel 🙂\n\n## Antwort"
+    assert apply_text_diff(text, {"full": True, "text": "New"}) == "New"
+    with pytest.raises(ValueError):
+        apply_text_diff(text, {**diff, "length": 20})
+
+
+def test_editor_diff_handler_asks_for_resync(monkeypatch):
+    """Test that the diff handler acks applied diffs and resyncs diverged copies."""
+    monkeypatch.setattr(
+        "src.gui.gui_builder.gui_handle_events.schedule_prerender",
+        lambda session_id, md_str: None,
+    )
+    session_id = "editor-session"
+    get_session_data(session_id).editor_md = "Hello"
+    diff = {"start": 5, "end": 5, "text": " world", "length": 5}
+    assert loads(handle_apply_report_diff(session_id, dumps(diff))) == {"synced": 11}
+    assert get_session_data(session_id).editor_md == "Hello world"
+    assert loads(handle_apply_report_diff(session_id, dumps(diff))) == {"resync": True}
+    drop_session_data(session_id)
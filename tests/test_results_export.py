@@ -0,0 +1,65 @@
+"""
+Unit tests for the streaming results exporter.
+"""
+
+from csv import reader
+from json import loads
+import tracemalloc
+
+import pytest
+
+from src.batch import results_export
+from src.batch.results_export import RESULT_FIELDS, write_results
+
+
+def _records(count: int):
+    for row_no in range(count):
+        yield {
+            "row": row_no,
+            "title": f"Case {row_no}",
+            "query": f"Query {row_no}",
+            "response": {"Abstract": "A"} if row_no == 0 else f"Answer {row_no}",
+        }
+
+
+def test_write_csv_and_jsonl(tmp_path):
+    """Test that records are written with fixed columns, structured values as JSON."""
+    csv_path = write_results(_records(3), tmp_path / "out.csv", "csv")
+    with csv_path.open(encoding="utf-8") as file:
+        rows = list(reader(file))
+    assert rows[0] == RESULT_FIELDS
+    assert rows[1] == ["0", "Case 0", "Query 0", '{"Abstract": "A"}']
+    assert len(rows) == 4
+
+    jsonl_path = write_results(_records(3), tmp_path / "out.jsonl", "jsonl")
+    lines = jsonl_path.read_text(encoding="utf-8").splitlines()
+    assert [loads(line)["row"] for line in lines] == [0, 1, 2]
+
+
+def test_write_streams_large_result_sets(tmp_path):
+    """Test that memory stays flat while writing 100k rows."""
+    tracemalloc.start()
+    write_results(_records(100_000), tmp_path / "out.csv", "csv")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 2 * 1024 * 1024
+
+
+def test_write_parquet_in_batches(tmp_path, monkeypatch):
+    """Test that parquet is written in record batches and reads back completely."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(results_export, "BATCH_EXPORT_PARQUET_BATCH_ROWS", 10)
+    path = write_results(_records(25), tmp_path / "out.parquet", "parquet")
+    table = pq.read_table(path)
+    assert table.num_rows == 25
+    assert table.column("title").to_pylist()[-1] == "Case 24"
+
+
+def test_unavailable_or_unknown_format_raises(tmp_path, monkeypatch):
+    """Test that formats without their optional package are rejected cleanly."""
+    monkeypatch.setattr(results_export, "find_spec", lambda name: None)
+    with pytest.raises(ValueError, match="xlsxwriter"):
+        write_results(_records(1), tmp_path / "out.xlsx", "xlsx")
+    with pytest.raises(ValueError, match="Unknown"):
+        write_results(_records(1), tmp_path / "out.xml", "xml")
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,101 @@
+"""
+Unit tests for the paginated results grid over the session's uploaded rows.
+"""
+
+import pytest
+
+from src.gui.gui_builder.gui_csv_index import (
+    CsvDatasetIndex,
+    CsvRowIndex,
+    set_session_row_index,
+)
+from src.gui.gui_builder.gui_results_grid import (
+    RESULTS_STATUS_DONE,
+    RESULTS_STATUS_ERROR,
+    RESULTS_STATUS_RUNNING,
+    get_session_results_grid,
+)
+
+SESSION_ID = "grid-session"
+
+
+def _index_csv(path, n_rows: int) -> CsvDatasetIndex:
+    lines = ["Title,Query"] + [f"Row {i},Query {i}" for i in range(n_rows)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    row_index = CsvRowIndex(path, has_headers=True, stride=16)
+    row_index.build()
+    return CsvDatasetIndex([row_index])
+
+
+@pytest.fixture
+def grid(tmp_path):
+    """Registers a 5000 row dataset for the session and returns its grid."""
+    set_session_row_index(SESSION_ID, _index_csv(tmp_path / "rows.csv", 5000))
+    yield get_session_results_grid(SESSION_ID)
+    set_session_row_index(SESSION_ID, None)
+
+
+def test_read_page_serves_only_requested_rows(grid):
+    """Test that a page holds its rows only, numbered from one."""
+    rows = grid.read_page(100, 20)
+    assert grid.row_count == 5000
+    assert len(rows) == 20
+    assert rows[0][:5] == [2001, "Row 2000", "Query 2000", "", ""]
+
+
+def test_edited_query_is_submitted(grid):
+    """Test that an edited query is shown and sent instead of the uploaded one."""
+    assert grid.set_query(4000, "Edited") is True
+    assert grid.set_query(4000, "Edited") is False
+    sent = []
+    grid.submit_rows([4000], lambda query: (True, sent.append(query) or "Answer"))
+    row = grid.read_page(200, 20)[0]
+    assert sent == ["Edited"]
+    assert row[2:4] == ["Edited", "Answer"]
+    assert row[4] == RESULTS_STATUS_DONE
+
+
+def test_failed_query_sets_error_status(grid):
+    """Test that a raising query stores the error as response."""
+
+    def fail(query):
+        raise RuntimeError("down")
+
+    grid.submit_rows([0, 99999], fail)
+    row = grid.read_page(0, 1)[0]
+    assert row[4] == RESULTS_STATUS_ERROR
+    assert "down" in row[3]
+
+
+def test_unanswered_query_sets_error_status(grid):
+    """Test that a query answered with an error is not marked done."""
+    grid.submit_rows([1], lambda query: (False, "Error: timeout"))
+    row = grid.read_page(1, 1)[0]
+    assert row[3:5] == ["Error: timeout", RESULTS_STATUS_ERROR]
+
+
+def test_records_hold_finished_rows(grid):
+    """Test that records are exported in row order with errors split out."""
+    grid.set_query(7, "Edited")
+    grid.submit_rows(
+        [7, 3, 5], lambda query: (query != "Query 5", f"Answer to {query}")
+    )
+    grid.set_result(9, None, RESULTS_STATUS_RUNNING)
+    records = list(grid.iter_records())
+    assert [record["row"] for record in records] == [3, 5, 7]
+    assert records[0]["response"] == "Answer to Query 3"
+    assert records[1]["response"] is None
+    assert records[1]["error"] == "Answer to Query 5"
+    assert records[2]["title"] == "Row 7"
+    assert records[2]["query"] == "Edited"
+
+
+def test_new_upload_starts_new_grid(grid, tmp_path):
+    """Test that replacing the session's dataset discards stored results."""
+    grid.set_result(0, "Old", RESULTS_STATUS_DONE)
+    set_session_row_index(SESSION_ID, _index_csv(tmp_path / "new.csv", 3))
+    new_grid = get_session_results_grid(SESSION_ID)
+    assert new_grid is not grid
+    assert new_grid.read_page(0, 20)[0][3] == ""
+    set_session_row_index(SESSION_ID, None)
+    assert get_session_results_grid(SESSION_ID) is None
@@ -0,0 +1,117 @@
+"""
+Unit tests for session cleanup on unload, TTL sweeps and disk quotas.
+"""
+
+from os import utime
+from time import time
+
+import pytest
+
+from src.server import session_lifecycle as lifecycle
+
+
+@pytest.fixture(autouse=True)
+def session_roots(monkeypatch, tmp_path):
+    """Points downloads and uploads to temporary folders, without batch jobs."""
+    roots = (tmp_path / "downloads", tmp_path / "uploads")
+    monkeypatch.setattr(lifecycle, "_SESSION_ROOTS", tuple(map(str, roots)))
+    monkeypatch.setattr(lifecycle, "_get_busy_sessions", lambda: set())
+    monkeypatch.setattr(lifecycle, "_last_seen", {})
+    monkeypatch.setattr(lifecycle, "_connected", set())
+    monkeypatch.setattr(
+        lifecycle, "SYS_SESSION_ACTIVITY_PATH", str(tmp_path / "activity")
+    )
+    return roots
+
+
+def _write(path, size: int, age: float = 0.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time() - age
+    utime(path, (mtime, mtime))
+    return path
+
+
+def test_closed_session_frees_its_folders(session_roots):
+    """Test that closing a session removes uploads and downloads."""
+    downloads, uploads = session_roots
+    _write(uploads / "abc" / "data.csv", 100)
+    _write(downloads / "abc" / "Output_abc.html", 50)
+    lifecycle.register_session("abc")
+    assert lifecycle.end_session("abc") == 150
+    assert not (uploads / "abc").exists()
+    assert not (downloads / "abc").exists()
+
+
+def test_sweep_ends_idle_sessions(session_roots):
+    """Test that only sessions idle longer than the TTL are removed."""
+    _, uploads = session_roots
+    _write(uploads / "idle" / "data.csv", 10, age=lifecycle.SYS_SESSION_TTL + 60)
+    _write(uploads / "active" / "data.csv", 10)
+    result = lifecycle.sweep_sessions()
+    assert result["ended_sessions"] == 1
+    assert result["live_sessions"] == 1
+    assert not (uploads / "idle").exists()
+    assert (uploads / "active" / "data.csv").exists()
+
+
+def test_session_quota_evicts_downloads_first(monkeypatch, session_roots):
+    """Test that a session over quota loses old exports before its uploads."""
+    downloads, uploads = session_roots
+    monkeypatch.setattr(lifecycle, "SYS_SESSION_MAX_BYTES", 150)
+    upload = _write(uploads / "big" / "data.csv", 100, age=300)
+    _write(downloads / "big" / "old.pdf", 60, age=10)
+    newest = _write(downloads / "big" / "new.pdf", 40)
+    result = lifecycle.sweep_sessions()
+    assert result["freed_bytes"] == 60
+    assert upload.exists() and newest.exists()
+
+
+def test_global_quota_ends_least_recently_used(monkeypatch, session_roots):
+    """Test that the oldest sessions are ended until all fit the global quota."""
+    _, uploads = session_roots
+    monkeypatch.setattr(lifecycle, "SYS_SESSIONS_MAX_BYTES", 250)
+    for age, session_id in ((30, "oldest"), (20, "older"), (10, "newest")):
+        _write(uploads / session_id / "data.csv", 100, age=age)
+    result = lifecycle.sweep_sessions()
+    assert result["ended_sessions"] == 1
+    assert result["bytes_on_disk"] == 200
+    assert not (uploads / "oldest").exists()
+    assert (uploads / "older").exists() and (uploads / "newest").exists()
+
+
+def test_activity_of_other_workers_is_respected(session_roots, tmp_path):
+    """Test that an activity marker written by another worker keeps a session."""
+    _, uploads = session_roots
+    _write(uploads / "shared" / "data.csv", 10, age=lifecycle.SYS_SESSION_TTL + 60)
+    _write(tmp_path / "activity" / "shared", 0)
+    assert lifecycle.sweep_sessions()["ended_sessions"] == 0
+    assert (uploads / "shared" / "data.csv").exists()
+
+
+def test_connected_sessions_do_not_expire(session_roots, tmp_path):
+    """Test that an open page keeps its session past the TTL, on every worker."""
+    _, uploads = session_roots
+    _write(uploads / "open" / "data.csv", 10, age=lifecycle.SYS_SESSION_TTL + 60)
+    lifecycle.register_session("open")
+    marker = _write(tmp_path / "activity" / "open", 0, age=lifecycle.SYS_SESSION_TTL)
+    lifecycle._last_seen.clear()
+    assert lifecycle.sweep_sessions()["ended_sessions"] == 0
+
+    assert lifecycle.refresh_connected_sessions() == 1
+    assert time() - marker.stat().st_mtime < 60
+
+
+def test_connected_session_over_quota_keeps_uploads(monkeypatch, session_roots):
+    """Test that an open page over quota only loses downloads and is not ended."""
+    downloads, uploads = session_roots
+    monkeypatch.setattr(lifecycle, "SYS_SESSION_MAX_BYTES", 50)
+    monkeypatch.setattr(lifecycle, "SYS_SESSIONS_MAX_BYTES", 50)
+    dataset = _write(uploads / "open" / "data.csv", 100, age=300)
+    partial = _write(uploads / "open" / "next.csv.part", 100, age=300)
+    _write(downloads / "open" / "old.pdf", 60, age=10)
+    lifecycle.register_session("open")
+    result = lifecycle.sweep_sessions()
+    assert result["freed_bytes"] == 60
+    assert result["ended_sessions"] == 0
+    assert dataset.exists() and partial.exists()
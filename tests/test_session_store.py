@@ -0,0 +1,79 @@
+"""
+Unit tests for the server-side session store of text group values.
+"""
+
+import pytest
+
+from src.gui.gui_builder import gui_session_store as store
+from src.gui.gui_builder.gui_handle_events import update_system_prompt
+from src.gui.gui_builder.gui_session_store import (
+    SessionData,
+    drop_session_data,
+    get_session_data,
+    get_session_store_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def small_store(monkeypatch, tmp_path):
+    """Caps the store at two sessions spilling into a temporary folder."""
+    monkeypatch.setattr(store, "_sessions", type(store._sessions)())
+    monkeypatch.setattr(store, "GUI_SESSION_STORE_MAX_SESSIONS", 2)
+    monkeypatch.setattr(store, "SYS_SESSION_SPILL_PATH", str(tmp_path))
+
+
+def test_rows_are_padded_to_group_count():
+    """Test that missing rows get the default header and empty values."""
+    data = SessionData()
+    data.set_rows(["Case 1"], ["Query 1"])
+    data.set_value(2, "outputs", "Answer 3")
+    headers, inputs, outputs = data.get_rows(3)
+    assert headers[0] == "Case 1" and headers[1] == headers[2] != ""
+    assert inputs == ["Query 1", "", ""]
+    assert outputs == ["", "", "Answer 3"]
+
+
+def test_new_upload_keeps_responses_of_unchanged_rows():
+    """Test that responses survive a re-upload only where the row is unchanged."""
+    data = SessionData()
+    data.set_rows(["A", "B"], ["a", "b"])
+    data.outputs = ["Answer A", "Answer B"]
+    data.set_rows(["A", "B"], ["a", "changed"])
+    assert data.outputs == ["Answer A", ""]
+
+
+def test_least_recently_used_session_is_spilled_and_restored(tmp_path):
+    """Test that sessions over the cap go to disk and come back on access."""
+    get_session_data("first").set_value(0, "inputs", "kept")
+    get_session_data("second")
+    get_session_data("third")
+    assert get_session_store_stats() == {"in_memory": 2, "spilled": 1}
+    assert (tmp_path / "first.json").exists()
+
+    assert get_session_data("first").inputs == ["kept"]
+    assert not (tmp_path / "first.json").exists()
+    drop_session_data("second")
+    drop_session_data("third")
+    drop_session_data("first")
+    assert get_session_store_stats() == {"in_memory": 0, "spilled": 0}
+
+
+def test_idle_sessions_expire(monkeypatch):
+    """Test that sessions idle longer than the TTL are dropped, not spilled."""
+    get_session_data("idle").set_value(0, "inputs", "old")
+    monkeypatch.setattr(store, "GUI_SESSION_STORE_TTL", -1)
+    get_session_data("active")
+    monkeypatch.setattr(store, "GUI_SESSION_STORE_TTL", 60)
+    assert get_session_data("idle").inputs == []
+
+
+def test_system_prompt_is_kept_per_session():
+    """Test that prompts are committed per session and unchanged ones skipped."""
+    update_system_prompt("first", "Be brief.")
+    version = get_session_data("first").system_prompt_version
+    update_system_prompt("first", "Be brief.")
+    assert get_session_data("first").system_prompt_version == version
+    assert get_session_data("first").system_prompt == "Be brief."
+    assert get_session_data("second").system_prompt is None
+    drop_session_data("first")
+    drop_session_data("second")
@@ -0,0 +1,31 @@
+"""
+Unit tests for the startup time profile.
+"""
+
+from src.server.startup_profile import format_startup_profile, parse_import_times
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:      1000 |       1000 |     gradio.utils
+import time:      2000 |       3000 |   gradio
+import time:       500 |        500 |     src.chat.azure_config
+import time:       250 |        750 |   src.chat
+2026-01-01 00:00:00.000 | INFO     | src.gui.gui:build_ui:1 - not an import line
+"""
+
+
+def test_import_times_are_summed_per_package():
+    """Test that self times are grouped by package, app modules by subpackage."""
+    assert parse_import_times(IMPORTTIME_OUTPUT) == {
+        "gradio": 0.003,
+        "src.chat": 0.00075,
+    }
+
+
+def test_profile_totals_time_to_first_response():
+    """Test that the profile adds imports and startup phases up."""
+    profile = format_startup_profile(
+        {"gradio": 3.0, "src.chat": 0.5}, {"build ui": 1.0, "first response": 0.25}
+    )
+    assert profile.splitlines()[1].split() == ["gradio", "3.000s"]
+    assert profile.endswith("4.750s")
@@ -0,0 +1,82 @@
+"""
+Unit tests for the streaming command-line batch runner.
+"""
+
+from io import StringIO
+from json import loads
+from random import random
+from time import sleep
+
+import pytest
+
+from src.batch import stream_runner
+from src.batch.stream_runner import (
+    ORDER_COMPLETED,
+    ORDER_INPUT,
+    iter_csv_prompts,
+    iter_jsonl_prompts,
+    run_stream,
+)
+
+VALID_JSON = (
+    '{"Abstract": "A", "Description": "D", "Sources": ["https://example.com/"]}'
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_query(monkeypatch):
+    """Replaces the model call with a validated answer after a random delay."""
+
+    def query(prompt, chat_config=None, client=None):
+        sleep(random() / 100)
+        if prompt == "fail":
+            return False, "Error validating model response"
+        return True, VALID_JSON
+
+    monkeypatch.setattr(stream_runner, "query_azure_ai_json", query)
+
+
+def test_iter_prompts_from_csv_and_jsonl():
+    """Test that prompts and ids are taken from the expected column or key."""
+    csv_input = StringIO("Title,Query\nCase 1,Query 1\nCase 2\n")
+    assert list(iter_csv_prompts(csv_input)) == [
+        ("Case 1", "Query 1"),
+        ("Case 2", "Case 2"),
+    ]
+    jsonl_input = StringIO('{"id": "a", "prompt": "p1"}\n"p2"\nnot json\n\n')
+    assert list(iter_jsonl_prompts(jsonl_input)) == [("a", "p1"), (None, "p2")]
+
+
+@pytest.mark.parametrize("order", [ORDER_INPUT, ORDER_COMPLETED])
+def test_run_stream_writes_one_record_per_prompt(order):
+    """Test that all prompts are answered and input order is kept if requested."""
+    prompts = [(str(i), "fail" if i == 3 else f"prompt {i}") for i in range(40)]
+    out = StringIO()
+
+    assert run_stream(iter(prompts), out, workers=4, order=order) == 40
+
+    records = [loads(line) for line in out.getvalue().splitlines()]
+    indexes = [record["index"] for record in records]
+    assert sorted(indexes) == list(range(40))
+    if order == ORDER_INPUT:
+        assert indexes == list(range(40))
+    failed = next(record for record in records if record["index"] == 3)
+    assert failed["response"] is None and failed["error"]
+    answered = next(record for record in records if record["index"] == 0)
+    assert answered["response"]["Sources"] == ["https://example.com/"]
+
+
+def test_run_stream_reads_ahead_a_bounded_window():
+    """Test that the input is consumed lazily, at most two windows ahead."""
+    consumed = 0
+    out = StringIO()
+
+    def prompts():
+        nonlocal consumed
+        for i in range(200):
+            consumed += 1
+            # every prompt written so far leaves at most 2 * workers in flight
+            assert consumed - len(out.getvalue().splitlines()) <= 2 * 2 + 1
+            yield None, f"prompt {i}"
+
+    assert run_stream(prompts(), out, workers=2) == 200
@@ -0,0 +1,93 @@
+"""
+Unit tests for chunked, resumable uploads.
+"""
+
+import pytest
+
+from src.gui.gui_builder.gui_csv_index import get_session_row_index
+from src.server import upload_chunks
+from src.server.upload_chunks import get_upload_status, write_upload_chunk
+
+SESSION_ID = "0123456789abcdef0123456789abcdef"
+CSV_DATA = ("Title,Count\n" + "".join(f"Row {i},{i}\n" for i in range(200))).encode()
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """Redirects session upload folders into a temporary directory."""
+    monkeypatch.setattr(
+        upload_chunks, "get_path_session_id", lambda session_id: tmp_path / session_id
+    )
+    return tmp_path / SESSION_ID
+
+
+def test_upload_in_chunks_registers_index(upload_dir):
+    """Test that a complete upload is moved in place and indexed for preview."""
+    total = len(CSV_DATA)
+    for offset in range(0, total, 1000):
+        accepted, status = write_upload_chunk(
+            SESSION_ID, "data.csv", offset, total, CSV_DATA[offset : offset + 1000]
+        )
+        assert accepted
+    assert status == {"received": total, "complete": True}
+    assert (upload_dir / "data.csv").read_bytes() == CSV_DATA
+    assert get_session_row_index(SESSION_ID).row_count == 200
+
+
+def test_out_of_order_chunk_returns_resume_offset():
+    """Test that a chunk not continuing the upload is rejected with the offset."""
+    total = len(CSV_DATA)
+    write_upload_chunk(SESSION_ID, "data.csv", 0, total, CSV_DATA[:1000])
+    accepted, status = write_upload_chunk(
+        SESSION_ID, "data.csv", 2000, total, CSV_DATA[2000:3000]
+    )
+    assert not accepted
+    assert status["received"] == 1000
+    assert get_upload_status(SESSION_ID, "data.csv") == {
+        "received": 1000,
+        "complete": False,
+    }
+
+
+def test_resume_after_restart(monkeypatch):
+    """Test that a partial file is picked up again without in-memory state."""
+    total = len(CSV_DATA)
+    write_upload_chunk(SESSION_ID, "data.csv", 0, total, CSV_DATA[:1000])
+    monkeypatch.setattr(upload_chunks, "_ACTIVE_UPLOADS", {})
+    accepted, status = write_upload_chunk(
+        SESSION_ID, "data.csv", 1000, total, CSV_DATA[1000:]
+    )
+    assert accepted and status["complete"]
+    assert get_session_row_index(SESSION_ID).row_count == 200
+
+
+@pytest.mark.parametrize(
+    "session_id, file_name, data",
+    [
+        ("../etc", "data.csv", CSV_DATA),
+        (SESSION_ID, "data.exe", CSV_DATA),
+        (SESSION_ID, "data.csv", b"a;b;c\n1;2;3\n4;5;6\n"),
+    ],
+)
+def test_invalid_first_chunk_raises(session_id, file_name, data):
+    """Test that invalid session ids, file types and dialects are rejected."""
+    with pytest.raises(ValueError):
+        write_upload_chunk(session_id, file_name, 0, len(data), data)
+
+
+def test_invalid_last_line_discards_upload(upload_dir):
+    """Test that an invalid unterminated last line rejects and forgets the upload."""
+    data = CSV_DATA * 3 + b"Row \xff,1"
+    with pytest.raises(ValueError):
+        write_upload_chunk(SESSION_ID, "data.csv", 0, len(data), data)
+    assert not upload_chunks._ACTIVE_UPLOADS
+    assert not list(upload_dir.iterdir())
+
+
+def test_upload_over_session_quota_raises(upload_dir, monkeypatch):
+    """Test that a new upload is rejected if the session's uploads exceed quota."""
+    monkeypatch.setattr(upload_chunks, "SYS_SESSION_MAX_BYTES", 2 * len(CSV_DATA))
+    write_upload_chunk(SESSION_ID, "first.csv", 0, len(CSV_DATA), CSV_DATA)
+    write_upload_chunk(SESSION_ID, "first.csv", 0, len(CSV_DATA), CSV_DATA)
+    with pytest.raises(ValueError):
+        write_upload_chunk(SESSION_ID, "second.csv", 0, 2 * len(CSV_DATA), CSV_DATA)
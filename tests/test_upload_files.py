@@ -0,0 +1,43 @@
+"""
+Unit tests for multi-file uploads into the session folder.
+"""
+
+import pytest
+
+import src.gui.gui_builder.gui_file_utils as file_utils
+from src.gui.gui_builder.gui_file_utils import upload_files
+
+SESSION_ID = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Redirects session upload folders into a temporary directory."""
+    monkeypatch.setattr(
+        file_utils, "get_path_session_id", lambda session_id: tmp_path / session_id
+    )
+    return tmp_path / SESSION_ID
+
+
+def test_duplicate_names_are_all_saved(tmp_path, upload_dir, monkeypatch):
+    """Test that files sharing a name are each saved, once validated."""
+    sources = []
+    for n, folder in enumerate(["a", "b", "c"]):
+        source = tmp_path / folder / "data.csv"
+        source.parent.mkdir()
+        source.write_text(f"Title,Text\nRow,{n}\n", encoding="utf-8")
+        sources.append(str(source))
+    validated = []
+    monkeypatch.setattr(
+        file_utils, "is_valid_file", lambda path: validated.append(path) or True
+    )
+
+    saved = upload_files(sources, SESSION_ID)
+
+    assert [path.rsplit("/", 1)[1] for path in saved] == [
+        "data.csv",
+        "data_1.csv",
+        "data_2.csv",
+    ]
+    assert (upload_dir / "data_2.csv").read_text(encoding="utf-8").endswith("2\n")
+    assert len(validated) == len(sources)
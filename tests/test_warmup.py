@@ -0,0 +1,62 @@
+"""
+Unit tests for the startup warm-up and the health probes.
+"""
+
+from threading import Event
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from src.config import SERVER_HEALTH_ROUTE, SERVER_READY_ROUTE
+from src.server import warmup
+from src.server.routes_health import router
+
+
+@pytest.fixture(autouse=True)
+def fresh_warmup(monkeypatch):
+    """Starts every test before the warm-up, without waiting between retries."""
+    monkeypatch.setattr(warmup, "_checks", {})
+    monkeypatch.setattr(warmup, "_warmed", Event())
+    monkeypatch.setattr(warmup, "SERVER_WARMUP_RETRY_INTERVAL", 0)
+
+
+def _fail():
+    raise RuntimeError("missing")
+
+
+def test_ready_after_warmup_despite_optional_failures(monkeypatch):
+    """Test that only required checks decide readiness, reported via the routes."""
+    monkeypatch.setattr(
+        warmup,
+        "_CHECKS",
+        [("template", lambda: "compiled", True), ("pandoc", _fail, False)],
+    )
+    client = TestClient(FastAPI(routes=router.routes))
+    assert client.get(SERVER_HEALTH_ROUTE).json() == {"status": "ok"}
+    assert client.get(SERVER_READY_ROUTE).status_code == 503
+
+    warmup.run_warmup()
+    response = client.get(SERVER_READY_ROUTE)
+    assert response.status_code == 200
+    assert response.json()["checks"]["pandoc"]["detail"] == "RuntimeError: missing"
+
+
+def test_failed_required_checks_are_retried(monkeypatch):
+    """Test that a required check failing at first is retried until it passes."""
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("timed out")
+        return "HTTP 200"
+
+    monkeypatch.setattr(warmup, "_CHECKS", [("chat", connect, True)])
+    warmup.run_warmup(max_rounds=2)
+    assert warmup.get_readiness()[0] is False
+
+    warmup.run_warmup()
+    ready, report = warmup.get_readiness()
+    assert ready
+    assert report["checks"]["chat"]["detail"] == "HTTP 200"